@@ -0,0 +1,33 @@
+"""Incremental auto_vacuum
+
+Revision ID: 7c1d2e4f9a10
+Revises: 457b8e9afac4
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c1d2e4f9a10"
+down_revision: Union[str, Sequence[str], None] = "457b8e9afac4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Смена auto_vacuum применяется к существующей БД только после VACUUM,
+    # а VACUUM нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        op.execute("VACUUM")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("PRAGMA auto_vacuum = NONE")
+        op.execute("VACUUM")
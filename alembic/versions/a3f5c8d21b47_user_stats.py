@@ -0,0 +1,87 @@
+"""User stats
+
+Revision ID: a3f5c8d21b47
+Revises: 7c1d2e4f9a10
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3f5c8d21b47"
+down_revision: Union[str, Sequence[str], None] = "7c1d2e4f9a10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.Column("total_length", sa.Integer(), nullable=False),
+        sa.Column("image_count", sa.Integer(), nullable=False),
+        sa.Column("first_message_at", sa.Text(), nullable=False),
+        sa.Column("last_message_at", sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+    op.create_index("idx_user_stats_last_message", "user_stats", ["last_message_at", "user_id"])
+    op.create_index("idx_user_stats_message_count", "user_stats", ["message_count", "user_id"])
+
+    # Счетчики обновляются в той же транзакции, что и вставка сообщения
+    op.execute("""
+        CREATE TRIGGER user_stats_insert AFTER INSERT ON messages
+        WHEN new.role = 'user'
+        BEGIN
+            INSERT INTO user_stats (
+                user_id, message_count, total_length, image_count,
+                first_message_at, last_message_at
+            )
+            VALUES (
+                new.user_id, 1, new.length,
+                CASE WHEN json_valid(new.content)
+                    THEN json_type(new.content, '$.image') IS NOT NULL ELSE 0 END,
+                new.created_at, new.created_at
+            )
+            ON CONFLICT (user_id) DO UPDATE SET
+                message_count = message_count + 1,
+                total_length = total_length + excluded.total_length,
+                image_count = image_count + excluded.image_count,
+                first_message_at = MIN(first_message_at, excluded.first_message_at),
+                last_message_at = MAX(last_message_at, excluded.last_message_at);
+        END
+    """)
+
+    op.execute("""
+        INSERT INTO user_stats (
+            user_id, message_count, total_length, image_count,
+            first_message_at, last_message_at
+        )
+        SELECT
+            user_id,
+            COUNT(*),
+            SUM(length),
+            SUM(CASE WHEN json_valid(content)
+                THEN json_type(content, '$.image') IS NOT NULL ELSE 0 END),
+            MIN(created_at),
+            MAX(created_at)
+        FROM messages
+        WHERE role = 'user'
+        GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS user_stats_insert")
+    op.drop_index("idx_user_stats_message_count", table_name="user_stats")
+    op.drop_index("idx_user_stats_last_message", table_name="user_stats")
+    op.drop_table("user_stats")
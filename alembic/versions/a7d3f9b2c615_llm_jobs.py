@@ -0,0 +1,49 @@
+"""LLM jobs
+
+Revision ID: a7d3f9b2c615
+Revises: e5a1f7c3b864
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d3f9b2c615"
+down_revision: Union[str, Sequence[str], None] = "e5a1f7c3b864"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "llm_jobs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("telegram_id", sa.Integer(), nullable=False),
+        sa.Column("chat_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.Text(), server_default="queued", nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("available_at", sa.Text(), nullable=False),
+        sa.Column("lease_token", sa.Text(), nullable=True),
+        sa.Column("lease_until", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+
+    op.create_index("idx_llm_jobs_status", "llm_jobs", ["status", "available_at"])
+    op.create_index("idx_llm_jobs_telegram_id", "llm_jobs", ["telegram_id", "status"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_llm_jobs_telegram_id", table_name="llm_jobs")
+    op.drop_index("idx_llm_jobs_status", table_name="llm_jobs")
+    op.drop_table("llm_jobs")
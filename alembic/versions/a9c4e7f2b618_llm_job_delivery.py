@@ -0,0 +1,31 @@
+"""LLM job delivery
+
+Revision ID: a9c4e7f2b618
+Revises: f3c9d1e5a274
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a9c4e7f2b618"
+down_revision: Union[str, Sequence[str], None] = "f3c9d1e5a274"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Сгенерированный ответ хранится до успешной отправки: повтор доставки
+    # не требует новой генерации
+    op.add_column("llm_jobs", sa.Column("response", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("llm_jobs", "response")
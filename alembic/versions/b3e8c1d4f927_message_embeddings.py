@@ -0,0 +1,50 @@
+"""Message embeddings
+
+Revision ID: b3e8c1d4f927
+Revises: a7d3f9b2c615
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b3e8c1d4f927"
+down_revision: Union[str, Sequence[str], None] = "a7d3f9b2c615"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "message_embeddings",
+        sa.Column("message_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("model", sa.Text(), nullable=False),
+        sa.Column("vector", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(["message_id"], ["messages.id"]),
+        sa.PrimaryKeyConstraint("message_id"),
+    )
+
+    op.create_index("idx_message_embeddings_user_id", "message_embeddings", ["user_id"])
+
+    # Архив и очистка удаляют сообщения физически - вектор удаляется вместе с ними
+    op.execute("""
+        CREATE TRIGGER message_embeddings_delete AFTER DELETE ON messages
+        BEGIN
+            DELETE FROM message_embeddings WHERE message_id = old.id;
+        END
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS message_embeddings_delete")
+    op.drop_index("idx_message_embeddings_user_id", table_name="message_embeddings")
+    op.drop_table("message_embeddings")
@@ -0,0 +1,44 @@
+"""Image descriptions
+
+Revision ID: c6f2a9e1b483
+Revises: b3e8c1d4f927
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c6f2a9e1b483"
+down_revision: Union[str, Sequence[str], None] = "b3e8c1d4f927"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "image_descriptions",
+        sa.Column("message_id", sa.Integer(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(["message_id"], ["messages.id"]),
+        sa.PrimaryKeyConstraint("message_id"),
+    )
+
+    op.execute("""
+        CREATE TRIGGER image_descriptions_delete AFTER DELETE ON messages
+        BEGIN
+            DELETE FROM image_descriptions WHERE message_id = old.id;
+        END
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS image_descriptions_delete")
+    op.drop_table("image_descriptions")
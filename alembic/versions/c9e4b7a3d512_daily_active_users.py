@@ -0,0 +1,53 @@
+"""Daily active users bitmaps
+
+Revision ID: c9e4b7a3d512
+Revises: a3f5c8d21b47
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from src.activity_bitmap import ActivityBitmap
+
+# revision identifiers, used by Alembic.
+revision: str = "c9e4b7a3d512"
+down_revision: Union[str, Sequence[str], None] = "a3f5c8d21b47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    daily_active_users = op.create_table(
+        "daily_active_users",
+        sa.Column("day", sa.Text(), nullable=False),
+        sa.Column("bitmap", sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+
+    # Заполнение битовых карт по уже сохраненным сообщениям
+    rows = op.get_bind().execute(
+        sa.text("""
+            SELECT DISTINCT DATE(created_at) AS day, user_id
+            FROM messages
+            WHERE role = 'user'
+        """)
+    )
+    bitmaps: dict[str, ActivityBitmap] = {}
+    for day, user_id in rows:
+        bitmaps.setdefault(day, ActivityBitmap()).add(user_id)
+
+    if bitmaps:
+        op.bulk_insert(
+            daily_active_users,
+            [{"day": day, "bitmap": bitmap.to_bytes()} for day, bitmap in bitmaps.items()],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("daily_active_users")
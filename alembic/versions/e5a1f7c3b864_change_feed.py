@@ -0,0 +1,78 @@
+"""Change feed
+
+Revision ID: e5a1f7c3b864
+Revises: c9e4b7a3d512
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a1f7c3b864"
+down_revision: Union[str, Sequence[str], None] = "c9e4b7a3d512"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "change_feed",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("op", sa.Text(), nullable=False),
+        sa.Column("message_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("role", sa.Text(), nullable=False),
+        sa.Column("length", sa.Integer(), nullable=False),
+        sa.Column("changed_at", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+
+    op.create_index("idx_change_feed_changed_at", "change_feed", ["changed_at"])
+
+    # Записи журнала появляются в той же транзакции, что и изменение сообщения
+    op.execute("""
+        CREATE TRIGGER change_feed_insert AFTER INSERT ON messages
+        WHEN new.deleted_at IS NULL
+        BEGIN
+            INSERT INTO change_feed (op, message_id, user_id, role, length, changed_at)
+            VALUES ('insert', new.id, new.user_id, new.role, new.length, new.created_at);
+        END
+    """)
+
+    op.execute("""
+        CREATE TRIGGER change_feed_soft_delete AFTER UPDATE OF deleted_at ON messages
+        WHEN old.deleted_at IS NULL AND new.deleted_at IS NOT NULL
+        BEGIN
+            INSERT INTO change_feed (op, message_id, user_id, role, length, changed_at)
+            VALUES ('delete', old.id, old.user_id, old.role, old.length, new.deleted_at);
+        END
+    """)
+
+    # Физическое удаление живого сообщения (перенос в архив)
+    op.execute("""
+        CREATE TRIGGER change_feed_delete AFTER DELETE ON messages
+        WHEN old.deleted_at IS NULL
+        BEGIN
+            INSERT INTO change_feed (op, message_id, user_id, role, length, changed_at)
+            VALUES (
+                'delete', old.id, old.user_id, old.role, old.length,
+                strftime('%Y-%m-%dT%H:%M:%f', 'now')
+            );
+        END
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS change_feed_delete")
+    op.execute("DROP TRIGGER IF EXISTS change_feed_soft_delete")
+    op.execute("DROP TRIGGER IF EXISTS change_feed_insert")
+    op.drop_index("idx_change_feed_changed_at", table_name="change_feed")
+    op.drop_table("change_feed")
@@ -0,0 +1,65 @@
+"""FTS delete trigger
+
+Revision ID: e7b2c4a9f316
+Revises: d8a4e2f6c159
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7b2c4a9f316"
+down_revision: Union[str, Sequence[str], None] = "d8a4e2f6c159"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # messages_fts — external content таблица: обычный DELETE по rowid
+    # не удаляет термы из индекса, их нужно снимать командой 'delete'
+    # со старым содержимым строки
+    op.execute("DROP TRIGGER IF EXISTS messages_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS messages_fts_delete")
+
+    op.execute("""
+        CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+    """)
+
+    op.execute("""
+        CREATE TRIGGER messages_fts_update AFTER UPDATE ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+            INSERT INTO messages_fts(rowid, content)
+            VALUES (new.id, new.content);
+        END
+    """)
+
+    # Убираем термы, оставшиеся от уже удалённых строк
+    op.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS messages_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS messages_fts_delete")
+
+    op.execute("""
+        CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+            DELETE FROM messages_fts WHERE rowid = old.id;
+        END
+    """)
+
+    op.execute("""
+        CREATE TRIGGER messages_fts_update AFTER UPDATE ON messages BEGIN
+            DELETE FROM messages_fts WHERE rowid = old.id;
+            INSERT INTO messages_fts(rowid, content)
+            VALUES (new.id, new.content);
+        END
+    """)
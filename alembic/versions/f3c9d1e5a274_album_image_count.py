@@ -0,0 +1,85 @@
+"""Album image count
+
+Revision ID: f3c9d1e5a274
+Revises: e7b2c4a9f316
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c9d1e5a274"
+down_revision: Union[str, Sequence[str], None] = "e7b2c4a9f316"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Одно фото хранится в "image", альбом - списком в "images"
+    op.execute("DROP TRIGGER IF EXISTS user_stats_insert")
+    op.execute("""
+        CREATE TRIGGER user_stats_insert AFTER INSERT ON messages
+        WHEN new.role = 'user'
+        BEGIN
+            INSERT INTO user_stats (
+                user_id, message_count, total_length, image_count,
+                first_message_at, last_message_at
+            )
+            VALUES (
+                new.user_id, 1, new.length,
+                CASE WHEN json_valid(new.content)
+                    THEN (json_type(new.content, '$.image') IS NOT NULL)
+                        + COALESCE(json_array_length(new.content, '$.images'), 0)
+                    ELSE 0 END,
+                new.created_at, new.created_at
+            )
+            ON CONFLICT (user_id) DO UPDATE SET
+                message_count = message_count + 1,
+                total_length = total_length + excluded.total_length,
+                image_count = image_count + excluded.image_count,
+                first_message_at = MIN(first_message_at, excluded.first_message_at),
+                last_message_at = MAX(last_message_at, excluded.last_message_at);
+        END
+    """)
+
+    # Досчитываем фото альбомов, пропущенные старым триггером. Пересчитывать
+    # счетчик целиком нельзя: заархивированных сообщений уже нет в messages
+    op.execute("""
+        UPDATE user_stats SET image_count = image_count + (
+            SELECT COALESCE(SUM(CASE WHEN json_valid(content)
+                THEN json_array_length(content, '$.images') ELSE 0 END), 0)
+            FROM messages
+            WHERE messages.user_id = user_stats.user_id AND role = 'user'
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS user_stats_insert")
+    op.execute("""
+        CREATE TRIGGER user_stats_insert AFTER INSERT ON messages
+        WHEN new.role = 'user'
+        BEGIN
+            INSERT INTO user_stats (
+                user_id, message_count, total_length, image_count,
+                first_message_at, last_message_at
+            )
+            VALUES (
+                new.user_id, 1, new.length,
+                CASE WHEN json_valid(new.content)
+                    THEN json_type(new.content, '$.image') IS NOT NULL ELSE 0 END,
+                new.created_at, new.created_at
+            )
+            ON CONFLICT (user_id) DO UPDATE SET
+                message_count = message_count + 1,
+                total_length = total_length + excluded.total_length,
+                image_count = image_count + excluded.image_count,
+                first_message_at = MIN(first_message_at, excluded.first_message_at),
+                last_message_at = MAX(last_message_at, excluded.last_message_at);
+        END
+    """)
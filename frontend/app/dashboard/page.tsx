@@ -1,7 +1,12 @@
 "use client";
 
 import { useState, useEffect } from "react";
-import { getStats } from "@/lib/api-client";
+import {
+  applyChartUpdate,
+  applyMessagesUpdate,
+  getStats,
+  subscribeStats,
+} from "@/lib/api-client";
 import type { DashboardStats, MetricType } from "@/lib/types";
 import { PeriodFilter } from "@/components/dashboard/period-filter";
 import { MetricsCards } from "@/components/dashboard/metrics-cards";
@@ -51,6 +56,17 @@ export default function DashboardPage() {
     fetchData();
   }, [period]);
 
+  useEffect(() => {
+    // Live-обновления: сервер присылает только изменившиеся разделы
+    return subscribeStats(period, {
+      onSnapshot: (stats) => setData(stats),
+      onMetrics: (metrics) => setData((prev) => (prev ? { ...prev, metrics } : prev)),
+      onChart: (update) => setData((prev) => (prev ? applyChartUpdate(prev, update) : prev)),
+      onMessages: (update) =>
+        setData((prev) => (prev ? applyMessagesUpdate(prev, update) : prev)),
+    });
+  }, [period]);
+
   if (loading) {
     return (
       <div className="container mx-auto p-4 md:p-6 lg:p-8">
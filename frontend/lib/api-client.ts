@@ -1,4 +1,4 @@
-import type { DashboardStats } from "./types";
+import type { ChartUpdate, DashboardStats, MessagesUpdate, Metrics } from "./types";
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -46,3 +46,57 @@ export async function getStats(days: number = 7): Promise<DashboardStats> {
   }
 }
 
+
+export interface StatsStreamHandlers {
+  onSnapshot: (stats: DashboardStats) => void;
+  onMetrics: (metrics: Metrics) => void;
+  onChart: (update: ChartUpdate) => void;
+  onMessages: (update: MessagesUpdate) => void;
+  onError?: () => void;
+}
+
+export function subscribeStats(days: number, handlers: StatsStreamHandlers): () => void {
+  const url = new URL(`${API_BASE_URL}/api/stats/stream`);
+  url.searchParams.set("days", days.toString());
+
+  const source = new EventSource(url.toString());
+  source.addEventListener("snapshot", (event) => {
+    handlers.onSnapshot(JSON.parse((event as MessageEvent).data) as DashboardStats);
+  });
+  source.addEventListener("metrics", (event) => {
+    handlers.onMetrics(JSON.parse((event as MessageEvent).data) as Metrics);
+  });
+  source.addEventListener("chart", (event) => {
+    handlers.onChart(JSON.parse((event as MessageEvent).data) as ChartUpdate);
+  });
+  source.addEventListener("messages", (event) => {
+    handlers.onMessages(JSON.parse((event as MessageEvent).data) as MessagesUpdate);
+  });
+  source.onerror = () => handlers.onError?.();
+
+  return () => source.close();
+}
+
+export function applyChartUpdate(stats: DashboardStats, update: ChartUpdate): DashboardStats {
+  const dates = new Set(update.dates);
+  const merge = <T extends { date: string }>(points: T[], changed: T[]): T[] => {
+    const byDate = new Map(points.filter((p) => dates.has(p.date)).map((p) => [p.date, p]));
+    changed.forEach((p) => byDate.set(p.date, p));
+    return Array.from(byDate.values()).sort((a, b) => a.date.localeCompare(b.date));
+  };
+  return {
+    ...stats,
+    activity_chart: merge(stats.activity_chart, update.activity_chart),
+    chart_data: merge(stats.chart_data, update.chart_data),
+  };
+}
+
+export function applyMessagesUpdate(
+  stats: DashboardStats,
+  update: MessagesUpdate
+): DashboardStats {
+  return {
+    ...stats,
+    recent_messages: [...update.new, ...stats.recent_messages].slice(0, update.limit),
+  };
+}
@@ -32,5 +32,16 @@ export interface DashboardStats {
   recent_messages: RecentMessage[];
 }
 
+export interface ChartUpdate {
+  activity_chart: ActivityDataPoint[];
+  chart_data: ChartDataPoint[];
+  dates: string[];
+}
+
+export interface MessagesUpdate {
+  new: RecentMessage[];
+  limit: number;
+}
+
 export type MetricType = "total_users" | "total_messages" | "avg_message_length";
 
@@ -0,0 +1,94 @@
+"""Микро-бенчмарк сериализации ответа /api/stats.
+
+Сравнивает прежний путь (model.dict() + json.dumps), сериализацию модели
+pydantic_core.to_json и отдачу закешированных байт с расчетом ETag.
+
+Запуск: make bench-api
+"""
+
+import hashlib
+import json
+import timeit
+from datetime import date, timedelta
+
+from pydantic_core import to_json
+
+from src.api.models import (
+    ActivityPoint,
+    ChartDataPoint,
+    DashboardStats,
+    Metrics,
+    RecentMessage,
+)
+
+DAYS = 30
+REPEAT = 2000
+
+
+def build_stats(days: int = DAYS) -> DashboardStats:
+    """Собрать статистику размера, близкого к реальному ответу за период."""
+    today = date.today()
+    dates = [(today - timedelta(days=offset)).isoformat() for offset in range(days)][::-1]
+    text = "Привет! Расскажи, пожалуйста, как устроен этот бот и что он умеет делать. " * 4
+    return DashboardStats(
+        metrics=Metrics(
+            total_users=420,
+            total_messages=125000,
+            active_today=37,
+            avg_message_length=87.5,
+            dau=37,
+            wau=120,
+            mau=310,
+        ),
+        activity_chart=[ActivityPoint(date=day, count=1400 + i) for i, day in enumerate(dates)],
+        chart_data=[
+            ChartDataPoint(
+                date=day, active_users=40, wau=120, mau=310, messages=1400 + i, avg_length=86.25
+            )
+            for i, day in enumerate(dates)
+        ],
+        recent_messages=[
+            RecentMessage(
+                telegram_id=123456789 + i,
+                role="user" if i % 2 else "assistant",
+                preview=text[:100],
+                full_text=text,
+                created_at=f"{today.isoformat()}T12:00:0{i}",
+            )
+            for i in range(10)
+        ],
+    )
+
+
+def render_legacy(stats: DashboardStats) -> bytes:
+    """Прежний рендеринг UnicodeJSONResponse."""
+    return json.dumps(
+        stats.dict(),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def main() -> None:
+    stats = build_stats()
+    cached = to_json(stats, inf_nan_mode="null")
+    assert json.loads(render_legacy(stats)) == json.loads(cached)
+
+    cases = {
+        "dict + json.dumps": lambda: render_legacy(stats),
+        "pydantic_core.to_json": lambda: to_json(stats, inf_nan_mode="null"),
+        # Закешированный ответ: остается только расчет ETag
+        "cached bytes + ETag": lambda: hashlib.blake2b(cached, digest_size=16).hexdigest(),
+    }
+    print(f"Payload: {len(cached)} bytes, {REPEAT} iterations")
+    baseline = None
+    for name, func in cases.items():
+        seconds = min(timeit.repeat(func, number=REPEAT, repeat=5)) / REPEAT
+        baseline = baseline or seconds
+        print(f"{name:>24}: {seconds * 1e6:8.1f} us/op  x{baseline / seconds:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import zlib
+from array import array
+from collections.abc import Iterable
+
+ARRAY_CONTAINER = b"A"
+BITSET_CONTAINER = b"B"
+
+
+class ActivityBitmap:
+    def __init__(self, bits: int = 0):
+        # Бит N установлен, если пользователь с внутренним id N был активен
+        self.bits = bits
+
+    def add(self, user_id: int) -> bool:
+        mask = 1 << user_id
+        if self.bits & mask:
+            return False
+        self.bits |= mask
+        return True
+
+    def __contains__(self, user_id: int) -> bool:
+        return bool(self.bits >> user_id & 1)
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __or__(self, other: "ActivityBitmap") -> "ActivityBitmap":
+        return ActivityBitmap(self.bits | other.bits)
+
+    @classmethod
+    def union(cls, bitmaps: Iterable["ActivityBitmap"]) -> "ActivityBitmap":
+        bits = 0
+        for bitmap in bitmaps:
+            bits |= bitmap.bits
+        return cls(bits)
+
+    def user_ids(self) -> list[int]:
+        result = []
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            result.append(lowest.bit_length() - 1)
+            bits ^= lowest
+        return result
+
+    def to_bytes(self) -> bytes:
+        # Разреженный день хранится массивом id, плотный - сжатым битсетом
+        bitset_size = (self.bits.bit_length() + 7) // 8
+        if len(self) * 4 < bitset_size:
+            return ARRAY_CONTAINER + array("I", self.user_ids()).tobytes()
+        return BITSET_CONTAINER + zlib.compress(self.bits.to_bytes(bitset_size, "little"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ActivityBitmap":
+        container, payload = data[:1], data[1:]
+        if container == ARRAY_CONTAINER:
+            bits = 0
+            for user_id in array("I", payload):
+                bits |= 1 << user_id
+            return cls(bits)
+        if container == BITSET_CONTAINER:
+            return cls(int.from_bytes(zlib.decompress(payload), "little"))
+        raise ValueError(f"Неизвестный формат битовой карты: {container!r}")
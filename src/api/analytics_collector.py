@@ -0,0 +1,35 @@
+"""Интерфейс для сборщиков аналитических отчетов."""
+
+from typing import Protocol
+
+from src.api.models import EngagementReport, RetentionReport
+
+
+class AnalyticsCollector(Protocol):
+    """Протокол для реализаций сборщиков аналитики.
+
+    Дополняет StatCollector отчетами, которые требуют анализа активности
+    каждого пользователя по дням: когорты, сессии, распределения.
+    """
+
+    async def get_retention(self, days: int = 30) -> RetentionReport:
+        """Получить отчет об удержании по когортам.
+
+        Args:
+            days: Период отчета в днях (по умолчанию 30).
+
+        Returns:
+            RetentionReport: Удержание когорт и stickiness.
+        """
+        ...
+
+    async def get_engagement(self, days: int = 30) -> EngagementReport:
+        """Получить отчет о вовлеченности.
+
+        Args:
+            days: Период отчета в днях (по умолчанию 30).
+
+        Returns:
+            EngagementReport: Перцентили длины сообщений и сессий, гистограмма активности.
+        """
+        ...
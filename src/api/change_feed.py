@@ -0,0 +1,226 @@
+"""Чтение журнала изменений сообщений, который пишет бот."""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from src.api.models import RecentMessage
+from src.database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+RECENT_MESSAGES_LIMIT = 10
+# Прочитанные записи журнала хранятся еще час: их может дочитывать другой процесс API
+FEED_KEEP_SECONDS = 3600.0
+PRUNE_INTERVAL_SECONDS = 60.0
+
+
+def recent_message_from_row(row: dict) -> RecentMessage:
+    """Преобразовать строку сообщения с telegram_id в RecentMessage.
+
+    Args:
+        row: Строка с полями telegram_id, role, content и created_at.
+
+    Returns:
+        RecentMessage: Сообщение для ленты дашборда.
+    """
+    # Контент хранится как JSON {"text": "...", "image": "..."}
+    try:
+        content_data = json.loads(row["content"])
+        text = content_data.get("text", "")
+    except (json.JSONDecodeError, TypeError, AttributeError):
+        # Если не JSON, используем как есть
+        text = row["content"]
+
+    return RecentMessage(
+        telegram_id=row["telegram_id"],
+        role=row["role"],
+        preview=text[:100],
+        full_text=text,
+        created_at=row["created_at"],
+    )
+
+
+class ChangeFeed:
+    """Live-агрегаты по журналу change_feed.
+
+    Бот не знает об API: записи журнала создают триггеры в той же транзакции, что и
+    изменение сообщения. API читает журнал с последнего прочитанного id и поддерживает
+    в памяти счетчики живых сообщений и кольцевой буфер последних сообщений, поэтому
+    дашборды обновляются без пересчета по полным таблицам. Прочитанные записи журнал
+    удаляет сам, независимо от очистки БД.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        recent_limit: int = RECENT_MESSAGES_LIMIT,
+        batch_size: int = 500,
+        keep_seconds: float = FEED_KEEP_SECONDS,
+        prune_interval: float = PRUNE_INTERVAL_SECONDS,
+    ):
+        """Инициализация журнала.
+
+        Args:
+            db: DatabaseManager рабочей БД.
+            recent_limit: Размер буфера последних сообщений.
+            batch_size: Количество записей журнала за один запрос.
+            keep_seconds: Сколько хранить прочитанные записи журнала.
+            prune_interval: Период удаления прочитанных записей.
+        """
+        self.db = db
+        self.recent_limit = recent_limit
+        self.batch_size = batch_size
+        self.keep_seconds = keep_seconds
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+        self.ready = False
+        self.last_id = 0
+        self.total_messages = 0
+        self.length_sum = 0
+        self._recent: deque[tuple[int, RecentMessage]] = deque(maxlen=recent_limit)
+        self._recent_stale = False
+
+    @property
+    def version(self) -> int:
+        """Id последней примененной записи; меняется при каждом изменении сообщений."""
+        return self.last_id
+
+    @property
+    def avg_message_length(self) -> float:
+        """Средняя длина живого сообщения."""
+        return self.length_sum / self.total_messages if self.total_messages else 0.0
+
+    @property
+    def recent_messages(self) -> list[RecentMessage]:
+        """Последние сообщения, от новых к старым."""
+        return [message for _, message in self._recent]
+
+    async def start(self) -> bool:
+        """Загрузить начальное состояние агрегатов.
+
+        Returns:
+            bool: True, если журнал доступен (миграция применена).
+        """
+        table = await self.db.fetchone(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'change_feed'"
+        )
+        if not table:
+            logger.warning("Таблица change_feed не найдена, live-агрегаты отключены")
+            return False
+
+        # Один запрос - согласованный снимок позиции журнала и агрегатов
+        row = await self.db.fetchone(
+            """
+            SELECT
+                (SELECT COALESCE(MAX(id), 0) FROM change_feed) as last_id,
+                COUNT(*) as count,
+                COALESCE(SUM(length), 0) as length_sum
+            FROM messages
+            WHERE deleted_at IS NULL
+            """
+        )
+        if row:
+            self.last_id = row["last_id"]
+            self.total_messages = row["count"]
+            self.length_sum = row["length_sum"]
+        await self._load_recent()
+        self.ready = True
+        return True
+
+    async def poll(self) -> int:
+        """Применить новые записи журнала.
+
+        Returns:
+            int: Количество примененных записей.
+        """
+        applied = 0
+        while True:
+            changes = await self.db.get_changes(self.last_id, self.batch_size)
+            for change in changes:
+                self._apply(change)
+            applied += len(changes)
+            if len(changes) < self.batch_size:
+                break
+
+        if self._recent_stale:
+            await self._load_recent()
+        return applied
+
+    async def run_periodically(self, interval_seconds: float) -> None:
+        """Читать журнал с заданным периодом."""
+        while True:
+            try:
+                if self.ready:
+                    await self.poll()
+                    if time.monotonic() >= self._next_prune:
+                        self._next_prune = time.monotonic() + self.prune_interval
+                        await self.prune()
+                elif not await self.start():
+                    return
+            except Exception as e:
+                logger.error(f"Ошибка чтения журнала изменений: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    async def prune(self) -> int:
+        """Удалить прочитанные записи журнала старше keep_seconds.
+
+        Returns:
+            int: Количество удаленных записей.
+        """
+        before = (datetime.utcnow() - timedelta(seconds=self.keep_seconds)).isoformat()
+        removed = 0
+        while True:
+            rows = await self.db.fetchall(
+                "SELECT id FROM change_feed WHERE id <= ? AND changed_at < ? ORDER BY id LIMIT ?",
+                (self.last_id, before, self.batch_size),
+            )
+            if not rows:
+                return removed
+
+            ids = tuple(row["id"] for row in rows)
+            placeholders = ", ".join("?" for _ in ids)
+            await self.db.execute(f"DELETE FROM change_feed WHERE id IN ({placeholders})", ids)
+            removed += len(ids)
+            # Короткие транзакции, чтобы не блокировать запись бота
+            await asyncio.sleep(0)
+
+    def _apply(self, change: dict) -> None:
+        """Применить одну запись журнала к агрегатам."""
+        self.last_id = change["id"]
+        message_id = change["message_id"]
+        buffered = any(buffered_id == message_id for buffered_id, _ in self._recent)
+
+        if change["op"] == "insert":
+            self.total_messages += 1
+            self.length_sum += change["length"]
+            # content пуст, если сообщение уже удалено физически - его удаление придет следом
+            if change["content"] is not None and not buffered:
+                self._recent.appendleft((message_id, recent_message_from_row(change)))
+        elif change["op"] == "delete":
+            self.total_messages -= 1
+            self.length_sum -= change["length"]
+            if buffered:
+                # Освободившееся место в буфере заполняется из БД после пачки записей
+                self._recent_stale = True
+
+    async def _load_recent(self) -> None:
+        """Заполнить буфер последних сообщений из БД."""
+        rows = await self.db.fetchall(
+            """
+            SELECT m.id, u.telegram_id, m.role, m.content, m.created_at
+            FROM messages m
+            JOIN users u ON m.user_id = u.id
+            WHERE m.deleted_at IS NULL
+            ORDER BY m.created_at DESC
+            LIMIT ?
+            """,
+            (self.recent_limit,),
+        )
+        self._recent = deque(
+            ((row["id"], recent_message_from_row(row)) for row in rows), maxlen=self.recent_limit
+        )
+        self._recent_stale = False
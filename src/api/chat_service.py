@@ -1,11 +1,13 @@
 """Сервис для обработки запросов чата."""
 
+import asyncio
 import logging
 import uuid
 from datetime import datetime
 
 from src.database import DatabaseManager
 from src.llm_client import LLMClient
+from src.llm_scheduler import ADMIN, LLMScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -23,14 +25,18 @@ class ChatSession:
 class ChatService:
     """Сервис для обработки сообщений чата."""
 
-    def __init__(self, llm_client: LLMClient, db: DatabaseManager):
+    def __init__(
+        self, llm_client: LLMClient, db: DatabaseManager, scheduler: LLMScheduler | None = None
+    ):
         """Инициализация chat сервиса.
 
         Args:
             llm_client: Клиент для работы с LLM.
             db: Менеджер базы данных.
+            scheduler: Очередь запросов к LLM; по умолчанию создается своя.
         """
         self.llm_client = llm_client
+        self.scheduler = scheduler or LLMScheduler(llm_client)
         self.db = db
         self.sessions: dict[str, ChatSession] = {}
         self.admin_prompt = self._get_admin_prompt()
@@ -110,6 +116,11 @@ class ChatService:
 
             return response, session.session_id
 
+        except asyncio.CancelledError:
+            # Клиент ушел: ответ не нужен, его вопрос убирается из истории сессии
+            session.messages.remove(user_message)
+            logger.info(f"Запрос в сессии {session.session_id} отменен клиентом")
+            raise
         except Exception as e:
             logger.error(f"Ошибка обработки сообщения: {e}")
             error_response = "Извините, произошла ошибка при обработке вашего запроса."
@@ -124,8 +135,9 @@ class ChatService:
         Returns:
             str: Ответ ассистента.
         """
-        # Использовать стандартный system prompt из LLMClient
-        response = self.llm_client.get_response(session.messages)
+        # Использовать стандартный system prompt из LLMClient.
+        # Чат дашборда идет в очередь после запросов пользователей бота
+        response = await self.scheduler.get_response(ADMIN, session.session_id, session.messages)
         return response
 
     async def _process_admin_message(self, session: ChatSession) -> str:
@@ -148,18 +160,11 @@ class ChatService:
 
 Используй эти данные для ответа на вопросы пользователя."""
 
-        messages_with_admin_prompt = [
-            {"role": "system", "content": admin_prompt_with_stats}
-        ] + session.messages
-
-        # Вызвать LLM напрямую через client
-        response = self.llm_client.client.chat.completions.create(
-            model=self.llm_client.model, messages=messages_with_admin_prompt
+        # Запрос через общую очередь, как в normal режиме; режим учитывается при выборе модели
+        return await self.scheduler.get_response(
+            ADMIN, session.session_id, session.messages, admin_prompt_with_stats, "admin"
         )
 
-        content = response.choices[0].message.content
-        return content if content is not None else ""
-
     async def _get_stats_context(self) -> str:
         """Получить контекст со статистикой из БД.
 
@@ -1,33 +1,95 @@
 """FastAPI приложение для Dashboard API."""
 
-import json
+import asyncio
+import hashlib
+import math
+import os
+import time
 from contextlib import asynccontextmanager
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+from typing import Literal
 
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from openai import OpenAI
+from pydantic_core import to_json
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.api.analytics_collector import AnalyticsCollector
+from src.api.change_feed import ChangeFeed
 from src.api.chat_models import ChatRequest, ChatResponse
 from src.api.chat_service import ChatService
+from src.api.mock_analytics_collector import MockAnalyticsCollector
 from src.api.mock_stat_collector import MockStatCollector
+from src.api.models import (
+    LLMBackendStatus,
+    LLMJobStats,
+    LLMSchedulerStats,
+    LoopLagStats,
+    ModelRouteStats,
+    ReadinessStatus,
+    SemanticCacheStats,
+)
+from src.api.real_analytics_collector import RealAnalyticsCollector
 from src.api.real_stat_collector import RealStatCollector
 from src.api.stat_collector import StatCollector
+from src.api.stats_broadcaster import StatsBroadcaster
+from src.backup_manager import ANALYTICS_SNAPSHOT
 from src.config import Config
 from src.database import DatabaseManager
 from src.llm_client import LLMClient
+from src.llm_hedging import HedgePolicy
+from src.llm_jobs import LLMJobQueue
+from src.llm_scheduler import LLMScheduler, estimate_cost
+from src.loop_monitor import LoopMonitor
+from src.message_archive import MessageArchive
+from src.rate_limiter import RateLimiter, estimate_tokens
+from src.saturation import SaturationMonitor
+from src.semantic_cache import SemanticCache
+
+SSE_HEARTBEAT_SECONDS = 15.0
+STATS_PAYLOAD_TTL_SECONDS = 60
+GZIP_MINIMUM_SIZE = 1024
+DISCONNECT_POLL_INTERVAL = 0.5
+SHED_RETRY_AFTER_SECONDS = 5
+# Запрос статистики на старом снимке успевает завершиться за это время
+SNAPSHOT_CLOSE_DELAY_SECONDS = 60.0
+CHAT_MESSAGE_PATH = "/api/chat/message"
 
 
 class UnicodeJSONResponse(JSONResponse):
-    """JSONResponse с корректной обработкой Unicode."""
+    """JSONResponse с корректной обработкой Unicode.
+
+    Сериализует сразу в UTF-8 байты сериализатором pydantic_core: Pydantic модели
+    передаются как есть, без промежуточных dict и str.
+    """
 
     def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        ).encode("utf-8")
+        return to_json(content, inf_nan_mode="null")
+
+
+def json_response(request: Request, body: bytes) -> Response:
+    """Собрать JSON ответ с ETag.
+
+    ETag слабый: он считается по несжатому телу, а GZipMiddleware может отдать
+    то же представление сжатым. Если клиент прислал тот же ETag в If-None-Match,
+    тело не отправляется (304).
+
+    Args:
+        request: HTTP запрос.
+        body: Сериализованное тело ответа.
+
+    Returns:
+        Response: Ответ 200 с телом или 304 без тела.
+    """
+    opaque_tag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": f"W/{opaque_tag}", "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if opaque_tag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @asynccontextmanager
@@ -40,20 +102,137 @@ async def lifespan(app: FastAPI):
     await db.connect()
     app.state.db = db
 
+    # Архив холодной истории для статистики (если включена архивация)
+    app.state.archive = (
+        MessageArchive(db, config.archive_dir) if config.archive_after_days > 0 else None
+    )
+
+    # Read-only снимок БД для статистики, чтобы не нагружать рабочую БД
+    app.state.snapshot_path = (
+        os.path.join(config.backup_dir, ANALYTICS_SNAPSHOT) if config.stats_from_snapshot else None
+    )
+    app.state.snapshot_db = None
+    app.state.snapshot_mtime = 0.0
+    app.state.snapshot_lock = asyncio.Lock()
+    app.state.retired_snapshots = set()
+
+    # Кеш аналитических отчетов, общий для всех запросов
+    app.state.analytics_cache = {}
+
+    # Сериализованные ответы /api/stats по периодам графиков
+    app.state.stats_payloads = {}
+
+    # Рассылки live-статистики по периодам графиков
+    app.state.stats_broadcasters = {}
+
+    # Журнал изменений от бота: live-счетчики и последние сообщения без пересчета
+    change_feed = ChangeFeed(db)
+    app.state.change_feed = change_feed
+    change_feed_task = asyncio.create_task(
+        change_feed.run_periodically(config.change_feed_interval)
+    )
+
     # Инициализация LLMClient для чата
     llm_client = LLMClient(
         base_url=config.llm_base_url,
         model=config.llm_model,
         system_prompt_file=config.system_prompt_file,
+        backends=config.llm_backends,
+        hedge_policy=HedgePolicy(
+            percentile=config.llm_hedge_percentile,
+            min_delay=config.llm_hedge_min_delay,
+            budget=config.llm_hedge_budget,
+        )
+        if config.llm_hedge_enabled
+        else None,
+        attempt_timeout=config.llm_attempt_timeout,
+        request_deadline=config.llm_request_deadline,
+        routes=config.llm_routes,
     )
     app.state.llm_client = llm_client
-
-    # Инициализация ChatService
-    chat_service = ChatService(llm_client, db)
+    background_tasks = [change_feed_task]
+    if config.llm_health_check_interval > 0:
+        background_tasks.append(
+            asyncio.create_task(llm_client.pool.run_health_checks(config.llm_health_check_interval))
+        )
+
+    # Инициализация ChatService: запросы к LLM через очередь с ограничением параллельности
+    # Семантический кэш ответов на первые вопросы (включается отдельно, нужна модель эмбеддингов)
+    semantic_cache = (
+        SemanticCache(
+            OpenAI(
+                base_url=config.embedding_base_url or config.llm_base_url,
+                api_key="not-needed",
+                timeout=30.0,
+            ),
+            config.embedding_model,
+            threshold=config.semantic_cache_threshold,
+            max_entries=config.semantic_cache_max_entries,
+            ttl_seconds=config.semantic_cache_ttl_seconds,
+        )
+        if config.embedding_model and config.semantic_cache_enabled
+        else None
+    )
+    app.state.llm_scheduler = LLMScheduler(
+        llm_client,
+        concurrency_per_backend=config.llm_concurrency_per_backend,
+        quantum=config.llm_scheduler_quantum,
+        cache=semantic_cache,
+    )
+    chat_service = ChatService(llm_client, db, app.state.llm_scheduler)
     app.state.chat_service = chat_service
 
+    # Задержка цикла событий; в debug режиме - стеки блокирующих вызовов
+    loop_monitor = LoopMonitor(
+        block_threshold=config.loop_block_threshold, debug=config.loop_monitor_debug
+    )
+    loop_monitor.start()
+    app.state.loop_monitor = loop_monitor
+
+    # Насыщение: очередь LLM, запросы к БД, задержка цикла событий, circuit breaker
+    app.state.saturation = SaturationMonitor(
+        llm_client,
+        app.state.llm_scheduler,
+        db,
+        loop_monitor,
+        max_llm_queue=config.ready_max_llm_queue,
+        max_db_pending=config.ready_max_db_pending,
+        max_loop_lag=config.ready_max_loop_lag,
+    )
+    app.state.load_shedding = config.load_shedding_enabled
+
+    # Лимиты запросов к чату по IP клиента
+    app.state.trusted_proxies = [ip_network(proxy) for proxy in config.rate_limit_trusted_proxies]
+    app.state.rate_limiter = None
+    if config.rate_limit_enabled:
+        app.state.rate_limiter = RateLimiter(
+            "api",
+            messages_per_minute=config.rate_limit_messages_per_minute,
+            tokens_per_hour=config.rate_limit_tokens_per_hour,
+            images_per_hour=config.rate_limit_images_per_hour,
+            db=db if config.rate_limit_persist else None,
+        )
+        await app.state.rate_limiter.load()
+        background_tasks.append(
+            asyncio.create_task(
+                app.state.rate_limiter.run_periodically(config.rate_limit_flush_interval)
+            )
+        )
+
     yield
 
+    for task in background_tasks:
+        task.cancel()
+    await loop_monitor.stop()
+    for broadcaster in app.state.stats_broadcasters.values():
+        await broadcaster.stop()
+    # Отмена задержки сразу закрывает замененные снимки
+    retired_snapshots = list(app.state.retired_snapshots)
+    for task in retired_snapshots:
+        task.cancel()
+    await asyncio.gather(*retired_snapshots, return_exceptions=True)
+    if app.state.snapshot_db:
+        await app.state.snapshot_db.close()
     await db.close()
 
 
@@ -65,6 +244,147 @@ app = FastAPI(
     default_response_class=UnicodeJSONResponse,
 )
 
+
+def client_key(request: Request) -> str:
+    """Ключ клиента для лимитов запросов.
+
+    За доверенным прокси (frontend проксирует /api/* через rewrite Next.js) адрес
+    соединения - это адрес прокси, общий для всех пользователей. Тогда клиент
+    берется из X-Forwarded-For: справа налево до первого адреса не из доверенных
+    сетей. Заголовок от недоверенного адреса игнорируется - его легко подделать.
+
+    Args:
+        request: HTTP запрос.
+
+    Returns:
+        str: IP адрес клиента.
+    """
+    peer = request.client.host if request.client else "unknown"
+    trusted: list[IPv4Network | IPv6Network] = getattr(request.app.state, "trusted_proxies", [])
+    if not trusted or not is_trusted(peer, trusted):
+        return peer
+    forwarded = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",")
+        if address.strip()
+    ]
+    for address in reversed(forwarded):
+        if not is_trusted(address, trusted):
+            return address
+    return forwarded[0] if forwarded else peer
+
+
+def is_trusted(address: str, trusted: list[IPv4Network | IPv6Network]) -> bool:
+    """Проверить, что адрес принадлежит доверенной сети прокси.
+
+    Args:
+        address: IP адрес.
+        trusted: Доверенные сети.
+
+    Returns:
+        bool: True, если адрес в одной из сетей.
+    """
+    try:
+        ip = ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted)
+
+
+class RateLimitMiddleware:
+    """Отклонить запрос к чату сверх лимита до любой работы с БД и LLM.
+
+    Токены промпта оцениваются по Content-Length, токены ответа списываются
+    после генерации в chat_message. Чистый ASGI middleware: BaseHTTPMiddleware
+    подменяет receive, и chat_message не увидел бы разрыв соединения.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Инициализация middleware.
+
+        Args:
+            app: Следующее ASGI приложение.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Обработать ASGI вызов.
+
+        Args:
+            scope: ASGI scope.
+            receive: Получение сообщений от клиента.
+            send: Отправка сообщений клиенту.
+        """
+        if scope["type"] == "http":
+            request = Request(scope)
+            rate_limiter: RateLimiter | None = getattr(request.app.state, "rate_limiter", None)
+            if rate_limiter and request.method == "POST" and request.url.path == CHAT_MESSAGE_PATH:
+                length = int(request.headers.get("content-length") or 0)
+                wait = rate_limiter.check(client_key(request), tokens=estimate_tokens(length))
+                if wait:
+                    response = UnicodeJSONResponse(
+                        {"detail": "Слишком много запросов, попробуйте позже"},
+                        status_code=429,
+                        headers={"Retry-After": str(math.ceil(wait))},
+                    )
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
+
+
+class LoadSheddingMiddleware:
+    """Отклонить запрос к чату при перегрузке до любой работы с БД и LLM.
+
+    Быстрый отказ 503 лучше ответа, который все равно не успеет до таймаута клиента.
+    Чистый ASGI middleware по той же причине, что и RateLimitMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Инициализация middleware.
+
+        Args:
+            app: Следующее ASGI приложение.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Обработать ASGI вызов.
+
+        Args:
+            scope: ASGI scope.
+            receive: Получение сообщений от клиента.
+            send: Отправка сообщений клиенту.
+        """
+        if scope["type"] == "http":
+            request = Request(scope)
+            saturation: SaturationMonitor | None = getattr(request.app.state, "saturation", None)
+            if (
+                saturation
+                and getattr(request.app.state, "load_shedding", False)
+                and request.method == "POST"
+                and request.url.path == CHAT_MESSAGE_PATH
+                and saturation.should_shed()
+            ):
+                response = UnicodeJSONResponse(
+                    {"detail": "Сервис перегружен, попробуйте позже"},
+                    status_code=503,
+                    headers={"Retry-After": str(SHED_RETRY_AFTER_SECONDS)},
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+# Лимиты запросов к чату. Регистрируется до CORS: ответ 429 тоже получает CORS заголовки
+app.add_middleware(RateLimitMiddleware)
+
+# Сброс нагрузки: регистрируется после лимитов и выполняется раньше них
+app.add_middleware(LoadSheddingMiddleware)
+
+# Сжатие крупных ответов (SSE поток не сжимается)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
 # CORS для доступа из frontend
 app.add_middleware(
     CORSMiddleware,
@@ -75,7 +395,55 @@ app.add_middleware(
 )
 
 
-def get_stat_collector() -> StatCollector:
+async def get_stats_db() -> DatabaseManager:
+    """Получить БД для запросов статистики.
+
+    Если включена статистика по снимку, открывает последний снимок только на чтение
+    и переоткрывает его при появлении нового. Предыдущий снимок закрывается с задержкой:
+    им могут пользоваться запросы, начатые до замены. Пока снимка нет, используется
+    рабочая БД.
+
+    Returns:
+        DatabaseManager: Снимок или рабочая БД.
+    """
+    snapshot_path = app.state.snapshot_path
+    if not snapshot_path or not os.path.exists(snapshot_path):
+        return app.state.db
+
+    if app.state.snapshot_db and os.path.getmtime(snapshot_path) == app.state.snapshot_mtime:
+        return app.state.snapshot_db
+
+    # Замена сериализуется: запросы, одновременно увидевшие новый снимок,
+    # открывают его один раз
+    async with app.state.snapshot_lock:
+        mtime = os.path.getmtime(snapshot_path)
+        if app.state.snapshot_db is None or mtime != app.state.snapshot_mtime:
+            snapshot_db = DatabaseManager(snapshot_path, read_only=True)
+            await snapshot_db.connect()
+            retired = app.state.snapshot_db
+            app.state.snapshot_db = snapshot_db
+            app.state.snapshot_mtime = mtime
+            if retired:
+                task = asyncio.create_task(close_retired_snapshot(retired))
+                app.state.retired_snapshots.add(task)
+                task.add_done_callback(app.state.retired_snapshots.discard)
+
+    return app.state.snapshot_db
+
+
+async def close_retired_snapshot(snapshot_db: DatabaseManager) -> None:
+    """Закрыть замененный снимок, когда начатые на нем запросы завершатся.
+
+    Args:
+        snapshot_db: Предыдущий снимок.
+    """
+    try:
+        await asyncio.sleep(SNAPSHOT_CLOSE_DELAY_SECONDS)
+    finally:
+        await snapshot_db.close()
+
+
+async def get_stat_collector() -> StatCollector:
     """Dependency для получения StatCollector.
 
     Возвращает Mock или Real реализацию в зависимости от конфигурации.
@@ -86,24 +454,212 @@ def get_stat_collector() -> StatCollector:
     config = Config()
     if config.use_mock_stats:
         return MockStatCollector()
-    return RealStatCollector(app.state.db)
+    db = await get_stats_db()
+    # Live-агрегаты журнала относятся к рабочей БД; со снимком все берется из снимка
+    change_feed = app.state.change_feed if db is app.state.db else None
+    return RealStatCollector(db, app.state.archive, change_feed)
+
+
+async def get_analytics_collector() -> AnalyticsCollector:
+    """Dependency для получения AnalyticsCollector.
+
+    Возвращает Mock или Real реализацию в зависимости от конфигурации.
+
+    Returns:
+        AnalyticsCollector: Реализация сборщика аналитики.
+    """
+    config = Config()
+    if config.use_mock_stats:
+        return MockAnalyticsCollector()
+    return RealAnalyticsCollector(await get_stats_db(), app.state.analytics_cache)
 
 
 @app.get("/api/stats")
 async def get_stats(
-    days: int = 7, collector: StatCollector = Depends(get_stat_collector)
-) -> UnicodeJSONResponse:
+    request: Request,
+    days: int = Query(7, ge=1, le=90),
+    collector: StatCollector = Depends(get_stat_collector),
+) -> Response:
     """Получить статистику для дашборда.
 
+    Сериализованный ответ переиспользуется, пока данные не изменились,
+    но не дольше STATS_PAYLOAD_TTL_SECONDS (окна вида "за последние 24 часа" сдвигаются).
+
     Args:
-        days: Количество дней для графиков (по умолчанию 7).
+        request: HTTP запрос (для If-None-Match).
+        days: Количество дней для графиков (1-90, по умолчанию 7).
         collector: Инжектированный StatCollector.
 
     Returns:
         DashboardStats: Полная статистика с метриками, графиком и сообщениями.
     """
-    stats = await collector.get_stats(days=days)
-    return UnicodeJSONResponse(content=stats.dict())
+    token = await get_stats_payload_token()
+    payloads: dict[int, tuple[tuple, bytes]] = app.state.stats_payloads if token is not None else {}
+    cached = payloads.get(days)
+    if cached and cached[0] == token:
+        body = cached[1]
+    else:
+        stats = await collector.get_stats(days=days)
+        body = to_json(stats, inf_nan_mode="null")
+        if token is not None:
+            payloads[days] = (token, body)
+    return json_response(request, body)
+
+
+async def get_stats_payload_token() -> tuple | None:
+    """Получить метку актуальности сериализованной статистики.
+
+    Returns:
+        tuple | None: Метка изменения данных и номер интервала TTL;
+            None для Mock режима (данные генерируются на каждый запрос).
+    """
+    if Config().use_mock_stats:
+        return None
+    return (*await get_stats_data_version(), int(time.time() // STATS_PAYLOAD_TTL_SECONDS))
+
+
+async def get_stats_data_version() -> tuple[int, int]:
+    """Получить метку изменения данных статистики.
+
+    Пока журнал изменений доступен и статистика считается по рабочей БД, меткой служит
+    позиция журнала. Иначе используется PRAGMA data_version, которая меняется, когда другое
+    соединение (бот) фиксирует изменения.
+
+    Returns:
+        tuple: (идентификатор используемой БД, позиция журнала или data_version).
+    """
+    db = await get_stats_db()
+    change_feed: ChangeFeed = app.state.change_feed
+    if change_feed.ready and db is app.state.db:
+        return id(db), change_feed.version
+    row = await db.fetchone("PRAGMA data_version")
+    return id(db), row["data_version"] if row else 0
+
+
+def get_stats_broadcaster(days: int) -> StatsBroadcaster:
+    """Получить общую рассылку статистики для периода графиков.
+
+    Args:
+        days: Количество дней для графиков.
+
+    Returns:
+        StatsBroadcaster: Рассылка, созданная при первом обращении.
+    """
+    broadcasters: dict[int, StatsBroadcaster] = app.state.stats_broadcasters
+    if days not in broadcasters:
+        config = Config()
+        broadcasters[days] = StatsBroadcaster(
+            get_stat_collector,
+            days=days,
+            interval=config.stats_stream_interval,
+            change_token=None if config.use_mock_stats else get_stats_data_version,
+        )
+    return broadcasters[days]
+
+
+@app.get("/api/stats/stream")
+async def stream_stats(request: Request, days: int = Query(7, ge=1, le=90)) -> StreamingResponse:
+    """Поток обновлений статистики (Server-Sent Events).
+
+    Первое событие snapshot содержит полную статистику, далее приходят только
+    изменившиеся разделы: metrics, chart (измененные точки и актуальные даты)
+    и messages (новые сообщения и размер списка).
+
+    Args:
+        request: HTTP запрос (для отслеживания отключения клиента).
+        days: Количество дней для графиков (1-90).
+
+    Returns:
+        StreamingResponse: Поток text/event-stream.
+    """
+    broadcaster = get_stats_broadcaster(days)
+    queue = broadcaster.subscribe()
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    name, data = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                payload = to_json(data, inf_nan_mode="null").decode("utf-8")
+                yield f"event: {name}\ndata: {payload}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/users")
+async def get_users(
+    request: Request,
+    sort: Literal["messages", "last_active"] = "messages",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    collector: StatCollector = Depends(get_stat_collector),
+) -> Response:
+    """Получить пользователей, отсортированных по активности.
+
+    Args:
+        request: HTTP запрос (для If-None-Match).
+        sort: Сортировка: messages (по числу сообщений) или last_active.
+        limit: Размер страницы (1-100).
+        cursor: Курсор next_cursor из предыдущей страницы.
+        collector: Инжектированный StatCollector.
+
+    Returns:
+        UsersPage: Страница пользователей и курсор следующей страницы.
+    """
+    try:
+        page = await collector.get_users(sort=sort, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return json_response(request, to_json(page, inf_nan_mode="null"))
+
+
+@app.get("/api/analytics/retention")
+async def get_retention(
+    request: Request,
+    days: int = Query(30, ge=1, le=90),
+    collector: AnalyticsCollector = Depends(get_analytics_collector),
+) -> Response:
+    """Получить удержание когорт новых пользователей.
+
+    Args:
+        request: HTTP запрос (для If-None-Match).
+        days: Период отчета в днях (1-90).
+        collector: Инжектированный AnalyticsCollector.
+
+    Returns:
+        RetentionReport: Удержание когорт и stickiness.
+    """
+    report = await collector.get_retention(days=days)
+    return json_response(request, to_json(report, inf_nan_mode="null"))
+
+
+@app.get("/api/analytics/engagement")
+async def get_engagement(
+    request: Request,
+    days: int = Query(30, ge=1, le=90),
+    collector: AnalyticsCollector = Depends(get_analytics_collector),
+) -> Response:
+    """Получить распределения длины сообщений, сессий и активности пользователей.
+
+    Args:
+        request: HTTP запрос (для If-None-Match).
+        days: Период отчета в днях (1-90).
+        collector: Инжектированный AnalyticsCollector.
+
+    Returns:
+        EngagementReport: Перцентили и гистограмма активности.
+    """
+    report = await collector.get_engagement(days=days)
+    return json_response(request, to_json(report, inf_nan_mode="null"))
 
 
 @app.get("/")
@@ -131,20 +687,129 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/api/chat/message", response_model=ChatResponse)
-async def chat_message(request: ChatRequest) -> ChatResponse:
+@app.get("/ready", response_model=ReadinessStatus)
+async def ready() -> UnicodeJSONResponse:
+    """Readiness check: готов ли API принимать запросы к чату.
+
+    В отличие от /health отвечает 503, если превышен порог очереди LLM, запросов к БД
+    или задержки цикла событий, либо все LLM бэкенды исключены circuit breaker.
+
+    Returns:
+        ReadinessStatus: Метрики насыщения и превышенные пороги.
+    """
+    saturation: SaturationMonitor = app.state.saturation
+    status = ReadinessStatus(**saturation.snapshot())
+    return UnicodeJSONResponse(
+        content=status, status_code=503 if status.status == "overloaded" else 200
+    )
+
+
+@app.get("/api/diagnostics/loop", response_model=LoopLagStats)
+async def get_loop_diagnostics() -> LoopLagStats:
+    """Получить гистограмму задержки цикла событий API.
+
+    Returns:
+        LoopLagStats: Перцентили, максимум и гистограмма задержки.
+    """
+    loop_monitor: LoopMonitor = app.state.loop_monitor
+    return LoopLagStats(**loop_monitor.stats())
+
+
+@app.get("/api/llm/status")
+async def get_llm_status() -> UnicodeJSONResponse:
+    """Получить состояние LLM бэкендов.
+
+    Returns:
+        list[LLMBackendStatus]: Состояние circuit breaker, запросы в работе и задержка.
+    """
+    llm_client: LLMClient = app.state.llm_client
+    return UnicodeJSONResponse(
+        content=[LLMBackendStatus(**state) for state in llm_client.pool.states()]
+    )
+
+
+@app.get("/api/llm/routes")
+async def get_llm_routes() -> UnicodeJSONResponse:
+    """Получить статистику маршрутов выбора модели.
+
+    Returns:
+        list[ModelRouteStats]: Число запросов, ошибок и задержки по каждому маршруту.
+    """
+    llm_client: LLMClient = app.state.llm_client
+    return UnicodeJSONResponse(
+        content=[ModelRouteStats(**stats) for stats in llm_client.router.stats()]
+    )
+
+
+@app.get("/api/llm/scheduler")
+async def get_llm_scheduler() -> UnicodeJSONResponse:
+    """Получить состояние очереди запросов к LLM.
+
+    Returns:
+        list[LLMSchedulerStats]: Длина очереди и время ожидания по классам приоритета.
+    """
+    scheduler: LLMScheduler = app.state.llm_scheduler
+    return UnicodeJSONResponse(content=[LLMSchedulerStats(**stats) for stats in scheduler.stats()])
+
+
+@app.get("/api/llm/cache", response_model=SemanticCacheStats)
+async def get_llm_cache() -> SemanticCacheStats:
+    """Получить статистику семантического кэша ответов.
+
+    Returns:
+        SemanticCacheStats: Количество записей, попадания, промахи и доля попаданий.
+    """
+    scheduler: LLMScheduler = app.state.llm_scheduler
+    if not scheduler.cache:
+        raise HTTPException(status_code=404, detail="Семантический кэш отключен")
+    return SemanticCacheStats(**scheduler.cache.stats())
+
+
+@app.get("/api/llm/jobs", response_model=LLMJobStats)
+async def get_llm_jobs() -> LLMJobStats:
+    """Получить состояние очереди заданий LLM в БД.
+
+    Returns:
+        LLMJobStats: Количество заданий по статусам и возраст самого старого в очереди.
+    """
+    return LLMJobStats(**await LLMJobQueue(app.state.db).stats())
+
+
+@app.post(CHAT_MESSAGE_PATH, response_model=ChatResponse)
+async def chat_message(request: ChatRequest, http_request: Request) -> Response:
     """Отправить сообщение в чат и получить ответ.
 
+    Пока ответ генерируется, соединение проверяется на разрыв: если клиент закрыл
+    вкладку, запрос к LLM отменяется и частичный ответ отбрасывается.
+
     Args:
         request: Запрос с сообщением и режимом.
+        http_request: HTTP-запрос для отслеживания разрыва соединения.
 
     Returns:
         ChatResponse: Ответ ассистента с session_id.
     """
     chat_service: ChatService = app.state.chat_service
 
-    response_text, session_id = await chat_service.process_message(
-        message=request.message, mode=request.mode, session_id=request.session_id
+    turn = asyncio.create_task(
+        chat_service.process_message(
+            message=request.message, mode=request.mode, session_id=request.session_id
+        )
     )
+    while not turn.done():
+        await asyncio.wait({turn}, timeout=DISCONNECT_POLL_INTERVAL)
+        if not turn.done() and await http_request.is_disconnected():
+            # Ответ уже некому прочитать
+            turn.cancel()
+            return Response(status_code=499)
+    response_text, session_id = turn.result()
+    rate_limiter: RateLimiter | None = getattr(app.state, "rate_limiter", None)
+    if rate_limiter:
+        # Новое сообщение списано до генерации по Content-Length; после нее списываются
+        # история сессии, ушедшая в промпт, и ответ
+        session = chat_service.sessions.get(session_id)
+        history = session.messages[:-2] if session else []
+        prompt = estimate_cost(history) if history else 0
+        rate_limiter.charge(client_key(http_request), estimate_tokens(prompt + len(response_text)))
 
     return ChatResponse(message=response_text, session_id=session_id, mode=request.mode)
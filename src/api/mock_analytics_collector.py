@@ -0,0 +1,88 @@
+"""Mock реализация аналитических отчетов для разработки UI."""
+
+import random
+from datetime import datetime, timedelta
+
+from src.api.models import (
+    CohortRetention,
+    EngagementReport,
+    HistogramBin,
+    Percentiles,
+    RetentionReport,
+)
+from src.api.real_analytics_collector import MESSAGES_PER_USER_EDGES
+
+
+class MockAnalyticsCollector:
+    """Генератор синтетических аналитических отчетов без подключения к БД."""
+
+    def __init__(self, seed: int | None = None):
+        """Инициализация mock коллектора аналитики.
+
+        Args:
+            seed: Seed для генератора случайных чисел (для воспроизводимости).
+        """
+        self.random = random.Random(seed)
+
+    async def get_retention(self, days: int = 30) -> RetentionReport:
+        """Сгенерировать mock отчет об удержании.
+
+        Args:
+            days: Период отчета в днях (по умолчанию 30).
+
+        Returns:
+            RetentionReport: Синтетические когорты с затухающим удержанием.
+        """
+        start = datetime.now().date() - timedelta(days=days - 1)
+        cohorts = []
+
+        for cohort in range(days):
+            decay = self.random.uniform(0.6, 0.9)
+            retention = [1.0] + [
+                round(decay**day * self.random.uniform(0.3, 0.6), 4)
+                for day in range(1, days - cohort)
+            ]
+            cohorts.append(
+                CohortRetention(
+                    cohort_date=(start + timedelta(days=cohort)).isoformat(),
+                    size=self.random.randint(1, 30),
+                    retention=retention,
+                )
+            )
+
+        return RetentionReport(
+            days=days, cohorts=cohorts, stickiness=round(self.random.uniform(0.1, 0.4), 3)
+        )
+
+    async def get_engagement(self, days: int = 30) -> EngagementReport:
+        """Сгенерировать mock отчет о вовлеченности.
+
+        Args:
+            days: Период отчета в днях (по умолчанию 30).
+
+        Returns:
+            EngagementReport: Синтетические распределения.
+        """
+        return EngagementReport(
+            days=days,
+            message_length=self._generate_percentiles(20.0, 400.0),
+            session_messages=self._generate_percentiles(1.0, 40.0),
+            session_minutes=self._generate_percentiles(0.5, 60.0),
+            messages_per_user=[
+                HistogramBin(
+                    min_value=edge,
+                    max_value=(
+                        MESSAGES_PER_USER_EDGES[i + 1]
+                        if i + 1 < len(MESSAGES_PER_USER_EDGES)
+                        else None
+                    ),
+                    count=self.random.randint(0, 100),
+                )
+                for i, edge in enumerate(MESSAGES_PER_USER_EDGES)
+            ],
+        )
+
+    def _generate_percentiles(self, low: float, high: float) -> Percentiles:
+        """Сгенерировать упорядоченные перцентили в диапазоне."""
+        p50, p90, p99 = sorted(round(self.random.uniform(low, high), 1) for _ in range(3))
+        return Percentiles(p50=p50, p90=p90, p99=p99)
@@ -3,7 +3,16 @@
 import random
 from datetime import datetime, timedelta
 
-from src.api.models import ActivityPoint, ChartDataPoint, DashboardStats, Metrics, RecentMessage
+from src.api.models import (
+    ActivityPoint,
+    ChartDataPoint,
+    DashboardStats,
+    Metrics,
+    RecentMessage,
+    UserActivity,
+    UsersPage,
+)
+from src.api.stat_collector import USER_SORT_COLUMNS, decode_cursor, encode_cursor
 
 
 class MockStatCollector:
@@ -37,17 +46,91 @@ class MockStatCollector:
             recent_messages=self._generate_recent_messages(),
         )
 
+    async def get_users(
+        self, sort: str = "messages", limit: int = 20, cursor: str | None = None
+    ) -> UsersPage:
+        """Сгенерировать mock список пользователей.
+
+        Args:
+            sort: Поле сортировки: messages или last_active.
+            limit: Размер страницы.
+            cursor: Курсор из предыдущей страницы или None для первой.
+
+        Returns:
+            UsersPage: Страница синтетических пользователей.
+
+        Raises:
+            ValueError: При неизвестной сортировке или некорректном курсоре.
+        """
+        if sort not in USER_SORT_COLUMNS:
+            raise ValueError(f"Неизвестная сортировка: {sort}")
+
+        def sort_key(item: tuple[int, UserActivity]) -> tuple[int | str, int]:
+            row_id, user = item
+            value = user.message_count if sort == "messages" else user.last_message_at
+            return value, row_id
+
+        users = sorted(enumerate(self._generate_users(), start=1), key=sort_key, reverse=True)
+        if cursor:
+            after = decode_cursor(cursor, sort)
+            users = [item for item in users if sort_key(item) < after]
+
+        page = users[:limit]
+        next_cursor = None
+        if len(users) > limit and page:
+            value, row_id = sort_key(page[-1])
+            next_cursor = encode_cursor(value, row_id)
+
+        return UsersPage(users=[user for _, user in page], next_cursor=next_cursor)
+
+    def _generate_users(self, count: int = 50) -> list[UserActivity]:
+        """Сгенерировать синтетическую активность пользователей.
+
+        Args:
+            count: Количество пользователей (по умолчанию 50).
+
+        Returns:
+            Список пользователей со счетчиками активности.
+        """
+        now = datetime.now()
+        users = []
+
+        for _ in range(count):
+            message_count = self.random.randint(1, 300)
+            total_length = message_count * self.random.randint(20, 150)
+            first_message_at = now - timedelta(days=self.random.randint(1, 90))
+            last_message_at = now - timedelta(minutes=self.random.randint(0, 60 * 24 * 7))
+
+            users.append(
+                UserActivity(
+                    telegram_id=self.random.randint(100000000, 999999999),
+                    message_count=message_count,
+                    total_length=total_length,
+                    avg_length=total_length / message_count,
+                    image_count=self.random.randint(0, message_count // 10),
+                    first_message_at=first_message_at.isoformat(),
+                    last_message_at=max(first_message_at, last_message_at).isoformat(),
+                )
+            )
+
+        return users
+
     def _generate_metrics(self) -> Metrics:
         """Сгенерировать ключевые метрики."""
         total_messages = self.random.randint(500, 5000)
         total_users = self.random.randint(50, 500)
         active_today = self.random.randint(5, min(50, total_users))
+        mau = self.random.randint(active_today, total_users)
+        wau = self.random.randint(active_today, mau)
 
         return Metrics(
             total_users=total_users,
             total_messages=total_messages,
             active_today=active_today,
             avg_message_length=round(self.random.uniform(50.0, 150.0), 1),
+            dau=active_today,
+            wau=wau,
+            mau=mau,
         )
 
     def _generate_activity_chart(self, days: int = 7) -> list[ActivityPoint]:
@@ -151,11 +234,15 @@ class MockStatCollector:
 
             # Генерируем данные с некоторой корреляцией
             base_activity = self.random.randint(20, 100)
+            active_users = self.random.randint(5, 50)
+            wau = active_users + self.random.randint(0, 100)
 
             points.append(
                 ChartDataPoint(
                     date=date.isoformat(),
-                    active_users=self.random.randint(5, 50),
+                    active_users=active_users,
+                    wau=wau,
+                    mau=wau + self.random.randint(0, 300),
                     messages=base_activity + self.random.randint(-10, 30),
                     avg_length=round(self.random.uniform(50.0, 150.0), 1),
                 )
@@ -10,6 +10,9 @@ class Metrics(BaseModel):
     total_messages: int = Field(..., ge=0, description="Всего сообщений")
     active_today: int = Field(..., ge=0, description="Активных пользователей сегодня")
     avg_message_length: float = Field(..., ge=0.0, description="Средняя длина сообщения")
+    dau: int = Field(0, ge=0, description="Активных пользователей за текущие сутки (UTC)")
+    wau: int = Field(0, ge=0, description="Активных пользователей за 7 дней")
+    mau: int = Field(0, ge=0, description="Активных пользователей за 30 дней")
 
 
 class ActivityPoint(BaseModel):
@@ -24,6 +27,8 @@ class ChartDataPoint(BaseModel):
 
     date: str = Field(..., description="Дата в формате ISO (YYYY-MM-DD)")
     active_users: int | None = Field(None, ge=0, description="Активные пользователи за день")
+    wau: int | None = Field(None, ge=0, description="Активные пользователи за 7 дней по дату")
+    mau: int | None = Field(None, ge=0, description="Активные пользователи за 30 дней по дату")
     messages: int | None = Field(None, ge=0, description="Количество сообщений за день")
     avg_length: float | None = Field(None, ge=0.0, description="Средняя длина сообщения за день")
 
@@ -45,3 +50,150 @@ class DashboardStats(BaseModel):
     activity_chart: list[ActivityPoint] = Field(..., min_length=0, max_length=30)
     chart_data: list[ChartDataPoint] = Field(..., min_length=0, max_length=90)
     recent_messages: list[RecentMessage] = Field(..., min_length=0, max_length=20)
+
+
+class UserActivity(BaseModel):
+    """Накопленная активность пользователя."""
+
+    telegram_id: int = Field(..., description="ID пользователя в Telegram")
+    message_count: int = Field(..., ge=0, description="Количество сообщений пользователя")
+    total_length: int = Field(..., ge=0, description="Суммарная длина сообщений")
+    avg_length: float = Field(..., ge=0.0, description="Средняя длина сообщения")
+    image_count: int = Field(..., ge=0, description="Количество отправленных изображений")
+    first_message_at: str = Field(..., description="Первое сообщение в формате ISO 8601")
+    last_message_at: str = Field(..., description="Последнее сообщение в формате ISO 8601")
+
+
+class UsersPage(BaseModel):
+    """Страница списка пользователей с keyset-пагинацией."""
+
+    users: list[UserActivity] = Field(..., max_length=100)
+    next_cursor: str | None = Field(None, description="Курсор следующей страницы")
+
+
+class CohortRetention(BaseModel):
+    """Удержание когорты пользователей по дню первой активности."""
+
+    cohort_date: str = Field(..., description="День первой активности в формате ISO")
+    size: int = Field(..., ge=0, description="Количество пользователей в когорте")
+    retention: list[float] = Field(
+        ..., description="Доля когорты, активной через N дней после первой активности"
+    )
+
+
+class RetentionReport(BaseModel):
+    """Отчет об удержании пользователей."""
+
+    days: int = Field(..., ge=1, description="Период отчета в днях")
+    cohorts: list[CohortRetention]
+    stickiness: float = Field(..., ge=0.0, le=1.0, description="Средний DAU / активные за период")
+
+
+class Percentiles(BaseModel):
+    """Перцентили распределения."""
+
+    p50: float = Field(..., ge=0.0)
+    p90: float = Field(..., ge=0.0)
+    p99: float = Field(..., ge=0.0)
+
+
+class HistogramBin(BaseModel):
+    """Корзина гистограммы [min_value, max_value)."""
+
+    min_value: int = Field(..., ge=0)
+    max_value: int | None = Field(None, description="Верхняя граница (None - без ограничения)")
+    count: int = Field(..., ge=0)
+
+
+class EngagementReport(BaseModel):
+    """Отчет о вовлеченности пользователей."""
+
+    days: int = Field(..., ge=1, description="Период отчета в днях")
+    message_length: Percentiles = Field(..., description="Длина сообщений пользователей")
+    session_messages: Percentiles = Field(..., description="Сообщений за сессию")
+    session_minutes: Percentiles = Field(..., description="Длительность сессии в минутах")
+    messages_per_user: list[HistogramBin] = Field(
+        ..., description="Распределение пользователей по числу сообщений"
+    )
+
+
+class LLMBackendStatus(BaseModel):
+    """Состояние LLM бэкенда."""
+
+    name: str = Field(..., description="Модель и адрес бэкенда")
+    model: str = Field(..., description="Имя модели")
+    state: str = Field(
+        ..., pattern="^(closed|open|half_open)$", description="Состояние circuit breaker"
+    )
+    outstanding: int = Field(..., ge=0, description="Запросов в работе")
+    ewma_latency: float | None = Field(None, ge=0.0, description="Сглаженная задержка, секунды")
+
+
+class ModelRouteStats(BaseModel):
+    """Статистика маршрута выбора модели."""
+
+    name: str = Field(..., description="Имя маршрута")
+    model: str | None = Field(None, description="Модель маршрута, None - любая модель пула")
+    requests: int = Field(..., ge=0, description="Запросов направлено")
+    errors: int = Field(..., ge=0, description="Запросов завершилось ошибкой")
+    p50_latency: float | None = Field(None, ge=0.0, description="Медианная задержка, секунды")
+    p95_latency: float | None = Field(None, ge=0.0, description="95-й перцентиль задержки, секунды")
+
+
+class LLMSchedulerStats(BaseModel):
+    """Состояние класса приоритета в очереди запросов к LLM."""
+
+    priority: str = Field(
+        ..., pattern="^(interactive|admin|background)$", description="Класс приоритета"
+    )
+    queued: int = Field(..., ge=0, description="Запросов в очереди")
+    users: int = Field(..., ge=0, description="Пользователей с запросами в очереди")
+    dispatched: int = Field(..., ge=0, description="Запросов передано в LLM")
+    p50_wait: float | None = Field(None, ge=0.0, description="Медианное ожидание, секунды")
+    p95_wait: float | None = Field(None, ge=0.0, description="95-й перцентиль ожидания, секунды")
+
+
+class LLMJobStats(BaseModel):
+    """Состояние очереди заданий LLM."""
+
+    queued: int = Field(..., ge=0, description="Заданий ждут воркера")
+    running: int = Field(..., ge=0, description="Заданий выполняются")
+    delivering: int = Field(0, ge=0, description="Ответов ждут отправки")
+    dead: int = Field(..., ge=0, description="Заданий в dead letter")
+    oldest_queued_age: float | None = Field(
+        None, ge=0.0, description="Возраст самого старого задания в очереди, секунды"
+    )
+
+
+class SemanticCacheStats(BaseModel):
+    """Статистика семантического кэша ответов."""
+
+    entries: int = Field(..., ge=0, description="Живых записей в кэше")
+    hits: int = Field(..., ge=0, description="Ответов из кэша")
+    misses: int = Field(..., ge=0, description="Промахов кэша")
+    hit_rate: float = Field(..., ge=0.0, le=1.0, description="Доля попаданий")
+
+
+class ReadinessStatus(BaseModel):
+    """Готовность API принимать запросы к чату."""
+
+    status: str = Field(..., pattern="^(ready|overloaded)$", description="Статус готовности")
+    llm_inflight: int = Field(..., ge=0, description="Запросов к LLM выполняется")
+    llm_queued: int = Field(..., ge=0, description="Запросов к LLM ждут в очереди")
+    db_pending: int = Field(..., ge=0, description="Запросов к БД в работе")
+    loop_lag: float = Field(..., ge=0.0, description="Задержка цикла событий, секунды")
+    backends_available: int = Field(..., ge=0, description="LLM бэкендов не исключено")
+    reasons: list[str] = Field(default_factory=list, description="Превышенные пороги")
+
+
+class LoopLagStats(BaseModel):
+    """Задержка цикла событий API."""
+
+    samples: int = Field(..., ge=0, description="Количество замеров")
+    max_lag: float = Field(..., ge=0.0, description="Максимальная задержка, секунды")
+    p50_lag: float | None = Field(None, ge=0.0, description="Медианная задержка, секунды")
+    p99_lag: float | None = Field(None, ge=0.0, description="99-й перцентиль задержки, секунды")
+    blocks: int = Field(..., ge=0, description="Блокировок дольше порога среди последних")
+    buckets: dict[str, int] = Field(
+        ..., description="Гистограмма: верхняя граница корзины -> количество замеров"
+    )
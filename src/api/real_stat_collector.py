@@ -1,24 +1,52 @@
 """Real реализация сборщика статистики из SQLite БД."""
 
-from datetime import datetime, timedelta
-
-from src.api.models import ActivityPoint, ChartDataPoint, DashboardStats, Metrics, RecentMessage
+import asyncio
+from datetime import date, datetime, timedelta
+
+from src.activity_bitmap import ActivityBitmap
+from src.api.change_feed import ChangeFeed, recent_message_from_row
+from src.api.models import (
+    ActivityPoint,
+    ChartDataPoint,
+    DashboardStats,
+    Metrics,
+    RecentMessage,
+    UserActivity,
+    UsersPage,
+)
+from src.api.stat_collector import USER_SORT_COLUMNS, decode_cursor, encode_cursor
 from src.database import DatabaseManager
+from src.message_archive import MessageArchive
+
+WEEK_DAYS = 7
+MONTH_DAYS = 30
 
 
 class RealStatCollector:
     """Сборщик статистики из реальной БД.
 
     Получает данные из SQLite БД с таблицами users и messages.
+    Если передан архив, агрегаты дополняются холодной историей из него.
+    Если передан журнал изменений, счетчики сообщений и последние сообщения
+    берутся из его live-агрегатов без запросов к таблице messages.
     """
 
-    def __init__(self, db: DatabaseManager):
+    def __init__(
+        self,
+        db: DatabaseManager,
+        archive: MessageArchive | None = None,
+        change_feed: ChangeFeed | None = None,
+    ):
         """Инициализация real коллектора.
 
         Args:
             db: DatabaseManager для работы с БД.
+            archive: Архив старых сообщений (опционально).
+            change_feed: Журнал изменений с live-агрегатами (опционально).
         """
         self.db = db
+        self.archive = archive
+        self.change_feed = change_feed
 
     async def get_stats(self, days: int = 7) -> DashboardStats:
         """Получить статистику из БД.
@@ -41,6 +69,75 @@ class RealStatCollector:
             recent_messages=recent_messages,
         )
 
+    async def get_users(
+        self, sort: str = "messages", limit: int = 20, cursor: str | None = None
+    ) -> UsersPage:
+        """Получить пользователей по убыванию активности из user_stats.
+
+        Args:
+            sort: Поле сортировки: messages или last_active.
+            limit: Размер страницы.
+            cursor: Курсор из предыдущей страницы или None для первой.
+
+        Returns:
+            UsersPage: Страница пользователей и курсор следующей страницы.
+
+        Raises:
+            ValueError: При неизвестной сортировке или некорректном курсоре.
+        """
+        if sort not in USER_SORT_COLUMNS:
+            raise ValueError(f"Неизвестная сортировка: {sort}")
+        column = USER_SORT_COLUMNS[sort]
+
+        condition = ""
+        params: tuple = ()
+        if cursor:
+            condition = f"AND (s.{column}, s.user_id) < (?, ?)"
+            params = decode_cursor(cursor, sort)
+
+        rows = await self.db.fetchall(
+            f"""
+            SELECT
+                s.user_id,
+                u.telegram_id,
+                s.message_count,
+                s.total_length,
+                s.image_count,
+                s.first_message_at,
+                s.last_message_at
+            FROM user_stats s
+            JOIN users u ON s.user_id = u.id
+            WHERE u.deleted_at IS NULL {condition}
+            ORDER BY s.{column} DESC, s.user_id DESC
+            LIMIT ?
+            """,
+            (*params, limit + 1),
+        )
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = (
+            encode_cursor(rows[-1][column], rows[-1]["user_id"]) if has_more and rows else None
+        )
+
+        return UsersPage(
+            users=[
+                UserActivity(
+                    telegram_id=row["telegram_id"],
+                    message_count=row["message_count"],
+                    total_length=row["total_length"],
+                    avg_length=row["total_length"] / row["message_count"]
+                    if row["message_count"]
+                    else 0.0,
+                    image_count=row["image_count"],
+                    first_message_at=row["first_message_at"],
+                    last_message_at=row["last_message_at"],
+                )
+                for row in rows
+            ],
+            next_cursor=next_cursor,
+        )
+
     async def _get_metrics(self) -> Metrics:
         """Получить ключевые метрики."""
         # Всего пользователей
@@ -49,37 +146,48 @@ class RealStatCollector:
         )
         total_users = total_users_row["count"] if total_users_row else 0
 
-        # Всего сообщений
-        total_messages_row = await self.db.fetchone(
-            "SELECT COUNT(*) as count FROM messages WHERE deleted_at IS NULL"
-        )
-        total_messages = total_messages_row["count"] if total_messages_row else 0
-
-        # Активных сегодня (за последние 24 часа)
+        # Активных сегодня (за последние 24 часа) - по индексу user_stats
         yesterday = (datetime.utcnow() - timedelta(days=1)).isoformat()
         active_today_row = await self.db.fetchone(
-            """
-            SELECT COUNT(DISTINCT user_id) as count
-            FROM messages
-            WHERE deleted_at IS NULL AND created_at >= ?
-            """,
+            "SELECT COUNT(*) as count FROM user_stats WHERE last_message_at >= ?",
             (yesterday,),
         )
         active_today = active_today_row["count"] if active_today_row else 0
 
-        # Средняя длина сообщения
-        avg_length_row = await self.db.fetchone(
-            "SELECT AVG(length) as avg FROM messages WHERE deleted_at IS NULL"
-        )
-        avg_message_length = (
-            float(avg_length_row["avg"]) if avg_length_row and avg_length_row["avg"] else 0.0
-        )
+        # Всего сообщений и средняя длина
+        if self.change_feed and self.change_feed.ready:
+            total_messages = self.change_feed.total_messages
+            avg_message_length = self.change_feed.avg_message_length
+        else:
+            totals_row = await self.db.fetchone(
+                "SELECT COUNT(*) as count, AVG(length) as avg FROM messages "
+                "WHERE deleted_at IS NULL"
+            )
+            total_messages = totals_row["count"] if totals_row else 0
+            avg_message_length = (
+                float(totals_row["avg"]) if totals_row and totals_row["avg"] else 0.0
+            )
+
+        if self.archive:
+            archived_days = (await asyncio.to_thread(self.archive.daily_stats)).values()
+            archived_messages = sum(day["messages"] for day in archived_days)
+            if archived_messages:
+                length_sum = avg_message_length * total_messages
+                length_sum += sum(day["length_sum"] for day in archived_days)
+                total_messages += archived_messages
+                avg_message_length = length_sum / total_messages
+
+        today = datetime.utcnow().date()
+        bitmaps = await self._get_active_bitmaps(today, MONTH_DAYS)
 
         return Metrics(
             total_users=total_users,
             total_messages=total_messages,
             active_today=active_today,
             avg_message_length=avg_message_length,
+            dau=self._count_active(bitmaps, today, 1),
+            wau=self._count_active(bitmaps, today, WEEK_DAYS),
+            mau=self._count_active(bitmaps, today, MONTH_DAYS),
         )
 
     async def _get_activity_chart(self, days: int) -> list[ActivityPoint]:
@@ -104,7 +212,11 @@ class RealStatCollector:
             (start_date,),
         )
 
-        return [ActivityPoint(date=row["date"], count=row["count"]) for row in rows]
+        counts = {row["date"]: row["count"] for row in rows}
+        for archived_date, day in (await self._get_archived_days(start_date)).items():
+            counts[archived_date] = counts.get(archived_date, 0) + day["messages"]
+
+        return [ActivityPoint(date=key, count=count) for key, count in sorted(counts.items())]
 
     async def _get_chart_data(self, days: int) -> list[ChartDataPoint]:
         """Получить данные для детального графика.
@@ -121,7 +233,6 @@ class RealStatCollector:
             """
             SELECT
                 DATE(created_at) as date,
-                COUNT(DISTINCT user_id) as active_users,
                 COUNT(*) as messages,
                 AVG(length) as avg_length
             FROM messages
@@ -132,15 +243,81 @@ class RealStatCollector:
             (start_date,),
         )
 
-        return [
-            ChartDataPoint(
+        points = {
+            row["date"]: ChartDataPoint(
                 date=row["date"],
-                active_users=row["active_users"],
                 messages=row["messages"],
                 avg_length=float(row["avg_length"]) if row["avg_length"] else 0.0,
             )
             for row in rows
-        ]
+        }
+        # Граница архива выровнена по суткам, поэтому дни в БД и в архиве не пересекаются
+        for archived_date, day in (await self._get_archived_days(start_date)).items():
+            if archived_date in points or not day["messages"]:
+                continue
+            points[archived_date] = ChartDataPoint(
+                date=archived_date,
+                active_users=len(day["user_ids"]),
+                messages=day["messages"],
+                avg_length=day["length_sum"] / day["messages"],
+            )
+
+        # Уникальные пользователи считаются объединением дневных битовых карт
+        if points:
+            first_day = datetime.fromisoformat(min(points)).date()
+            last_day = datetime.fromisoformat(max(points)).date()
+            span = (last_day - first_day).days + MONTH_DAYS
+            bitmaps = await self._get_active_bitmaps(last_day, span)
+            for key, point in points.items():
+                day = datetime.fromisoformat(key).date()
+                if key in bitmaps:
+                    point.active_users = len(bitmaps[key])
+                point.wau = self._count_active(bitmaps, day, WEEK_DAYS)
+                point.mau = self._count_active(bitmaps, day, MONTH_DAYS)
+
+        return [points[key] for key in sorted(points)]
+
+    async def _get_active_bitmaps(self, last_day: date, days: int) -> dict[str, ActivityBitmap]:
+        """Получить дневные битовые карты активных пользователей.
+
+        Args:
+            last_day: Последний день периода.
+            days: Количество дней периода, включая last_day.
+
+        Returns:
+            Словарь дата -> битовая карта внутренних id пользователей.
+        """
+        first_day = last_day - timedelta(days=days - 1)
+        return await self.db.get_active_bitmaps(first_day.isoformat(), last_day.isoformat())
+
+    def _count_active(self, bitmaps: dict[str, ActivityBitmap], last_day: date, days: int) -> int:
+        """Посчитать уникальных пользователей за окно дней объединением карт.
+
+        Args:
+            bitmaps: Дневные битовые карты.
+            last_day: Последний день окна.
+            days: Размер окна в днях.
+
+        Returns:
+            Количество уникальных активных пользователей.
+        """
+        window = (
+            bitmaps.get((last_day - timedelta(days=offset)).isoformat()) for offset in range(days)
+        )
+        return len(ActivityBitmap.union(bitmap for bitmap in window if bitmap))
+
+    async def _get_archived_days(self, start_date: str) -> dict[str, dict]:
+        """Получить дневные агрегаты из архива.
+
+        Args:
+            start_date: Начало периода в формате ISO.
+
+        Returns:
+            Словарь дата -> агрегаты дня (пустой, если архив не подключен).
+        """
+        if not self.archive:
+            return {}
+        return await asyncio.to_thread(self.archive.daily_stats, start_date)
 
     async def _get_recent_messages(self) -> list[RecentMessage]:
         """Получить последние сообщения.
@@ -148,7 +325,8 @@ class RealStatCollector:
         Returns:
             Список последних 10 сообщений с telegram_id.
         """
-        import json
+        if self.change_feed and self.change_feed.ready:
+            return self.change_feed.recent_messages
 
         rows = await self.db.fetchall(
             """
@@ -165,24 +343,4 @@ class RealStatCollector:
             """
         )
 
-        messages = []
-        for row in rows:
-            # Контент хранится как JSON {"text": "...", "image": "..."}
-            try:
-                content_data = json.loads(row["content"])
-                text = content_data.get("text", "")
-            except (json.JSONDecodeError, TypeError):
-                # Если не JSON, используем как есть
-                text = row["content"]
-
-            messages.append(
-                RecentMessage(
-                    telegram_id=row["telegram_id"],
-                    role=row["role"],
-                    preview=text[:100],
-                    full_text=text,
-                    created_at=row["created_at"],
-                )
-            )
-
-        return messages
+        return [recent_message_from_row(row) for row in rows]
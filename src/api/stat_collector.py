@@ -2,7 +2,41 @@
 
 from typing import Protocol
 
-from src.api.models import DashboardStats
+from src.api.models import DashboardStats, UsersPage
+
+USER_SORT_COLUMNS = {"messages": "message_count", "last_active": "last_message_at"}
+
+
+def encode_cursor(sort_value: int | str, row_id: int) -> str:
+    """Закодировать курсор keyset-пагинации.
+
+    Args:
+        sort_value: Значение поля сортировки последней строки страницы.
+        row_id: ID последней строки страницы (разрешает равенство значений).
+
+    Returns:
+        str: Курсор вида "<значение>,<id>".
+    """
+    return f"{sort_value},{row_id}"
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[int | str, int]:
+    """Разобрать курсор keyset-пагинации.
+
+    Args:
+        cursor: Курсор из encode_cursor.
+        sort: Поле сортировки, для которого выдан курсор.
+
+    Returns:
+        tuple: (значение поля сортировки, id строки).
+
+    Raises:
+        ValueError: При некорректном курсоре.
+    """
+    value, separator, row_id = cursor.rpartition(",")
+    if not separator or not value:
+        raise ValueError(f"Некорректный курсор: {cursor}")
+    return (int(value) if sort == "messages" else value), int(row_id)
 
 
 class StatCollector(Protocol):
@@ -31,3 +65,21 @@ class StatCollector(Protocol):
             Exception: При ошибках получения данных.
         """
         ...
+
+    async def get_users(
+        self, sort: str = "messages", limit: int = 20, cursor: str | None = None
+    ) -> UsersPage:
+        """Получить список пользователей, отсортированный по активности.
+
+        Args:
+            sort: Поле сортировки: messages (по числу сообщений) или last_active.
+            limit: Размер страницы.
+            cursor: Курсор из предыдущей страницы или None для первой.
+
+        Returns:
+            UsersPage: Страница пользователей и курсор следующей страницы.
+
+        Raises:
+            ValueError: При некорректном курсоре.
+        """
+        ...
@@ -0,0 +1,177 @@
+"""Рассылка обновлений статистики подписчикам Server-Sent Events."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from src.api.models import DashboardStats
+from src.api.stat_collector import StatCollector
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+class StatsBroadcaster:
+    """Общий расчет статистики для всех открытых дашбордов.
+
+    Одна фоновая задача пересчитывает статистику, пока есть подписчики, и рассылает
+    только изменившиеся разделы. Стоимость на сервере не зависит от числа вкладок.
+    Пересчет выполняется при изменении данных (если задан change_token), но не реже
+    чем раз в refresh_interval, чтобы сдвигались окна вида "за последние 24 часа".
+    """
+
+    def __init__(
+        self,
+        collector_factory: Callable[[], Awaitable[StatCollector]],
+        days: int = 7,
+        interval: float = 2.0,
+        refresh_interval: float = 60.0,
+        change_token: Callable[[], Awaitable[object]] | None = None,
+    ):
+        """Инициализация рассылки.
+
+        Args:
+            collector_factory: Фабрика StatCollector для очередного пересчета.
+            days: Количество дней для графиков.
+            interval: Период проверки изменений в секундах.
+            refresh_interval: Максимальный период между пересчетами в секундах.
+            change_token: Функция, значение которой меняется при изменении данных.
+        """
+        self.collector_factory = collector_factory
+        self.days = days
+        self.interval = interval
+        self.refresh_interval = refresh_interval
+        self.change_token = change_token
+        self.subscribers: set[asyncio.Queue] = set()
+        self.latest: DashboardStats | None = None
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Подписаться на обновления.
+
+        Returns:
+            asyncio.Queue: Очередь событий (имя события, данные).
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if self.latest:
+            queue.put_nowait(("snapshot", self.latest.dict()))
+        self.subscribers.add(queue)
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Отписаться от обновлений. Последний отписавшийся останавливает пересчет."""
+        self.subscribers.discard(queue)
+        if not self.subscribers and self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def stop(self) -> None:
+        """Остановить фоновую задачу."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def refresh(self) -> None:
+        """Пересчитать статистику и разослать изменившиеся разделы."""
+        collector = await self.collector_factory()
+        stats = await collector.get_stats(days=self.days)
+        previous, self.latest = self.latest, stats
+
+        events = [("snapshot", stats.dict())] if previous is None else self._diff(previous, stats)
+        for event in events:
+            self._publish(event)
+
+    async def _run(self) -> None:
+        """Цикл пересчета, пока есть подписчики."""
+        last_token: object = None
+        last_refresh = 0.0
+        loop = asyncio.get_running_loop()
+
+        while self.subscribers:
+            try:
+                token = await self.change_token() if self.change_token else None
+                stale = loop.time() - last_refresh >= self.refresh_interval
+                if self.latest is None or token != last_token or stale:
+                    await self.refresh()
+                    last_token = token
+                    last_refresh = loop.time()
+            except Exception as e:
+                logger.error(f"Ошибка пересчета статистики для рассылки: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _diff(self, previous: DashboardStats, current: DashboardStats) -> list[tuple[str, dict]]:
+        """Сформировать события только для изменившихся разделов.
+
+        Args:
+            previous: Статистика, разосланная ранее.
+            current: Новая статистика.
+
+        Returns:
+            Список событий (имя, данные).
+        """
+        events: list[tuple[str, dict]] = []
+
+        if current.metrics != previous.metrics:
+            events.append(("metrics", current.metrics.dict()))
+
+        previous_activity = {point.date: point for point in previous.activity_chart}
+        previous_chart = {point.date: point for point in previous.chart_data}
+        changed_activity = [
+            point.dict()
+            for point in current.activity_chart
+            if previous_activity.get(point.date) != point
+        ]
+        changed_chart = [
+            point.dict() for point in current.chart_data if previous_chart.get(point.date) != point
+        ]
+        dates = sorted({point.date for point in current.activity_chart + current.chart_data})
+        previous_dates = sorted(set(previous_activity) | set(previous_chart))
+        if changed_activity or changed_chart or dates != previous_dates:
+            events.append(
+                (
+                    "chart",
+                    {
+                        "activity_chart": changed_activity,
+                        "chart_data": changed_chart,
+                        "dates": dates,
+                    },
+                )
+            )
+
+        if current.recent_messages != previous.recent_messages:
+            # Число новых сообщений в начале списка; остальное - сдвинутый старый список.
+            # В худшем случае весь список считается новым и полностью заменяется у клиента
+            limit = len(current.recent_messages)
+            new_count = next(
+                i
+                for i in range(limit + 1)
+                if current.recent_messages[i:] == previous.recent_messages[: limit - i]
+            )
+            events.append(
+                (
+                    "messages",
+                    {
+                        "new": [m.dict() for m in current.recent_messages[:new_count]],
+                        "limit": limit,
+                    },
+                )
+            )
+
+        return events
+
+    def _publish(self, event: tuple[str, dict]) -> None:
+        """Отправить событие всем подписчикам.
+
+        Отстающему подписчику вместо переполнения очереди отправляется полный снимок.
+        """
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                if self.latest:
+                    queue.put_nowait(("snapshot", self.latest.dict()))
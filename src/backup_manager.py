@@ -0,0 +1,92 @@
+import asyncio
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "aidialogs-"
+ANALYTICS_SNAPSHOT = "analytics.db"
+
+
+class BackupManager:
+    def __init__(
+        self,
+        database_path: str,
+        backup_dir: str,
+        keep: int = 7,
+        compress: bool = False,
+        pages_per_step: int = 256,
+        step_pause: float = 0.01,
+    ):
+        self.database_path = database_path
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.compress = compress
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause
+
+    @property
+    def analytics_snapshot_path(self) -> str:
+        return os.path.join(self.backup_dir, ANALYTICS_SNAPSHOT)
+
+    async def create_snapshot(self) -> str:
+        return await asyncio.to_thread(self._create_snapshot)
+
+    async def run_periodically(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                await self.create_snapshot()
+            except Exception as e:
+                logger.error(f"Ошибка резервного копирования БД: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def _create_snapshot(self) -> str:
+        os.makedirs(self.backup_dir, exist_ok=True)
+        started = time.monotonic()
+
+        tmp_path = f"{self.analytics_snapshot_path}.tmp"
+        self._online_backup(tmp_path)
+        # Атомарная замена: читатели видят либо старый, либо новый снимок целиком
+        os.replace(tmp_path, self.analytics_snapshot_path)
+
+        timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        backup_path = os.path.join(self.backup_dir, f"{SNAPSHOT_PREFIX}{timestamp}.db")
+        if self.compress:
+            backup_path += ".gz"
+            with (
+                open(self.analytics_snapshot_path, "rb") as src,
+                gzip.open(backup_path, "wb") as dst,
+            ):
+                shutil.copyfileobj(src, dst)
+        else:
+            shutil.copyfile(self.analytics_snapshot_path, backup_path)
+
+        self._rotate()
+        logger.info(f"Снимок БД создан: {backup_path} за {time.monotonic() - started:.2f}с")
+        return backup_path
+
+    def _online_backup(self, target_path: str) -> None:
+        source = sqlite3.connect(self.database_path)
+        target = sqlite3.connect(target_path)
+        try:
+            # Копирование порциями страниц с паузами, чтобы не держать блокировку чтения
+            source.backup(target, pages=self.pages_per_step, progress=self._pause)
+        finally:
+            target.close()
+            source.close()
+
+    def _pause(self, status: int, remaining: int, total: int) -> None:
+        if remaining and self.step_pause:
+            time.sleep(self.step_pause)
+
+    def _rotate(self) -> None:
+        backups = sorted(
+            name for name in os.listdir(self.backup_dir) if name.startswith(SNAPSHOT_PREFIX)
+        )
+        for name in backups[: max(len(backups) - self.keep, 0)]:
+            os.remove(os.path.join(self.backup_dir, name))
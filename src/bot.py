@@ -4,10 +4,18 @@ import logging
 
 from aiogram import Bot, Dispatcher
 from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.types import Message, PhotoSize
 
 from .database import DatabaseManager
+from .image_descriptions import ImageDescriber
 from .llm_client import LLMClient
+from .llm_jobs import ERROR_REPLY, LLMJobQueue
+from .llm_scheduler import INTERACTIVE, LLMScheduler, estimate_cost
+from .media_cache import MediaCache
+from .media_groups import MediaGroupCollector
+from .outbox import Outbox
+from .rate_limiter import RateLimiter, estimate_tokens, format_wait
+from .semantic_memory import SemanticMemory
 from .session_manager import SessionManager
 
 logger = logging.getLogger(__name__)
@@ -15,14 +23,34 @@ logger = logging.getLogger(__name__)
 
 class TelegramBot:
     def __init__(
-        self, token: str, llm_client: LLMClient, system_prompt_file: str, db: DatabaseManager
+        self,
+        token: str,
+        llm_client: LLMClient,
+        system_prompt_file: str,
+        db: DatabaseManager,
+        scheduler: LLMScheduler | None = None,
+        job_queue: LLMJobQueue | None = None,
+        memory: SemanticMemory | None = None,
+        describer: ImageDescriber | None = None,
+        media_cache: MediaCache | None = None,
+        media_group_window: float = 1.0,
+        outbox: Outbox | None = None,
+        rate_limiter: RateLimiter | None = None,
     ):
         self.bot = Bot(token=token)
         self.dp = Dispatcher()
         self.llm_client = llm_client
-        self.session_manager = SessionManager(db)
+        self.scheduler = scheduler or LLMScheduler(llm_client)
+        self.job_queue = job_queue
+        self.media_cache = media_cache
+        self.media_groups = MediaGroupCollector(media_group_window)
+        self.outbox = outbox or Outbox()
+        self.rate_limiter = rate_limiter
+        self.session_manager = SessionManager(db, memory, describer)
         self.system_prompt_file = system_prompt_file
         self.db = db
+        # Запросы к LLM в работе: /reset и /start отменяют их
+        self._turns: dict[int, set[asyncio.Task]] = {}
         self._register_handlers()
 
     def _register_handlers(self):
@@ -36,6 +64,7 @@ class TelegramBot:
             return
         user_id = message.from_user.id
         logger.info(f"Команда /start от пользователя {user_id}")
+        await self._cancel_turns(user_id)
         await self.session_manager.clear_session(user_id)
         await message.answer("Привет! Я AI-ассистент. Задай мне любой вопрос.")
 
@@ -44,6 +73,7 @@ class TelegramBot:
             return
         user_id = message.from_user.id
         logger.info(f"Команда /reset от пользователя {user_id}")
+        await self._cancel_turns(user_id)
         await self.session_manager.clear_session(user_id)
         await message.answer("История диалога очищена. Начнём сначала!")
 
@@ -64,33 +94,108 @@ class TelegramBot:
 
         user_id = message.from_user.id
 
-        if message.photo:
-            file = await self.bot.get_file(message.photo[-1].file_id)
-            image_bytes = await self.bot.download_file(file.file_path)
-            image_base64 = base64.b64encode(image_bytes.read()).decode()
-
+        if message.photo and message.media_group_id:
+            # Альбом - один ход диалога и один запрос к LLM
+            album = await self.media_groups.collect(message)
+            if album is None:
+                return
+            photos = [part.photo[-1] for part in album if part.photo]
+            text = next((part.caption for part in album if part.caption), "")
+            if await self._throttled(message, user_id, text, len(photos)):
+                return
+            downloaded = await asyncio.gather(*(self._download_photo(photo) for photo in photos))
+            images = [base64.b64encode(image_bytes).decode() for image_bytes in downloaded]
+
+            logger.info(f"Альбом от пользователя {user_id}: {len(images)} фото")
+            await self.session_manager.add_message(user_id, "user", text, images=images)
+        elif message.photo:
             text = message.caption or ""
+            if await self._throttled(message, user_id, text, 1):
+                return
+            image_bytes = await self._download_photo(message.photo[-1])
+            image_base64 = base64.b64encode(image_bytes).decode()
+
             logger.info(f"Фото от пользователя {user_id}, размер: {len(image_base64)} байт")
             await self.session_manager.add_message(user_id, "user", text, image_base64)
         elif message.text:
+            if await self._throttled(message, user_id, message.text, 0):
+                return
             logger.info(f"Сообщение от пользователя {user_id}: {message.text}")
             await self.session_manager.add_message(user_id, "user", message.text)
         else:
             return
 
+        if self.job_queue:
+            # Ответ сгенерирует и отправит воркер; задание переживает перезапуск бота
+            await self.job_queue.enqueue(user_id, message.chat.id)
+            logger.info(f"Запрос пользователя {user_id} поставлен в очередь LLM")
+            return
+
+        turn: asyncio.Task | None = None
         try:
             logger.info(f"Отправка запроса в LLM для пользователя {user_id}")
-            session = await self.session_manager.get_session(user_id)
-            response = await asyncio.to_thread(self.llm_client.get_response, session)
+            session = await self.session_manager.get_context(user_id)
+            # Очередь с приоритетом и справедливым разделением между пользователями
+            turn = asyncio.create_task(self.scheduler.get_response(INTERACTIVE, user_id, session))
+            self._turns.setdefault(user_id, set()).add(turn)
+            try:
+                response = await turn
+            finally:
+                turns = self._turns.get(user_id, set())
+                turns.discard(turn)
+                if not turns:
+                    self._turns.pop(user_id, None)
             logger.info(f"Получен ответ от LLM для пользователя {user_id}")
 
-            await message.answer(response)
-            logger.info(f"Ответ отправлен пользователю {user_id}")
-
+            # Ответ сохраняется до отправки: повторы доставки не генерируют его заново
             await self.session_manager.add_message(user_id, "assistant", response)
+            if self.rate_limiter:
+                # Новое сообщение списано при проверке лимита; история из контекста
+                # и ответ - после генерации
+                prompt = estimate_cost(session[:-1]) if len(session) > 1 else 0
+                self.rate_limiter.charge(str(user_id), estimate_tokens(prompt + len(response)))
+
+            await self.outbox.send(message.chat.id, response, message.answer)
+            logger.info(f"Ответ отправлен пользователю {user_id}")
+        except asyncio.CancelledError:
+            # Отменен сам обработчик (остановка бота) - отмена идет дальше
+            current = asyncio.current_task()
+            if not turn or not turn.cancelled() or (current and current.cancelling()):
+                raise
+            logger.info(f"Запрос к LLM пользователя {user_id} отменен, ответ отброшен")
         except Exception as e:
             logger.error(f"Ошибка при получении ответа LLM для пользователя {user_id}: {e}")
-            await message.answer("Извините, произошла ошибка. Попробуйте позже.")
+            await self.outbox.send(message.chat.id, ERROR_REPLY, message.answer)
+
+    async def _throttled(self, message: Message, user_id: int, text: str, images: int) -> bool:
+        # Лимит проверяется до загрузки фото и сохранения сообщения в историю
+        if not self.rate_limiter:
+            return False
+        wait = self.rate_limiter.check(
+            str(user_id), tokens=estimate_tokens(len(text)), images=images
+        )
+        if not wait:
+            return False
+        await self.outbox.send(
+            message.chat.id,
+            f"Слишком много запросов. Попробуйте через {format_wait(wait)}.",
+            message.answer,
+        )
+        return True
+
+    async def _download_photo(self, photo: PhotoSize) -> bytes:
+        if self.media_cache:
+            return await self.media_cache.download(self.bot, photo)
+        file = await self.bot.get_file(photo.file_id)
+        downloaded = await self.bot.download_file(file.file_path)
+        return downloaded.read()
+
+    async def _cancel_turns(self, user_id: int) -> None:
+        for turn in self._turns.pop(user_id, set()):
+            turn.cancel()
+            logger.info(f"Отменен запрос к LLM пользователя {user_id}")
+        if self.job_queue:
+            await self.job_queue.cancel(user_id)
 
     async def start(self):
         await self.dp.start_polling(self.bot)
@@ -0,0 +1,58 @@
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        max_reset_timeout: float = 300.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+
+    def state(self, now: float) -> str:
+        if now < self.open_until:
+            return OPEN
+        # После паузы пропускается один пробный запрос
+        return HALF_OPEN if self.trips else CLOSED
+
+    def is_available(self, now: float) -> bool:
+        state = self.state(now)
+        return state == CLOSED or (state == HALF_OPEN and not self.trial_in_flight)
+
+    def on_acquire(self, now: float) -> None:
+        if self.state(now) == HALF_OPEN:
+            self.trial_in_flight = True
+
+    def cancel_trial(self) -> None:
+        self.trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+
+    def record_failure(self, now: float) -> bool:
+        self.failures += 1
+        state = self.state(now)
+        if state == HALF_OPEN or (state == CLOSED and self.failures >= self.failure_threshold):
+            self.trip(now)
+            return True
+        return False
+
+    def trip(self, now: float) -> float:
+        # Повторные размыкания подряд удлиняют паузу экспоненциально
+        duration = min(self.reset_timeout * 2**self.trips, self.max_reset_timeout)
+        self.open_until = now + duration
+        self.trips += 1
+        self.trial_in_flight = False
+        return duration
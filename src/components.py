@@ -0,0 +1,50 @@
+from openai import OpenAI
+
+from .config import Config
+from .database import DatabaseManager
+from .image_descriptions import ImageDescriber
+from .llm_scheduler import LLMScheduler
+from .outbox import Outbox
+from .semantic_memory import SemanticMemory
+
+# Компоненты, которые одинаково собирают бот и воркер LLM
+
+
+def build_embedding_client(config: Config) -> OpenAI | None:
+    if not config.embedding_model:
+        return None
+    return OpenAI(
+        base_url=config.embedding_base_url or config.llm_base_url,
+        api_key="not-needed",
+        timeout=30.0,
+    )
+
+
+def build_memory(
+    config: Config, db: DatabaseManager, embedding_client: OpenAI | None
+) -> SemanticMemory | None:
+    if not embedding_client:
+        return None
+    return SemanticMemory(
+        db,
+        embedding_client,
+        config.embedding_model,
+        recent_messages=config.memory_recent_messages,
+        top_k=config.memory_top_k,
+    )
+
+
+def build_describer(
+    config: Config, db: DatabaseManager, scheduler: LLMScheduler
+) -> ImageDescriber | None:
+    if not config.image_descriptions_enabled:
+        return None
+    return ImageDescriber(db, scheduler, keep_raw=config.image_raw_recent)
+
+
+def build_outbox(config: Config) -> Outbox:
+    return Outbox(
+        global_rate=config.telegram_send_rate,
+        chat_rate=config.telegram_chat_send_rate,
+        workers=config.telegram_send_workers,
+    )
@@ -1,7 +1,23 @@
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from urllib.parse import urlparse
 
 
+class LLMBackendSettings(BaseModel):
+    base_url: str
+    model: str
+    weight: float = 1.0
+
+
+class ModelRouteSettings(BaseModel):
+    name: str
+    model: str
+    modes: list[str] | None = None
+    max_chars: int | None = None
+    max_history: int | None = None
+    has_image: bool | None = None
+
+
 class Config(BaseSettings):
     telegram_bot_token: str
     llm_base_url: str
@@ -9,6 +25,65 @@ class Config(BaseSettings):
     system_prompt_file: str = "prompts/system_prompt.txt"
     database_url: str = "sqlite:///aidialogs.db"
     use_mock_stats: bool = False
+    archive_dir: str = "data/archive"
+    archive_after_days: int = 0
+    archive_interval_hours: float = 24.0
+    retention_after_days: int = 0
+    retention_interval_hours: float = 24.0
+    backup_dir: str = "data/backups"
+    backup_interval_hours: float = 0.0
+    backup_keep: int = 7
+    backup_compress: bool = False
+    stats_from_snapshot: bool = False
+    stats_stream_interval: float = 2.0
+    change_feed_interval: float = 0.5
+    llm_backends: list[LLMBackendSettings] = []
+    llm_health_check_interval: float = 10.0
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 95.0
+    llm_hedge_min_delay: float = 1.0
+    llm_hedge_budget: float = 0.1
+    llm_attempt_timeout: float = 60.0
+    llm_request_deadline: float = 120.0
+    llm_routes: list[ModelRouteSettings] = []
+    llm_concurrency_per_backend: int = 4
+    llm_scheduler_quantum: int = 2000
+    llm_job_queue_enabled: bool = False
+    llm_worker_concurrency: int = 4
+    llm_job_lease_seconds: float = 300.0
+    llm_job_max_attempts: int = 3
+    embedding_base_url: str | None = None
+    embedding_model: str = ""
+    # Последние сообщения идут в промпт всегда: хотя бы одно нужно как запрос к памяти
+    memory_recent_messages: int = Field(6, ge=1)
+    memory_top_k: int = 4
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.92
+    semantic_cache_max_entries: int = 1000
+    semantic_cache_ttl_seconds: float = 86400.0
+    image_descriptions_enabled: bool = False
+    image_raw_recent: int = 1
+    media_cache_dir: str = "data/media_cache"
+    media_cache_max_mb: int = 0
+    media_group_window: float = 1.0
+    telegram_send_rate: float = 30.0
+    telegram_chat_send_rate: float = 1.0
+    telegram_send_workers: int = 8
+    rate_limit_enabled: bool = False
+    rate_limit_messages_per_minute: float = 10.0
+    rate_limit_tokens_per_hour: float = 50000.0
+    rate_limit_images_per_hour: float = 20.0
+    rate_limit_persist: bool = False
+    rate_limit_flush_interval: float = 60.0
+    rate_limit_trusted_proxies: list[str] = []
+    ready_max_llm_queue: int = 50
+    ready_max_db_pending: int = 100
+    ready_max_loop_lag: float = 0.5
+    load_shedding_enabled: bool = False
+    loop_monitor_enabled: bool = False
+    loop_monitor_debug: bool = False
+    loop_block_threshold: float = 0.1
+    loop_monitor_report_interval: float = 300.0
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -1,15 +1,32 @@
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime
 
 import aiosqlite
 
+from .activity_bitmap import ActivityBitmap
+
 
 class DatabaseManager:
-    def __init__(self, database_path: str):
+    def __init__(self, database_path: str, read_only: bool = False):
         self.database_path = database_path
+        self.read_only = read_only
         self.connection: aiosqlite.Connection | None = None
+        # Запросы, ожидающие в очереди соединения или выполняющиеся
+        self.pending = 0
+        # Соединение одно на все обработчики: commit одного завершил бы транзакцию
+        # другого, а чтение-изменение-запись битмапа активности теряло бы пользователей.
+        # Записи идут по очереди
+        self._write_lock = asyncio.Lock()
 
     async def connect(self) -> None:
-        self.connection = await aiosqlite.connect(self.database_path)
+        if self.read_only:
+            self.connection = await aiosqlite.connect(
+                f"file:{self.database_path}?mode=ro", uri=True
+            )
+        else:
+            self.connection = await aiosqlite.connect(self.database_path)
         self.connection.row_factory = aiosqlite.Row
 
     async def close(self) -> None:
@@ -17,27 +34,47 @@ class DatabaseManager:
             await self.connection.close()
             self.connection = None
 
+    @contextmanager
+    def _track(self) -> Iterator[None]:
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+
     async def execute(self, query: str, params: tuple = ()) -> None:
         if not self.connection:
             raise RuntimeError("Database not connected")
-        await self.connection.execute(query, params)
-        await self.connection.commit()
+        with self._track():
+            async with self._write_lock:
+                await self.connection.execute(query, params)
+                await self.connection.commit()
+
+    async def executemany(self, query: str, params: list[tuple]) -> None:
+        if not self.connection:
+            raise RuntimeError("Database not connected")
+        with self._track():
+            async with self._write_lock:
+                await self.connection.executemany(query, params)
+                await self.connection.commit()
 
     async def fetchone(self, query: str, params: tuple = ()) -> dict | None:
         if not self.connection:
             raise RuntimeError("Database not connected")
-        cursor = await self.connection.execute(query, params)
-        row = await cursor.fetchone()
-        if row:
-            return dict(row)
-        return None
+        with self._track():
+            cursor = await self.connection.execute(query, params)
+            row = await cursor.fetchone()
+            if row:
+                return dict(row)
+            return None
 
     async def fetchall(self, query: str, params: tuple = ()) -> list[dict]:
         if not self.connection:
             raise RuntimeError("Database not connected")
-        cursor = await self.connection.execute(query, params)
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        with self._track():
+            cursor = await self.connection.execute(query, params)
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
 
     async def get_or_create_user(self, telegram_id: int) -> int:
         user = await self.fetchone(
@@ -61,17 +98,59 @@ class DatabaseManager:
         return int(user["id"])
 
     async def add_message(self, user_id: int, role: str, content: str) -> None:
+        if not self.connection:
+            raise RuntimeError("Database not connected")
         now = datetime.utcnow().isoformat()
         length = len(content)
         query = """
             INSERT INTO messages (user_id, role, content, length, created_at)
             VALUES (?, ?, ?, ?, ?)
         """
-        await self.execute(query, (user_id, role, content, length, now))
+        with self._track():
+            async with self._write_lock:
+                await self.connection.execute(query, (user_id, role, content, length, now))
+                if role == "user":
+                    await self._mark_active(user_id, now[:10])
+                await self.connection.commit()
+
+    async def _mark_active(self, user_id: int, day: str) -> None:
+        # Выполняется в транзакции вставки сообщения под блокировкой записи, до commit
+        if not self.connection:
+            raise RuntimeError("Database not connected")
+        row = await self.fetchone("SELECT bitmap FROM daily_active_users WHERE day = ?", (day,))
+        bitmap = ActivityBitmap.from_bytes(row["bitmap"]) if row else ActivityBitmap()
+        if not bitmap.add(user_id):
+            return
+        await self.connection.execute(
+            "INSERT OR REPLACE INTO daily_active_users (day, bitmap) VALUES (?, ?)",
+            (day, bitmap.to_bytes()),
+        )
+
+    async def get_active_bitmaps(self, start_day: str, end_day: str) -> dict[str, ActivityBitmap]:
+        rows = await self.fetchall(
+            "SELECT day, bitmap FROM daily_active_users WHERE day BETWEEN ? AND ?",
+            (start_day, end_day),
+        )
+        return {row["day"]: ActivityBitmap.from_bytes(row["bitmap"]) for row in rows}
+
+    async def get_changes(self, after_id: int, limit: int = 500) -> list[dict]:
+        # Содержимое берется из messages: сообщение могло быть уже удалено физически
+        query = """
+            SELECT
+                f.id, f.op, f.message_id, f.role, f.length, f.changed_at,
+                m.content, m.created_at, u.telegram_id
+            FROM change_feed f
+            LEFT JOIN messages m ON f.op = 'insert' AND m.id = f.message_id
+            LEFT JOIN users u ON u.id = f.user_id
+            WHERE f.id > ?
+            ORDER BY f.id
+            LIMIT ?
+        """
+        return await self.fetchall(query, (after_id, limit))
 
     async def get_messages(self, user_id: int) -> list[dict]:
         query = """
-            SELECT role, content FROM messages
+            SELECT id, role, content FROM messages
             WHERE user_id = ? AND deleted_at IS NULL
             ORDER BY created_at
         """
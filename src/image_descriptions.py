@@ -0,0 +1,125 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from .database import DatabaseManager
+from .llm_scheduler import BACKGROUND, LLMScheduler
+from .semantic_memory import message_images
+
+logger = logging.getLogger(__name__)
+
+DESCRIBE_PROMPT = (
+    "Опиши изображение для собеседника, который его не видит: объекты, текст на "
+    "изображении, важные детали. Не больше трех предложений, на русском языке."
+)
+# Пауза перед повтором после неудачи, удваивается с каждой следующей
+FAILURE_BACKOFF = 60.0
+MAX_FAILURE_BACKOFF = 3600.0
+
+
+class ImageDescriber:
+    def __init__(self, db: DatabaseManager, scheduler: LLMScheduler, keep_raw: int = 1):
+        self.db = db
+        self.scheduler = scheduler
+        self.keep_raw = keep_raw
+        # Описания генерируются в фоне: message_id -> задача
+        self._pending: dict[int, asyncio.Task] = {}
+        # message_id -> (число неудач, время следующей попытки)
+        self._failures: dict[int, tuple[int, float]] = {}
+
+    async def apply(self, user_id: int, rows: list[dict]) -> list[dict]:
+        # Последние keep_raw сообщений с фото уходят в LLM как есть, более ранние заменяются
+        # сохраненным описанием: base64 старых фото не раздувает каждый запрос
+        image_rows = [row for row in rows if message_images(self._content(row))]
+        old = image_rows[: max(len(image_rows) - self.keep_raw, 0)]
+        if not old:
+            return rows
+
+        descriptions = await self._stored_descriptions([row["id"] for row in old])
+        # Недостающие описания не задерживают ответ: пока их нет, фото уходит как есть
+        for row in old:
+            if row["id"] not in descriptions:
+                self._schedule(user_id, row)
+
+        result = []
+        for row in rows:
+            description = descriptions.get(row["id"])
+            if description is None:
+                result.append(row)
+                continue
+            text = self._content(row).get("text", "")
+            content = f"{text}\n[Фото: {description}]" if text else f"[Фото: {description}]"
+            result.append({**row, "content": json.dumps({"text": content})})
+        return result
+
+    async def wait_pending(self) -> None:
+        if self._pending:
+            await asyncio.gather(*self._pending.values(), return_exceptions=True)
+
+    async def _stored_descriptions(self, ids: list[int]) -> dict[int, str]:
+        placeholders = ", ".join("?" * len(ids))
+        stored = await self.db.fetchall(
+            "SELECT message_id, description FROM image_descriptions "
+            f"WHERE message_id IN ({placeholders})",
+            tuple(ids),
+        )
+        return {row["message_id"]: row["description"] for row in stored}
+
+    def _schedule(self, user_id: int, row: dict) -> None:
+        message_id = row["id"]
+        if message_id in self._pending:
+            return
+        _, retry_at = self._failures.get(message_id, (0, 0.0))
+        if time.monotonic() < retry_at:
+            return
+        task = asyncio.create_task(
+            self._describe_and_store(user_id, message_id, message_images(self._content(row)))
+        )
+        self._pending[message_id] = task
+        task.add_done_callback(lambda _: self._pending.pop(message_id, None))
+
+    async def _describe_and_store(self, user_id: int, message_id: int, images: list[str]) -> None:
+        try:
+            description = await self._describe(user_id, images)
+            await self.db.execute(
+                """
+                INSERT OR REPLACE INTO image_descriptions (message_id, description, created_at)
+                VALUES (?, ?, ?)
+                """,
+                (message_id, description, datetime.utcnow().isoformat()),
+            )
+        except Exception as e:
+            # Пока бэкенд недоступен, каждый ход не должен заново платить за повторы
+            failures = self._failures.get(message_id, (0, 0.0))[0] + 1
+            delay = min(FAILURE_BACKOFF * 2 ** (failures - 1), MAX_FAILURE_BACKOFF)
+            self._failures[message_id] = (failures, time.monotonic() + delay)
+            logger.warning(
+                f"Не удалось описать фото сообщения {message_id}: {e}, "
+                f"следующая попытка через {delay:.0f}с"
+            )
+        else:
+            self._failures.pop(message_id, None)
+
+    async def _describe(self, user_id: int, images: list[str]) -> str:
+        # Альбом описывается одним запросом; фоновый класс планировщика
+        # не отнимает слоты у интерактивных запросов
+        content = [{"type": "text", "text": "Опиши это изображение."}]
+        content.extend(
+            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image}"}}
+            for image in images
+        )
+        messages = [{"role": "user", "content": content}]
+        description = await self.scheduler.get_response(
+            BACKGROUND, user_id, messages, DESCRIBE_PROMPT
+        )
+        logger.info(f"Получено описание фото (длина: {len(description)})")
+        return description.strip()
+
+    def _content(self, row: dict) -> dict:
+        try:
+            content = json.loads(row["content"])
+        except (json.JSONDecodeError, TypeError):
+            return {}
+        return content if isinstance(content, dict) else {}
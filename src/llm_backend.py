@@ -0,0 +1,35 @@
+from openai import OpenAI
+
+from .circuit_breaker import CircuitBreaker
+
+EWMA_ALPHA = 0.3
+
+
+class LLMBackend:
+    def __init__(self, base_url: str, model: str, weight: float = 1.0, timeout: float = 60.0):
+        self.base_url = base_url
+        self.model = model
+        self.weight = weight
+        # Повторы выполняет LLMClient по своей политике, встроенные повторы SDK отключены
+        self.client = OpenAI(
+            base_url=base_url, api_key="not-needed", timeout=timeout, max_retries=0
+        )
+        self.breaker = CircuitBreaker()
+        self.outstanding = 0
+        self.ewma_latency: float | None = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.model}@{self.base_url}"
+
+    def cost(self) -> float:
+        # Peak-EWMA: ожидаемое время ответа с учетом очереди на бэкенде;
+        # без замеров бэкенд считается быстрым, чтобы получить первые запросы
+        latency = self.ewma_latency if self.ewma_latency is not None else 0.0
+        return (self.outstanding + 1) * (latency + 1.0) / self.weight
+
+    def record_latency(self, latency: float) -> None:
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency += EWMA_ALPHA * (latency - self.ewma_latency)
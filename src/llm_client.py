@@ -1,17 +1,69 @@
 import logging
+import threading
 import time
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
-from openai import OpenAI
+from .config import LLMBackendSettings, ModelRouteSettings
+from .llm_backend import LLMBackend
+from .llm_hedging import HedgePolicy, HedgeRace
+from .llm_pool import LLMBackendPool
+from .llm_retry import RetryPolicy
+from .model_router import ModelRouter
 
 logger = logging.getLogger(__name__)
 
+HEDGE_WORKERS = 32
+
+
+class HedgeCancelledError(Exception):
+    pass
+
+
+class RequestCancelledError(Exception):
+    pass
+
 
 class LLMClient:
-    def __init__(self, base_url: str, model: str, system_prompt_file: str, max_retries: int = 3):
-        self.client = OpenAI(base_url=base_url, api_key="not-needed", timeout=60.0)
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        system_prompt_file: str,
+        max_retries: int = 3,
+        backends: Sequence[LLMBackendSettings] | None = None,
+        hedge_policy: HedgePolicy | None = None,
+        attempt_timeout: float = 60.0,
+        request_deadline: float = 120.0,
+        routes: Sequence[ModelRouteSettings] | None = None,
+    ):
+        # Список бэкендов заменяет одиночный base_url/model, если задан
+        self.pool = LLMBackendPool(
+            [LLMBackend(b.base_url, b.model, b.weight) for b in backends]
+            if backends
+            else [LLMBackend(base_url, model)]
+        )
+        self.client = self.pool.backends[0].client
         self.model = model
+        served_models = {backend.model for backend in self.pool.backends}
+        for route in routes or []:
+            if route.model not in served_models:
+                raise ValueError(
+                    f"Маршрут {route.name}: модель {route.model} нет ни на одном бэкенде"
+                )
+        # Без подходящего правила запрос идет на основную модель, если ее обслуживает пул
+        self.router = ModelRouter(routes or [], model if model in served_models else None)
         self.system_prompt = self._read_prompt_file(system_prompt_file)
         self.max_retries = max_retries
+        self.retry_policy = RetryPolicy(
+            max_attempts=max_retries, attempt_timeout=attempt_timeout, deadline=request_deadline
+        )
+        self.hedge_policy = hedge_policy
+        self._hedge_executor = (
+            ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+            if hedge_policy
+            else None
+        )
 
     def _read_prompt_file(self, file_path: str) -> str:
         try:
@@ -21,26 +73,210 @@ class LLMClient:
             logger.error(f"Файл промпта не найден: {file_path}")
             raise
 
-    def get_response(self, messages: list[dict]) -> str:
-        full_messages = [{"role": "system", "content": self.system_prompt}] + messages
+    def get_response(
+        self,
+        messages: list[dict],
+        system_prompt: str | None = None,
+        mode: str = "normal",
+        cancel: threading.Event | None = None,
+        backend: LLMBackend | None = None,
+        routed: tuple[str, str | None] | None = None,
+    ) -> str:
+        # backend и routed передает LLMScheduler: первая попытка идет на бэкенд,
+        # под который он занял слот, маршрут уже посчитан при постановке в очередь
+        prompt = self.system_prompt if system_prompt is None else system_prompt
+        full_messages = [{"role": "system", "content": prompt}] + messages
+        failed: list[LLMBackend] = []
+        policy = self.retry_policy
+        started = time.monotonic()
+        deadline = started + policy.deadline
+        route, model = routed or self.router.route(messages, mode)
+        preferred = backend
 
         for attempt in range(1, self.max_retries + 1):
+            timeout = min(policy.attempt_timeout, deadline - time.monotonic())
             try:
+                if cancel and cancel.is_set():
+                    raise RequestCancelledError("Запрос к LLM отменен до отправки")
                 logger.info(f"Запрос к LLM (попытка {attempt}/{self.max_retries})")
-                response = self.client.chat.completions.create(
-                    model=self.model, messages=full_messages
-                )
-                content = response.choices[0].message.content
-                result = content if content is not None else ""
+                if self.hedge_policy:
+                    result = self._hedged_request(
+                        model, full_messages, failed, timeout, cancel, preferred
+                    )
+                elif cancel:
+                    # Отменяемый запрос идет потоком: закрытие соединения останавливает генерацию
+                    backend = self.pool.acquire(model=model, exclude=failed, preferred=preferred)
+                    result = self._stream_request(
+                        backend, full_messages, failed, timeout, cancel=cancel
+                    )
+                else:
+                    backend = self.pool.acquire(model=model, exclude=failed, preferred=preferred)
+                    result = self._request(backend, full_messages, failed, timeout)
+                self.router.record(route, time.monotonic() - started)
                 logger.info(f"Ответ LLM (длина: {len(result)}): {result[:200]}...")
                 return result
+            except RequestCancelledError:
+                logger.info("Запрос к LLM отменен клиентом, частичный ответ отброшен")
+                raise
             except Exception as e:
                 error_msg = f"Ошибка LLM API (попытка {attempt}/{self.max_retries})"
                 logger.error(f"{error_msg}: {type(e).__name__}: {e}")
-                if attempt < self.max_retries:
-                    wait_time = attempt * 2
-                    logger.info(f"Повтор через {wait_time}с...")
-                    time.sleep(wait_time)
-                else:
+                if not policy.is_retryable(e):
+                    logger.error("Ошибка не временная, повтор не выполняется")
+                    self.router.record(route, None)
+                    raise
+                if attempt == self.max_retries:
                     logger.error(f"Все {self.max_retries} попытки исчерпаны")
+                    self.router.record(route, None)
                     raise
+                wait_time = policy.backoff(attempt, e)
+                if time.monotonic() + wait_time >= deadline:
+                    logger.error(f"Общий дедлайн {policy.deadline:.0f}с исчерпан")
+                    self.router.record(route, None)
+                    raise
+                logger.info(f"Повтор через {wait_time:.1f}с...")
+                if cancel:
+                    cancel.wait(wait_time)
+                else:
+                    time.sleep(wait_time)
+
+    def _request(
+        self,
+        backend: LLMBackend,
+        full_messages: list[dict],
+        failed: list[LLMBackend],
+        timeout: float,
+    ) -> str:
+        started = time.monotonic()
+        try:
+            response = backend.client.chat.completions.create(
+                model=backend.model, messages=full_messages, timeout=timeout
+            )
+            content = response.choices[0].message.content
+        except Exception as e:
+            self._release_failed(backend, e, failed)
+            raise
+        self.pool.release(backend, succeeded=True, latency=time.monotonic() - started)
+        return content if content is not None else ""
+
+    def _release_failed(
+        self, backend: LLMBackend, error: BaseException, failed: list[LLMBackend]
+    ) -> None:
+        # Ошибки клиента (например, слишком длинный контекст) не размыкают circuit breaker
+        if self.retry_policy.is_retryable(error):
+            self.pool.release(backend, succeeded=False)
+            failed.append(backend)
+        else:
+            self.pool.abandon(backend)
+
+    def _hedged_request(
+        self,
+        model: str | None,
+        full_messages: list[dict],
+        failed: list[LLMBackend],
+        timeout: float,
+        cancel: threading.Event | None = None,
+        preferred: LLMBackend | None = None,
+    ) -> str:
+        if not self.hedge_policy or not self._hedge_executor:
+            raise RuntimeError("Дублирование запросов не настроено")
+        policy = self.hedge_policy
+        policy.start_request()
+
+        # Побеждает попытка, первой получившая токен; проигравшая прерывается на своем чанке
+        race = HedgeRace()
+        primary = self.pool.acquire(model=model, exclude=failed, preferred=preferred)
+        primary_responded = threading.Event()
+        attempts: dict[Future, threading.Event] = {
+            self._hedge_executor.submit(
+                self._stream_request,
+                primary,
+                full_messages,
+                failed,
+                timeout,
+                cancel,
+                race,
+                primary_responded,
+            ): primary_responded
+        }
+
+        delay = policy.delay()
+        if delay is not None and not primary_responded.wait(delay) and policy.try_hedge():
+            hedge = self.pool.acquire(model=model, exclude=[primary, *failed])
+            logger.info(f"Нет ответа от {primary.name} за {delay:.1f}с, дубль на {hedge.name}")
+            hedge_responded = threading.Event()
+            attempts[
+                self._hedge_executor.submit(
+                    self._stream_request,
+                    hedge,
+                    full_messages,
+                    failed,
+                    timeout,
+                    cancel,
+                    race,
+                    hedge_responded,
+                )
+            ] = hedge_responded
+
+        errors: list[BaseException] = []
+        pending = set(attempts)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    return future.result()
+                if isinstance(error, HedgeCancelledError):
+                    continue
+                # Победитель уже прервал остальные попытки - ждать их бесполезно
+                if race.is_winner(attempts[future]):
+                    raise error
+                errors.append(error)
+        raise errors[0]
+
+    def _stream_request(
+        self,
+        backend: LLMBackend,
+        full_messages: list[dict],
+        failed: list[LLMBackend],
+        timeout: float,
+        cancel: threading.Event | None = None,
+        race: HedgeRace | None = None,
+        responded: threading.Event | None = None,
+    ) -> str:
+        started = time.monotonic()
+        parts: list[str] = []
+        responded = responded or threading.Event()
+        try:
+            stream = backend.client.chat.completions.create(
+                model=backend.model, messages=full_messages, stream=True, timeout=timeout
+            )
+            try:
+                for chunk in stream:
+                    if not responded.is_set():
+                        responded.set()
+                        if self.hedge_policy:
+                            self.hedge_policy.record(time.monotonic() - started)
+                        if race:
+                            race.claim(responded)
+                    if race and not race.is_winner(responded):
+                        raise HedgeCancelledError(f"Запрос к {backend.name} отменен")
+                    # Отмена проверяется на каждом чанке; закрытие потока обрывает
+                    # HTTP-соединение, и бэкенд прекращает генерацию
+                    if cancel and cancel.is_set():
+                        raise RequestCancelledError(f"Запрос к {backend.name} отменен клиентом")
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+            finally:
+                stream.close()
+        except (HedgeCancelledError, RequestCancelledError):
+            self.pool.abandon(backend)
+            raise
+        except Exception as e:
+            self._release_failed(backend, e, failed)
+            raise
+        finally:
+            # Ошибка до первого токена тоже снимает ожидание дедлайна
+            responded.set()
+        self.pool.release(backend, succeeded=True, latency=time.monotonic() - started)
+        return "".join(parts)
@@ -0,0 +1,65 @@
+import math
+import threading
+from collections import deque
+
+
+class HedgePolicy:
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay: float = 1.0,
+        budget: float = 0.1,
+        window: int = 200,
+        min_samples: int = 20,
+        max_tokens: float = 10.0,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.budget = budget
+        self.min_samples = min_samples
+        self.max_tokens = max_tokens
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def delay(self) -> float | None:
+        # Дедлайн дублирования - перцентиль недавнего времени до первого токена;
+        # пока замеров мало, запросы не дублируются
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(math.ceil(len(latencies) * self.percentile / 100) - 1, len(latencies) - 1)
+        return max(latencies[max(index, 0)], self.min_delay)
+
+    def start_request(self) -> None:
+        # Каждый запрос пополняет бюджет на долю дубля: при общем замедлении
+        # дублируется не больше budget запросов, и нагрузка не удваивается
+        with self._lock:
+            self._tokens = min(self._tokens + self.budget, self.max_tokens)
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class HedgeRace:
+    def __init__(self):
+        self._winner: object | None = None
+        self._lock = threading.Lock()
+
+    def claim(self, attempt: object) -> bool:
+        with self._lock:
+            if self._winner is None:
+                self._winner = attempt
+            return self._winner is attempt
+
+    def is_winner(self, attempt: object) -> bool:
+        return self._winner is attempt
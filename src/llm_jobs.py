@@ -0,0 +1,327 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import openai
+from aiogram import Bot
+
+from .database import DatabaseManager
+from .llm_client import LLMClient, RequestCancelledError
+from .outbox import Outbox
+from .session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+# Ответ сгенерирован и сохранен, задание ждет успешной отправки
+DELIVERING = "delivering"
+DEAD = "dead"
+
+ERROR_REPLY = "Извините, произошла ошибка. Попробуйте позже."
+
+
+class LLMJobQueue:
+    def __init__(
+        self,
+        db: DatabaseManager,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+        reclaim_interval: float = 10.0,
+    ):
+        self.db = db
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.reclaim_interval = reclaim_interval
+        self._next_reclaim = 0.0
+
+    async def enqueue(self, telegram_id: int, chat_id: int) -> None:
+        # История уже сохранена в messages, задание хранит только адресата ответа
+        now = datetime.utcnow().isoformat()
+        await self.db.execute(
+            """
+            INSERT INTO llm_jobs (telegram_id, chat_id, available_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (telegram_id, chat_id, now, now, now),
+        )
+
+    async def reclaim(self) -> None:
+        # Воркер упал на последней попытке: задание больше не выдается
+        now_iso = datetime.utcnow().isoformat()
+        await self.db.execute(
+            """
+            UPDATE llm_jobs SET status = ?, error = 'Аренда истекла', updated_at = ?
+            WHERE status IN (?, ?) AND lease_until < ? AND attempts >= ?
+            """,
+            (DEAD, now_iso, RUNNING, DELIVERING, now_iso, self.max_attempts),
+        )
+
+    async def claim(self) -> dict | None:
+        # Очередь общая для всех циклов воркера: истекшие аренды проверяются
+        # раз в reclaim_interval, а не каждым опросом
+        if time.monotonic() >= self._next_reclaim:
+            self._next_reclaim = time.monotonic() + self.reclaim_interval
+            await self.reclaim()
+
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
+        # Выдается самое старое незавершенное задание пользователя: ответы на его
+        # сообщения генерируются и доставляются по очереди, даже если воркеров несколько.
+        # Задание с истекшей арендой (воркер перезапущен) выдается повторно.
+        # Задание с сохраненным ответом остается в статусе доставки
+        token = uuid.uuid4().hex
+        lease_until = (now + timedelta(seconds=self.lease_seconds)).isoformat()
+        await self.db.execute(
+            """
+            UPDATE llm_jobs
+            SET status = CASE WHEN response IS NULL THEN ? ELSE ? END,
+                attempts = attempts + 1, lease_token = ?, lease_until = ?, updated_at = ?
+            WHERE id = (
+                SELECT j.id FROM llm_jobs j
+                WHERE (
+                    (j.status IN (?, ?) AND j.lease_token IS NULL AND j.available_at <= ?)
+                    OR (j.status IN (?, ?) AND j.lease_until < ? AND j.attempts < ?)
+                )
+                AND NOT EXISTS (
+                    SELECT 1 FROM llm_jobs e
+                    WHERE e.telegram_id = j.telegram_id AND e.id < j.id
+                      AND e.status IN (?, ?, ?)
+                )
+                ORDER BY j.id
+                LIMIT 1
+            )
+            """,
+            (
+                RUNNING,
+                DELIVERING,
+                token,
+                lease_until,
+                now_iso,
+                QUEUED,
+                DELIVERING,
+                now_iso,
+                RUNNING,
+                DELIVERING,
+                now_iso,
+                self.max_attempts,
+                QUEUED,
+                RUNNING,
+                DELIVERING,
+            ),
+        )
+        return await self.db.fetchone("SELECT * FROM llm_jobs WHERE lease_token = ?", (token,))
+
+    async def cancel(self, telegram_id: int) -> None:
+        # Воркер замечает удаление своего задания и прерывает генерацию
+        await self.db.execute(
+            "DELETE FROM llm_jobs WHERE telegram_id = ? AND status IN (?, ?)",
+            (telegram_id, QUEUED, RUNNING),
+        )
+
+    async def is_claimed(self, job: dict) -> bool:
+        row = await self.db.fetchone(
+            "SELECT 1 FROM llm_jobs WHERE id = ? AND lease_token = ?",
+            (job["id"], job["lease_token"]),
+        )
+        return row is not None
+
+    async def deliver(self, job: dict, response: str) -> None:
+        # Аренда сохраняется: если воркер упадет до отправки, доставку повторит другой
+        await self.db.execute(
+            """
+            UPDATE llm_jobs SET status = ?, response = ?, updated_at = ?
+            WHERE id = ? AND lease_token = ?
+            """,
+            (DELIVERING, response, datetime.utcnow().isoformat(), job["id"], job["lease_token"]),
+        )
+
+    async def complete(self, job: dict) -> None:
+        # Токен аренды защищает от воркера, чье задание уже выдано другому
+        await self.db.execute(
+            "DELETE FROM llm_jobs WHERE id = ? AND lease_token = ?",
+            (job["id"], job["lease_token"]),
+        )
+
+    async def fail(self, job: dict, error: str, retryable: bool = True) -> bool:
+        now = datetime.utcnow()
+        if not retryable or job["attempts"] >= self.max_attempts:
+            await self.db.execute(
+                """
+                UPDATE llm_jobs SET status = ?, error = ?, updated_at = ?
+                WHERE id = ? AND lease_token = ?
+                """,
+                (DEAD, error, now.isoformat(), job["id"], job["lease_token"]),
+            )
+            return True
+
+        delay = self.retry_delay * 2 ** (job["attempts"] - 1)
+        # Задание с сохраненным ответом повторяет только доставку
+        await self.db.execute(
+            """
+            UPDATE llm_jobs
+            SET status = CASE WHEN response IS NULL THEN ? ELSE ? END, error = ?,
+                available_at = ?, lease_token = NULL, lease_until = NULL, updated_at = ?
+            WHERE id = ? AND lease_token = ?
+            """,
+            (
+                QUEUED,
+                DELIVERING,
+                error,
+                (now + timedelta(seconds=delay)).isoformat(),
+                now.isoformat(),
+                job["id"],
+                job["lease_token"],
+            ),
+        )
+        return False
+
+    async def stats(self) -> dict:
+        row = await self.db.fetchone(
+            """
+            SELECT
+                COALESCE(SUM(status = ?), 0) as queued,
+                COALESCE(SUM(status = ?), 0) as running,
+                COALESCE(SUM(status = ?), 0) as delivering,
+                COALESCE(SUM(status = ?), 0) as dead,
+                MIN(CASE WHEN status = ? THEN created_at END) as oldest_queued_at
+            FROM llm_jobs
+            """,
+            (QUEUED, RUNNING, DELIVERING, DEAD, QUEUED),
+        )
+        oldest = row["oldest_queued_at"] if row else None
+        return {
+            "queued": row["queued"] if row else 0,
+            "running": row["running"] if row else 0,
+            "delivering": row["delivering"] if row else 0,
+            "dead": row["dead"] if row else 0,
+            "oldest_queued_age": (
+                (datetime.utcnow() - datetime.fromisoformat(oldest)).total_seconds()
+                if oldest
+                else None
+            ),
+        }
+
+
+class LLMWorker:
+    def __init__(
+        self,
+        queue: LLMJobQueue,
+        session_manager: SessionManager,
+        llm_client: LLMClient,
+        bot: Bot,
+        poll_interval: float = 0.5,
+        cancel_check_interval: float = 1.0,
+        outbox: Outbox | None = None,
+        max_poll_interval: float = 5.0,
+    ):
+        self.queue = queue
+        self.session_manager = session_manager
+        self.llm_client = llm_client
+        self.bot = bot
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.cancel_check_interval = cancel_check_interval
+        self.outbox = outbox or Outbox()
+
+    async def run(self, concurrency: int) -> None:
+        await asyncio.gather(*(self._run_loop() for _ in range(concurrency)))
+
+    async def run_once(self) -> bool:
+        job = await self.queue.claim()
+        if not job:
+            return False
+
+        telegram_id = job["telegram_id"]
+        if job["status"] == DELIVERING:
+            # Ответ уже сгенерирован и сохранен в истории, прошлая отправка не удалась
+            return await self._deliver(job, job["response"])
+
+        try:
+            session = await self.session_manager.get_context(telegram_id)
+            response = await self._generate(job, session)
+            if response is None or not await self.queue.is_claimed(job):
+                logger.info(f"Задание {job['id']} отменено, ответ отброшен")
+                return True
+            await self.session_manager.add_message(telegram_id, "assistant", response)
+            await self.queue.deliver(job, response)
+        except Exception as e:
+            logger.error(
+                f"Ошибка задания {job['id']} для пользователя {telegram_id} "
+                f"(попытка {job['attempts']}): {e}"
+            )
+            if await self.queue.fail(job, str(e), retryable=self._is_retryable(e)):
+                logger.error(f"Задание {job['id']} перемещено в dead letter")
+                await self._notify_failure(job)
+            return True
+
+        return await self._deliver(job, response)
+
+    async def _deliver(self, job: dict, response: str) -> bool:
+        # Задание завершается только после отправки: при ошибке доставка повторяется
+        # позже с сохраненным ответом, без новой генерации
+        try:
+            await self._send(job, response)
+        except Exception as e:
+            logger.error(
+                f"Не удалось отправить ответ задания {job['id']} (попытка {job['attempts']}): {e}"
+            )
+            if await self.queue.fail(job, str(e)):
+                logger.error(f"Задание {job['id']} перемещено в dead letter, ответ не доставлен")
+            return True
+        await self.queue.complete(job)
+        logger.info(
+            f"Задание {job['id']} выполнено, ответ отправлен пользователю {job['telegram_id']}"
+        )
+        return True
+
+    async def _generate(self, job: dict, session: list[dict]) -> str | None:
+        # Пока идет генерация, задание периодически сверяется с БД: /reset удаляет его
+        cancel = threading.Event()
+        generation = asyncio.create_task(
+            asyncio.to_thread(self.llm_client.get_response, session, cancel=cancel)
+        )
+        while not generation.done():
+            await asyncio.wait({generation}, timeout=self.cancel_check_interval)
+            if not generation.done() and not await self.queue.is_claimed(job):
+                cancel.set()
+                break
+        try:
+            return await generation
+        except RequestCancelledError:
+            return None
+
+    def _is_retryable(self, error: Exception) -> bool:
+        # Ответ LLM с 400/401/404 повтор не исправит; прочие ошибки считаются временными
+        if isinstance(error, openai.APIError):
+            return self.llm_client.retry_policy.is_retryable(error)
+        return True
+
+    async def _run_loop(self) -> None:
+        # Пустая очередь опрашивается все реже, до max_poll_interval
+        delay = self.poll_interval
+        while True:
+            try:
+                if await self.run_once():
+                    delay = self.poll_interval
+                    continue
+            except Exception as e:
+                logger.error(f"Ошибка очереди заданий LLM: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+
+    async def _send(self, job: dict, text: str) -> None:
+        chat_id = job["chat_id"]
+        await self.outbox.send(chat_id, text, functools.partial(self.bot.send_message, chat_id))
+
+    async def _notify_failure(self, job: dict) -> None:
+        try:
+            await self._send(job, ERROR_REPLY)
+        except Exception as e:
+            logger.error(f"Не удалось сообщить об ошибке пользователю {job['telegram_id']}: {e}")
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Collection
+
+from .circuit_breaker import OPEN
+from .llm_backend import LLMBackend
+
+logger = logging.getLogger(__name__)
+
+
+class NoBackendAvailableError(RuntimeError):
+    pass
+
+
+class LLMBackendPool:
+    def __init__(self, backends: list[LLMBackend], health_check_timeout: float = 5.0):
+        if not backends:
+            raise ValueError("Не задан ни один LLM бэкенд")
+        self.backends = backends
+        self.health_check_timeout = health_check_timeout
+        # Вызовы идут из рабочих потоков asyncio.to_thread
+        self._lock = threading.Lock()
+
+    def acquire(
+        self,
+        model: str | None = None,
+        exclude: Collection[LLMBackend] = (),
+        preferred: LLMBackend | None = None,
+    ) -> LLMBackend:
+        with self._lock:
+            now = time.monotonic()
+            available = [
+                backend
+                for backend in self.backends
+                if (model is None or backend.model == model) and backend.breaker.is_available(now)
+            ]
+            # Повтор идет на другой бэкенд, но если других нет - на тот же
+            candidates = [backend for backend in available if backend not in exclude] or available
+            if not candidates:
+                raise NoBackendAvailableError(f"Нет доступных LLM бэкендов для модели {model}")
+            # Бэкенд, под который планировщик занял слот, выбирается, пока он доступен
+            if preferred in candidates:
+                backend = preferred
+            else:
+                backend = min(candidates, key=lambda candidate: candidate.cost())
+            backend.breaker.on_acquire(now)
+            backend.outstanding += 1
+            return backend
+
+    def release(self, backend: LLMBackend, succeeded: bool, latency: float = 0.0) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+            if succeeded:
+                backend.record_latency(latency)
+                backend.breaker.record_success()
+                return
+
+            now = time.monotonic()
+            if backend.breaker.record_failure(now):
+                logger.warning(
+                    f"LLM бэкенд {backend.name} исключен на {backend.breaker.open_until - now:.0f}с"
+                )
+
+    def abandon(self, backend: LLMBackend) -> None:
+        # Отмененный запрос или ошибка клиента не говорят о здоровье и задержке бэкенда
+        with self._lock:
+            backend.outstanding -= 1
+            backend.breaker.cancel_trial()
+
+    def states(self) -> list[dict]:
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    "name": backend.name,
+                    "model": backend.model,
+                    "state": backend.breaker.state(now),
+                    "outstanding": backend.outstanding,
+                    "ewma_latency": backend.ewma_latency,
+                }
+                for backend in self.backends
+            ]
+
+    def check_health(self) -> None:
+        for backend in self.backends:
+            try:
+                backend.client.with_options(timeout=self.health_check_timeout).models.list()
+            except Exception as e:
+                with self._lock:
+                    now = time.monotonic()
+                    if backend.breaker.state(now) != OPEN:
+                        duration = backend.breaker.trip(now)
+                        logger.warning(
+                            f"LLM бэкенд {backend.name} не прошел проверку ({e}), "
+                            f"исключен на {duration:.0f}с"
+                        )
+                continue
+
+            with self._lock:
+                if backend.breaker.trips:
+                    logger.info(f"LLM бэкенд {backend.name} снова доступен")
+                backend.breaker.record_success()
+
+    async def run_health_checks(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.check_health)
+            except Exception as e:
+                logger.error(f"Ошибка проверки LLM бэкендов: {e}")
+            await asyncio.sleep(interval_seconds)
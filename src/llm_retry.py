@@ -0,0 +1,55 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import openai
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        attempt_timeout: float = 60.0,
+        deadline: float = 120.0,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+
+    def is_retryable(self, error: BaseException) -> bool:
+        # Таймауты, обрывы соединения, перегрузка и ошибки сервера - временные;
+        # 400 (слишком длинный контекст), 401/403, 404, 422 повтор не исправит
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+        return False
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        # Экспоненциальная пауза с полным джиттером, но не меньше Retry-After сервера
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        retry_after = self.retry_after(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def retry_after(self, error: BaseException) -> float | None:
+        if not isinstance(error, openai.APIStatusError):
+            return None
+        headers = error.response.headers
+        try:
+            if "retry-after-ms" in headers:
+                return max(float(headers["retry-after-ms"]) / 1000, 0.0)
+            if "retry-after" in headers:
+                value = headers["retry-after"]
+                try:
+                    return max(float(value), 0.0)
+                except ValueError:
+                    return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+        return None
@@ -0,0 +1,279 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from .llm_backend import LLMBackend
+from .llm_client import LLMClient
+from .llm_pool import NoBackendAvailableError
+from .semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+ADMIN = "admin"
+BACKGROUND = "background"
+# Классы в порядке строгого приоритета
+PRIORITIES = (INTERACTIVE, ADMIN, BACKGROUND)
+
+IMAGE_COST = 1000
+WAIT_WINDOW = 500
+
+
+def estimate_cost(messages: list[dict]) -> int:
+    # Стоимость запроса - размер промпта в символах, фото считается фиксированной ценой
+    cost = 0
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            cost += len(content)
+            continue
+        for part in content:
+            cost += len(part.get("text", "")) if part["type"] == "text" else IMAGE_COST
+    return max(cost, 1)
+
+
+class Job:
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        args: tuple,
+        cost: int,
+        future: asyncio.Future,
+        model: str | None = None,
+    ):
+        self.func = func
+        self.args = args
+        self.cost = cost
+        self.future = future
+        # None - подходит любой бэкенд
+        self.model = model
+        self.backend: LLMBackend | None = None
+        self.enqueued_at = time.monotonic()
+
+
+class PriorityClass:
+    def __init__(self, name: str, quantum: int):
+        self.name = name
+        self.quantum = quantum
+        self.queues: dict[Hashable, deque[Job]] = {}
+        self.deficits: dict[Hashable, int] = {}
+        self.active: deque[Hashable] = deque()
+        self.waits: deque[float] = deque(maxlen=WAIT_WINDOW)
+        self.dispatched = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def push(self, key: Hashable, job: Job) -> None:
+        if key not in self.queues:
+            self.queues[key] = deque()
+            self.deficits[key] = 0
+            self.active.append(key)
+        self.queues[key].append(job)
+
+    def pop(self, runnable: Callable[[Job], bool]) -> Job | None:
+        # Deficit round robin: за проход пользователь получает квант символов,
+        # поэтому длинные промпты одного пользователя не вытесняют короткие у других.
+        # Пользователь, чьей модели сейчас негде выполниться, пропускает ход
+        skipped = 0
+        while len(self.active) > skipped:
+            key = self.active[0]
+            queue = self.queues[key]
+            while queue and queue[0].future.done():
+                # Вызывающий уже отменил ожидание
+                queue.popleft()
+            if not queue:
+                self._remove(key)
+                continue
+            job = queue[0]
+            if not runnable(job):
+                self.active.rotate(-1)
+                skipped += 1
+                continue
+            if self.deficits[key] < job.cost:
+                skipped = 0
+                self.deficits[key] += self.quantum
+                self.active.rotate(-1)
+                continue
+            self.deficits[key] -= job.cost
+            queue.popleft()
+            if not queue:
+                self._remove(key)
+            return job
+        return None
+
+    def _remove(self, key: Hashable) -> None:
+        self.active.popleft()
+        del self.queues[key]
+        del self.deficits[key]
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        concurrency_per_backend: int = 4,
+        quantum: int = 2000,
+        cache: SemanticCache | None = None,
+    ):
+        self.llm_client = llm_client
+        self.concurrency_per_backend = concurrency_per_backend
+        self.cache = cache
+        self.running = 0
+        # Слоты считаются по каждому бэкенду: общий лимит пропустил бы на один
+        # бэкенд больше запросов, чем он может обслужить
+        self.backend_running: dict[LLMBackend, int] = {
+            backend: 0 for backend in llm_client.pool.backends
+        }
+        self.classes = {name: PriorityClass(name, quantum) for name in PRIORITIES}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def get_response(
+        self, priority: str, key: Hashable, messages: list[dict], *args: Any
+    ) -> str:
+        # Остальные аргументы передаются в LLMClient.get_response как есть.
+        # Отмена ожидающей корутины снимает запрос из очереди или прерывает генерацию
+        query = self._cache_query(messages, *args)
+        vector = None
+        if query and self.cache:
+            try:
+                cached, vector = await self.cache.lookup(*query)
+            except Exception as e:
+                logger.warning(f"Семантический кэш недоступен: {e}")
+            else:
+                if cached is not None:
+                    return cached
+
+        mode = args[1] if len(args) > 1 else "normal"
+        route = self.llm_client.router.route(messages, mode)
+        cancel = threading.Event()
+        try:
+            response = await self.submit(
+                priority,
+                key,
+                estimate_cost(messages),
+                functools.partial(self.llm_client.get_response, cancel=cancel, routed=route),
+                messages,
+                *args,
+                model=route[1],
+            )
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+        if query and self.cache and vector is not None:
+            self.cache.store(query[0], vector, response)
+        return response
+
+    async def submit(
+        self,
+        priority: str,
+        key: Hashable,
+        cost: int,
+        func: Callable[..., Any],
+        *args: Any,
+        model: str | None = None,
+    ) -> Any:
+        # func получает зарезервированный бэкенд в аргументе backend.
+        # Запрос к модели, которую не обслуживает ни один бэкенд, ждал бы слота вечно
+        if not any(model is None or backend.model == model for backend in self.backend_running):
+            raise NoBackendAvailableError(f"Нет LLM бэкендов для модели {model}")
+        job = Job(func, args, cost, asyncio.get_running_loop().create_future(), model)
+        self.classes[priority].push(key, job)
+        self._dispatch()
+        return await job.future
+
+    def _cache_query(self, messages: list[dict], *args: Any) -> tuple[str, str] | None:
+        # Кэшируется только первый текстовый вопрос: ответ не зависит от истории.
+        # Admin режим не кэшируется - его промпт содержит текущую статистику
+        system_prompt = args[0] if args else None
+        mode = args[1] if len(args) > 1 else "normal"
+        if not self.cache or mode == "admin" or len(messages) != 1:
+            return None
+        message = messages[0]
+        if message["role"] != "user" or not isinstance(message["content"], str):
+            return None
+        prompt = self.llm_client.system_prompt if system_prompt is None else system_prompt
+        scope = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        return scope, message["content"]
+
+    def stats(self) -> list[dict]:
+        result = []
+        for priority in self.classes.values():
+            waits = sorted(priority.waits)
+            result.append(
+                {
+                    "priority": priority.name,
+                    "queued": priority.queued,
+                    "users": len(priority.queues),
+                    "dispatched": priority.dispatched,
+                    "p50_wait": self._percentile(waits, 50),
+                    "p95_wait": self._percentile(waits, 95),
+                }
+            )
+        return result
+
+    def _dispatch(self) -> None:
+        while True:
+            job, priority = self._next_job()
+            if not job:
+                return
+            job.backend = self._free_backend(job.model)
+            self.backend_running[job.backend] += 1
+            wait = time.monotonic() - job.enqueued_at
+            priority.waits.append(wait)
+            priority.dispatched += 1
+            if wait > 1.0:
+                logger.info(f"Запрос LLM ({priority.name}) ждал в очереди {wait:.1f}с")
+            self.running += 1
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _next_job(self) -> tuple[Job | None, PriorityClass | None]:
+        # Строгий приоритет: фоновые задачи не задерживают интерактивные запросы
+        for priority in self.classes.values():
+            job = priority.pop(lambda job: self._free_backend(job.model) is not None)
+            if job:
+                return job, priority
+        return None, None
+
+    def _free_backend(self, model: str | None) -> LLMBackend | None:
+        # Из бэкендов модели со свободным слотом - доступный и наименее загруженный
+        now = time.monotonic()
+        free = [
+            backend
+            for backend, running in self.backend_running.items()
+            if (model is None or backend.model == model) and running < self.concurrency_per_backend
+        ]
+        if not free:
+            return None
+        return min(
+            free, key=lambda backend: (not backend.breaker.is_available(now), backend.cost())
+        )
+
+    async def _run(self, job: Job) -> None:
+        try:
+            result = await asyncio.to_thread(job.func, *job.args, backend=job.backend)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self.running -= 1
+            self.backend_running[job.backend] -= 1
+            self._dispatch()
+
+    def _percentile(self, values: list[float], percentile: float) -> float | None:
+        if not values:
+            return None
+        return values[max(math.ceil(len(values) * percentile / 100) - 1, 0)]
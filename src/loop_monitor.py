@@ -0,0 +1,172 @@
+import asyncio
+import atexit
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+logger = logging.getLogger(__name__)
+
+# Верхние границы корзин гистограммы задержки, секунды
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+
+def setup_logging(log_file: str) -> QueueListener:
+    # Запись в файл идет из отдельного потока: синхронный FileHandler в цикле событий
+    # блокирует его на каждой строке лога
+    log_queue: SimpleQueue = SimpleQueue()
+    listener = QueueListener(
+        log_queue,
+        logging.StreamHandler(),
+        logging.FileHandler(log_file),
+        respect_handler_level=True,
+    )
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    for handler in listener.handlers:
+        handler.setFormatter(formatter)
+    logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+    listener.start()
+    # При выходе listener дописывает оставшиеся в очереди записи
+    atexit.register(listener.stop)
+    return listener
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = 0.1,
+        block_threshold: float = 0.1,
+        debug: bool = False,
+        log_interval: float = 60.0,
+        recent_window: int = 20,
+    ):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.debug = debug
+        self.log_interval = log_interval
+        self.counts = [0] * len(LAG_BUCKETS)
+        self.samples = 0
+        self.max_lag = 0.0
+        # Зафиксированные блокировки: задержка и, в debug режиме, стек блокирующего кода
+        self.blocks: deque[dict] = deque(maxlen=100)
+        self._recent: deque[float] = deque(maxlen=recent_window)
+        self._expected_wake = 0.0
+        self._stack: str | None = None
+        self._last_log = 0.0
+        self._suppressed = 0
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = 0
+
+    @property
+    def recent_lag(self) -> float:
+        # Максимум за последние замеры: один короткий замер не снимает перегрузку
+        return max(self._recent, default=0.0)
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._expected_wake = time.monotonic() + self.interval
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run())
+        if self.debug:
+            # Стек снимается из другого потока, пока цикл событий еще заблокирован
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join)
+
+    async def __aenter__(self) -> "LoopMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        # Завершающий замер: блокировка в самом конце проверяемого кода тоже учитывается
+        await asyncio.sleep(0)
+        self._sample(time.monotonic())
+        await self.stop()
+
+    def stats(self) -> dict:
+        return {
+            "samples": self.samples,
+            "max_lag": self.max_lag,
+            "p50_lag": self._percentile(50),
+            "p99_lag": self._percentile(99),
+            "blocks": len(self.blocks),
+            "buckets": {
+                str(bound): count for bound, count in zip(LAG_BUCKETS, self.counts, strict=True)
+            },
+        }
+
+    async def report_periodically(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            stats = self.stats()
+            logger.info(
+                f"Задержка цикла событий: p50 {stats['p50_lag']:.3f}с, "
+                f"p99 {stats['p99_lag']:.3f}с, максимум {stats['max_lag']:.3f}с, "
+                f"блокировок {stats['blocks']}"
+            )
+
+    async def _run(self) -> None:
+        # Задержка - насколько позже срока просыпается sleep
+        while True:
+            await asyncio.sleep(max(self._expected_wake - time.monotonic(), 0.0))
+            self._sample(time.monotonic())
+
+    def _sample(self, now: float) -> None:
+        lag = max(now - self._expected_wake, 0.0)
+        self._expected_wake = now + self.interval
+        self.samples += 1
+        self.max_lag = max(self.max_lag, lag)
+        self.counts[bisect.bisect_left(LAG_BUCKETS, lag)] += 1
+        self._recent.append(lag)
+
+        stack, self._stack = self._stack, None
+        if lag < self.block_threshold:
+            return
+        self.blocks.append({"lag": lag, "stack": stack})
+        self._log_block(lag, stack, now)
+
+    def _log_block(self, lag: float, stack: str | None, now: float) -> None:
+        # Частая блокировка не должна сама забивать лог
+        if now - self._last_log < self.log_interval:
+            self._suppressed += 1
+            return
+        suppressed = f" (еще {self._suppressed} не показано)" if self._suppressed else ""
+        self._last_log = now
+        self._suppressed = 0
+        message = f"Цикл событий заблокирован на {lag:.3f}с{suppressed}"
+        logger.warning(f"{message}:\n{stack}" if stack else message)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.block_threshold / 2):
+            overdue = time.monotonic() - self._expected_wake
+            if overdue < self.block_threshold or self._stack is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._stack = "".join(traceback.format_stack(frame))
+
+    def _percentile(self, percentile: float) -> float | None:
+        # Оценка по гистограмме: верхняя граница корзины, в которую попал перцентиль
+        if not self.samples:
+            return None
+        rank = self.samples * percentile / 100
+        seen = 0
+        for bound, count in zip(LAG_BUCKETS, self.counts, strict=True):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_lag)
+        return self.max_lag
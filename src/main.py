@@ -1,16 +1,23 @@
 import asyncio
 import logging
 
+from .backup_manager import BackupManager
 from .bot import TelegramBot
+from .components import build_describer, build_embedding_client, build_memory, build_outbox
 from .config import Config
 from .database import DatabaseManager
 from .llm_client import LLMClient
+from .llm_hedging import HedgePolicy
+from .llm_jobs import LLMJobQueue
+from .llm_scheduler import LLMScheduler
+from .loop_monitor import LoopMonitor, setup_logging
+from .media_cache import MediaCache
+from .message_archive import MessageArchive
+from .rate_limiter import RateLimiter
+from .retention_job import RetentionJob
+from .semantic_cache import SemanticCache
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(), logging.FileHandler("bot.log")],
-)
+setup_logging("bot.log")
 
 logger = logging.getLogger(__name__)
 
@@ -20,14 +27,122 @@ async def main():
 
     db = DatabaseManager(config.database_path)
     await db.connect()
+    background_tasks: list[asyncio.Task] = []
+    loop_monitor: LoopMonitor | None = None
 
     try:
+        if config.loop_monitor_enabled:
+            # Диагностика: задержка цикла событий и стеки блокирующих вызовов
+            loop_monitor = LoopMonitor(
+                block_threshold=config.loop_block_threshold, debug=config.loop_monitor_debug
+            )
+            loop_monitor.start()
+            background_tasks.append(
+                asyncio.create_task(
+                    loop_monitor.report_periodically(config.loop_monitor_report_interval)
+                )
+            )
+        archive = MessageArchive(db, config.archive_dir) if config.archive_after_days > 0 else None
+        if archive:
+            background_tasks.append(
+                asyncio.create_task(
+                    archive.run_periodically(
+                        config.archive_after_days, config.archive_interval_hours * 3600
+                    )
+                )
+            )
+        if config.retention_after_days > 0:
+            retention = RetentionJob(db, archive)
+            background_tasks.append(
+                asyncio.create_task(
+                    retention.run_periodically(
+                        config.retention_after_days, config.retention_interval_hours * 3600
+                    )
+                )
+            )
+        if config.backup_interval_hours > 0:
+            backup = BackupManager(
+                config.database_path,
+                config.backup_dir,
+                keep=config.backup_keep,
+                compress=config.backup_compress,
+            )
+            background_tasks.append(
+                asyncio.create_task(backup.run_periodically(config.backup_interval_hours * 3600))
+            )
+
         llm_client = LLMClient(
             base_url=config.llm_base_url,
             model=config.llm_model,
             system_prompt_file=config.system_prompt_file,
+            backends=config.llm_backends,
+            hedge_policy=HedgePolicy(
+                percentile=config.llm_hedge_percentile,
+                min_delay=config.llm_hedge_min_delay,
+                budget=config.llm_hedge_budget,
+            )
+            if config.llm_hedge_enabled
+            else None,
+            attempt_timeout=config.llm_attempt_timeout,
+            request_deadline=config.llm_request_deadline,
+            routes=config.llm_routes,
+        )
+        if config.llm_health_check_interval > 0:
+            background_tasks.append(
+                asyncio.create_task(
+                    llm_client.pool.run_health_checks(config.llm_health_check_interval)
+                )
+            )
+        embedding_client = build_embedding_client(config)
+        scheduler = LLMScheduler(
+            llm_client,
+            concurrency_per_backend=config.llm_concurrency_per_backend,
+            quantum=config.llm_scheduler_quantum,
+            cache=SemanticCache(
+                embedding_client,
+                config.embedding_model,
+                threshold=config.semantic_cache_threshold,
+                max_entries=config.semantic_cache_max_entries,
+                ttl_seconds=config.semantic_cache_ttl_seconds,
+            )
+            if embedding_client and config.semantic_cache_enabled
+            else None,
+        )
+        job_queue = (
+            LLMJobQueue(db, config.llm_job_lease_seconds, config.llm_job_max_attempts)
+            if config.llm_job_queue_enabled
+            else None
+        )
+        memory = build_memory(config, db, embedding_client)
+        rate_limiter = None
+        if config.rate_limit_enabled:
+            rate_limiter = RateLimiter(
+                "bot",
+                messages_per_minute=config.rate_limit_messages_per_minute,
+                tokens_per_hour=config.rate_limit_tokens_per_hour,
+                images_per_hour=config.rate_limit_images_per_hour,
+                db=db if config.rate_limit_persist else None,
+            )
+            await rate_limiter.load()
+            background_tasks.append(
+                asyncio.create_task(rate_limiter.run_periodically(config.rate_limit_flush_interval))
+            )
+        bot = TelegramBot(
+            config.telegram_bot_token,
+            llm_client,
+            config.system_prompt_file,
+            db,
+            scheduler,
+            job_queue,
+            memory,
+            build_describer(config, db, scheduler),
+            MediaCache(config.media_cache_dir, config.media_cache_max_mb * 1024 * 1024)
+            if config.media_cache_max_mb > 0
+            else None,
+            config.media_group_window,
+            build_outbox(config),
+            rate_limiter,
         )
-        bot = TelegramBot(config.telegram_bot_token, llm_client, config.system_prompt_file, db)
 
         logger.info("Бот запущен")
         try:
@@ -38,6 +153,10 @@ async def main():
             logger.error(f"Критическая ошибка: {e}")
             raise
     finally:
+        for task in background_tasks:
+            task.cancel()
+        if loop_monitor:
+            await loop_monitor.stop()
         await db.close()
 
 
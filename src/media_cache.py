@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import os
+import re
+from collections import OrderedDict
+
+from aiogram import Bot
+from aiogram.types import PhotoSize
+
+logger = logging.getLogger(__name__)
+
+SAFE_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class MediaCache:
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # file_unique_id -> размер файла, порядок - от давно использованных к недавним
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        # Одновременные загрузки одного файла (альбом, пересылка) идут одним запросом
+        self._pending: dict[str, asyncio.Task] = {}
+        self._load()
+
+    async def download(self, bot: Bot, photo: PhotoSize) -> bytes:
+        # file_id у одного файла разный для разных ботов и пользователей,
+        # file_unique_id - постоянный
+        key = photo.file_unique_id
+        if not isinstance(key, str) or not SAFE_ID.match(key):
+            return await self._fetch(bot, photo.file_id)
+
+        if key in self._entries:
+            try:
+                data = await asyncio.to_thread(self._read, key)
+            except OSError as e:
+                logger.warning(f"Файл кэша медиа {key} недоступен: {e}")
+                self._forget(key)
+            else:
+                self.hits += 1
+                # Пока файл читался, запись могла быть вытеснена другой загрузкой
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                return data
+
+        task = self._pending.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._fetch_and_store(bot, key, photo.file_id))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+        }
+
+    async def _fetch_and_store(self, bot: Bot, key: str, file_id: str) -> bytes:
+        data = await self._fetch(bot, file_id)
+        if len(data) > self.max_bytes:
+            return data
+        try:
+            await asyncio.to_thread(self._write, key, data)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить файл {key} в кэш медиа: {e}")
+            return data
+
+        self._forget(key)
+        self._entries[key] = len(data)
+        self._size += len(data)
+        await asyncio.to_thread(self._remove, self._evict())
+        return data
+
+    async def _fetch(self, bot: Bot, file_id: str) -> bytes:
+        file = await bot.get_file(file_id)
+        downloaded = await bot.download_file(file.file_path)
+        return downloaded.read()
+
+    def _evict(self) -> list[str]:
+        # Записи убираются сразу, файлы удаляются отдельно в потоке
+        evicted = []
+        while self._size > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._forget(key)
+            evicted.append(key)
+        return evicted
+
+    def _forget(self, key: str) -> None:
+        self._size -= self._entries.pop(key, 0)
+
+    def _remove(self, keys: list[str]) -> None:
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError as e:
+                logger.warning(f"Не удалось удалить файл {key} из кэша медиа: {e}")
+
+    def _load(self) -> None:
+        # После перезапуска кэш восстанавливается с диска, порядок - по времени доступа
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and SAFE_ID.match(entry.name):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+            elif entry.name.endswith(".tmp"):
+                os.remove(entry.path)
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._size += size
+        self._remove(self._evict())
+        if self._entries:
+            logger.info(f"Кэш медиа: {len(self._entries)} файлов, {self._size} байт")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _read(self, key: str) -> bytes:
+        path = self._path(key)
+        with open(path, "rb") as f:
+            data = f.read()
+        # Время изменения служит временем доступа для порядка LRU после перезапуска
+        os.utime(path)
+        return data
+
+    def _write(self, key: str, data: bytes) -> None:
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
@@ -0,0 +1,36 @@
+import asyncio
+import logging
+import time
+
+from aiogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+
+class MediaGroupCollector:
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self._groups: dict[tuple[int, str], list[Message]] = {}
+        self._updated: dict[tuple[int, str], float] = {}
+
+    async def collect(self, message: Message) -> list[Message] | None:
+        # Альбом приходит отдельными апдейтами с общим media_group_id. Первый апдейт
+        # ждет, пока новые части не перестанут приходить, и получает весь альбом,
+        # остальные возвращают None
+        key = (message.chat.id, message.media_group_id)
+        group = self._groups.get(key)
+        if group is not None:
+            group.append(message)
+            self._updated[key] = time.monotonic()
+            return None
+
+        group = self._groups[key] = [message]
+        self._updated[key] = time.monotonic()
+        try:
+            while (remaining := self._updated[key] + self.window - time.monotonic()) > 0:
+                await asyncio.sleep(remaining)
+        finally:
+            del self._groups[key]
+            del self._updated[key]
+        logger.info(f"Альбом {message.media_group_id}: {len(group)} фото")
+        return sorted(group, key=lambda part: part.message_id)
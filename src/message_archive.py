@@ -0,0 +1,152 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = ("id", "user_id", "role", "content", "length", "created_at", "deleted_at")
+
+
+class MessageArchive:
+    def __init__(self, db: DatabaseManager, archive_dir: str, batch_size: int = 500):
+        self.db = db
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self._daily_cache: dict[tuple[str, float], dict[str, dict]] = {}
+
+    async def archive(self, older_than_days: int) -> int:
+        # Граница выровнена по началу суток: каждый день целиком либо в БД, либо в архиве
+        cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).date().isoformat()
+        return await self._move("created_at < ? OR deleted_at IS NOT NULL", (cutoff,))
+
+    async def archive_deleted(self, deleted_before: str) -> int:
+        return await self._move("deleted_at IS NOT NULL AND deleted_at < ?", (deleted_before,))
+
+    async def run_periodically(self, older_than_days: int, interval_seconds: float) -> None:
+        while True:
+            try:
+                await self.archive(older_than_days)
+            except Exception as e:
+                logger.error(f"Ошибка архивации сообщений: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    async def _move(self, condition: str, params: tuple) -> int:
+        columns = ", ".join(ARCHIVE_COLUMNS)
+        archived = 0
+
+        while True:
+            rows = await self.db.fetchall(
+                f"SELECT {columns} FROM messages WHERE {condition} ORDER BY id LIMIT ?",
+                (*params, self.batch_size),
+            )
+            if not rows:
+                break
+
+            await asyncio.to_thread(self._write_batch, rows)
+
+            ids = [row["id"] for row in rows]
+            placeholders = ", ".join("?" for _ in ids)
+            await self.db.execute(f"DELETE FROM messages WHERE id IN ({placeholders})", tuple(ids))
+            archived += len(rows)
+
+        if archived:
+            logger.info(f"Перенесено в архив сообщений: {archived}")
+        return archived
+
+    def read_messages(
+        self, start_date: str | None = None, end_date: str | None = None
+    ) -> list[dict]:
+        result = []
+        for path in self._partition_files(start_date, end_date):
+            columns = self._read_file(path)
+            count = len(columns["id"])
+            result.extend(
+                {name: columns[name][i] for name in ARCHIVE_COLUMNS} for i in range(count)
+            )
+        return sorted(result, key=lambda row: row["id"])
+
+    def daily_stats(
+        self, start_date: str | None = None, end_date: str | None = None
+    ) -> dict[str, dict]:
+        result: dict[str, dict] = {}
+        for path in self._partition_files(start_date, end_date):
+            for date, day in self._file_daily_stats(path).items():
+                total = result.setdefault(date, {"messages": 0, "length_sum": 0, "user_ids": set()})
+                total["messages"] += day["messages"]
+                total["length_sum"] += day["length_sum"]
+                total["user_ids"] |= day["user_ids"]
+        return result
+
+    def _write_batch(self, rows: list[dict]) -> None:
+        partitions: dict[str, list[dict]] = {}
+        for row in rows:
+            partitions.setdefault(row["created_at"][:10], []).append(row)
+
+        for date, partition_rows in partitions.items():
+            partition_dir = os.path.join(self.archive_dir, f"date={date}")
+            os.makedirs(partition_dir, exist_ok=True)
+            first_id = partition_rows[0]["id"]
+            last_id = partition_rows[-1]["id"]
+            path = os.path.join(partition_dir, f"part-{first_id:012d}-{last_id:012d}.json.gz")
+
+            columns = {name: [row[name] for row in partition_rows] for name in ARCHIVE_COLUMNS}
+            tmp_path = f"{path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(columns, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, path)
+
+    def _partition_files(self, start_date: str | None, end_date: str | None) -> list[str]:
+        if not os.path.isdir(self.archive_dir):
+            return []
+
+        files = []
+        for name in sorted(os.listdir(self.archive_dir)):
+            if not name.startswith("date="):
+                continue
+            date = name[len("date=") :]
+            if start_date and date < start_date[:10]:
+                continue
+            if end_date and date > end_date[:10]:
+                continue
+            partition_dir = os.path.join(self.archive_dir, name)
+            files.extend(
+                os.path.join(partition_dir, file_name)
+                for file_name in sorted(os.listdir(partition_dir))
+                if file_name.endswith(".json.gz")
+            )
+        return files
+
+    def _read_file(self, path: str) -> dict[str, list]:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _file_daily_stats(self, path: str) -> dict[str, dict]:
+        key = (path, os.path.getmtime(path))
+        if key in self._daily_cache:
+            return self._daily_cache[key]
+
+        columns = self._read_file(path)
+        result: dict[str, dict] = {}
+        for created_at, deleted_at, length, user_id in zip(
+            columns["created_at"],
+            columns["deleted_at"],
+            columns["length"],
+            columns["user_id"],
+            strict=True,
+        ):
+            if deleted_at is not None:
+                continue
+            day = result.setdefault(
+                created_at[:10], {"messages": 0, "length_sum": 0, "user_ids": set()}
+            )
+            day["messages"] += 1
+            day["length_sum"] += length
+            day["user_ids"].add(user_id)
+
+        self._daily_cache[key] = result
+        return result
@@ -0,0 +1,92 @@
+import logging
+import math
+import threading
+from collections import deque
+from collections.abc import Sequence
+
+from .config import ModelRouteSettings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTE = "default"
+LATENCY_WINDOW = 500
+
+
+class ModelRouter:
+    def __init__(self, routes: Sequence[ModelRouteSettings], default_model: str | None):
+        self.routes = list(routes)
+        self.default_model = default_model
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        for route in self.routes:
+            self._init_stats(route.name, route.model)
+        self._init_stats(DEFAULT_ROUTE, default_model)
+
+    def route(self, messages: list[dict], mode: str = "normal") -> tuple[str, str | None]:
+        # Признаки последней реплики пользователя: дешево считаются без обращения к модели
+        last_user = next((m for m in reversed(messages) if m["role"] == "user"), None)
+        content = last_user["content"] if last_user else ""
+        if isinstance(content, str):
+            chars, has_image = len(content), False
+        else:
+            chars = sum(len(part.get("text", "")) for part in content if part["type"] == "text")
+            has_image = any(part["type"] == "image_url" for part in content)
+        history = len(messages)
+
+        name, model = DEFAULT_ROUTE, self.default_model
+        for route in self.routes:
+            if (
+                (route.modes is None or mode in route.modes)
+                and (route.max_chars is None or chars <= route.max_chars)
+                and (route.max_history is None or history <= route.max_history)
+                and (route.has_image is None or has_image == route.has_image)
+            ):
+                name, model = route.name, route.model
+                break
+
+        with self._lock:
+            self._stats[name]["requests"] += 1
+        logger.info(
+            f"Маршрут {name} -> {model or 'любая модель'} "
+            f"(символов: {chars}, фото: {has_image}, история: {history}, режим: {mode})"
+        )
+        return name, model
+
+    def record(self, name: str, latency: float | None) -> None:
+        with self._lock:
+            if latency is None:
+                self._stats[name]["errors"] += 1
+            else:
+                self._stats[name]["latencies"].append(latency)
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            snapshot = [
+                (name, {**stats, "latencies": list(stats["latencies"])})
+                for name, stats in self._stats.items()
+            ]
+        result = []
+        for name, stats in snapshot:
+            latencies = sorted(stats.pop("latencies"))
+            result.append(
+                {
+                    "name": name,
+                    **stats,
+                    "p50_latency": self._percentile(latencies, 50),
+                    "p95_latency": self._percentile(latencies, 95),
+                }
+            )
+        return result
+
+    def _init_stats(self, name: str, model: str | None) -> None:
+        self._stats[name] = {
+            "model": model,
+            "requests": 0,
+            "errors": 0,
+            "latencies": deque(maxlen=LATENCY_WINDOW),
+        }
+
+    def _percentile(self, values: list[float], percentile: float) -> float | None:
+        if not values:
+            return None
+        return values[max(math.ceil(len(values) * percentile / 100) - 1, 0)]
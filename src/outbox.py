@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import re
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LIMIT = 4096
+MAX_IDLE_CHATS = 1000
+# Границы разбиения по убыванию предпочтения: абзац, строка, предложение, слово
+SPLIT_PATTERNS = (
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"[.!?…]\s"),
+    re.compile(r"\s"),
+)
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    chunks = []
+    while len(text) > limit:
+        window = text[: limit + 1]
+        cut = limit
+        for pattern in SPLIT_PATTERNS:
+            ends = [match.end() for match in pattern.finditer(window) if match.end() <= limit]
+            # Граница в первой половине дала бы слишком мелкий кусок
+            if ends and ends[-1] > limit // 2:
+                cut = ends[-1]
+                break
+        chunk = text[:cut].rstrip()
+        if chunk:
+            chunks.append(chunk)
+        text = text[cut:].lstrip()
+    if text.strip():
+        chunks.append(text)
+    return chunks
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        # Резервирует токен и возвращает, сколько ждать до его появления
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return max(-self.tokens / self.rate, 0.0)
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class ChatState:
+    def __init__(self, rate: float, burst: float):
+        self.bucket = TokenBucket(rate, burst)
+        # Куски одного ответа и ответы одному чату уходят по порядку
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class Outbox:
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        workers: int = 8,
+        max_attempts: int = 3,
+        retry_delay: float = 1.0,
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._chats: dict[Hashable, ChatState] = {}
+        # Не больше workers запросов к Telegram одновременно
+        self._workers = asyncio.Semaphore(workers)
+        self._paused_until = 0.0
+
+    async def send(
+        self, chat_id: Hashable, text: str, send: Callable[[str], Awaitable[Any]]
+    ) -> None:
+        # send - отправка одного сообщения в чат: message.answer или bot.send_message
+        # с подставленным chat_id. Ответ LLM к этому моменту уже сохранен в истории,
+        # поэтому повтор отправки не требует новой генерации
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = ChatState(self.chat_rate, self.chat_burst)
+        chat.users += 1
+        try:
+            async with chat.lock:
+                for chunk in split_message(text):
+                    await self._send_chunk(chat, chat_id, chunk, send)
+        finally:
+            chat.users -= 1
+            self._prune()
+
+    async def _send_chunk(
+        self, chat: ChatState, chat_id: Hashable, chunk: str, send: Callable[[str], Awaitable[Any]]
+    ) -> None:
+        attempt = 0
+        while True:
+            await asyncio.sleep(chat.bucket.delay(time.monotonic()))
+            async with self._workers:
+                # Flood control Telegram действует на весь бот: ждут все отправки
+                now = time.monotonic()
+                await asyncio.sleep(
+                    max(self._paused_until - now, 0.0) + self.global_bucket.delay(now)
+                )
+                try:
+                    await send(chunk)
+                    return
+                except TelegramRetryAfter as e:
+                    logger.warning(f"Telegram ограничил отправку в чат {chat_id}: {e.retry_after}с")
+                    self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                    continue
+                except (TelegramNetworkError, TelegramServerError) as e:
+                    attempt += 1
+                    if attempt >= self.max_attempts:
+                        raise
+                    logger.warning(f"Ошибка отправки в чат {chat_id} (попытка {attempt}): {e}")
+            await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    def _prune(self) -> None:
+        if len(self._chats) <= MAX_IDLE_CHATS:
+            return
+        now = time.monotonic()
+        for chat_id in [
+            chat_id
+            for chat_id, chat in self._chats.items()
+            if not chat.users and chat.bucket.is_full(now)
+        ]:
+            del self._chats[chat_id]
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import math
+import time
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+MESSAGES = "messages"
+TOKENS = "tokens"
+IMAGES = "images"
+
+# Оценка токенов без токенизатора: в среднем около 4 символов на токен
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(chars: int) -> int:
+    return max(chars // CHARS_PER_TOKEN, 1)
+
+
+def format_wait(seconds: float) -> str:
+    seconds = max(math.ceil(seconds), 1)
+    if seconds < 60:
+        return f"{seconds} с"
+    return f"{math.ceil(seconds / 60)} мин"
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        scope: str,
+        messages_per_minute: float = 10.0,
+        tokens_per_hour: float = 50000.0,
+        images_per_hour: float = 20.0,
+        db: DatabaseManager | None = None,
+    ):
+        self.scope = scope
+        self.db = db
+        # Бюджет -> (емкость ведра, пополнение в секунду); нулевой бюджет не ограничен
+        self.budgets = {
+            MESSAGES: (messages_per_minute, messages_per_minute / 60),
+            TOKENS: (tokens_per_hour, tokens_per_hour / 3600),
+            IMAGES: (images_per_hour, images_per_hour / 3600),
+        }
+        self.throttled = 0
+        # Ключ -> бюджет -> (уровень, время обновления). Время настенное:
+        # состояние переживает перезапуск через БД
+        self._buckets: dict[str, dict[str, tuple[float, float]]] = {}
+
+    def check(self, key: str, messages: int = 1, tokens: int = 0, images: int = 0) -> float:
+        # Списывает все бюджеты сразу или ни одного; возвращает, сколько ждать (0 - разрешено)
+        now = time.time()
+        buckets = self._buckets.setdefault(key, {})
+        levels = {}
+        wait = 0.0
+        for budget, amount in ((MESSAGES, messages), (TOKENS, tokens), (IMAGES, images)):
+            capacity, rate = self.budgets[budget]
+            if not amount or capacity <= 0:
+                continue
+            level = self._level(buckets, budget, now)
+            # Запрос больше всего бюджета проходит при полном ведре, иначе не прошел бы никогда
+            needed = min(amount, capacity)
+            if level < needed:
+                wait = max(wait, (needed - level) / rate)
+            levels[budget] = level - amount
+
+        if wait:
+            self.throttled += 1
+            logger.info(f"Превышен лимит запросов {self.scope}:{key}, ожидание {wait:.0f}с")
+            return wait
+        for budget, level in levels.items():
+            buckets[budget] = (level, now)
+        return 0.0
+
+    def charge(self, key: str, tokens: int) -> None:
+        # Токены ответа известны только после генерации: уровень может уйти в минус,
+        # и следующий запрос подождет, пока долг не погасится
+        capacity, _ = self.budgets[TOKENS]
+        if capacity <= 0:
+            return
+        now = time.time()
+        buckets = self._buckets.setdefault(key, {})
+        buckets[TOKENS] = (self._level(buckets, TOKENS, now) - tokens, now)
+
+    async def load(self) -> None:
+        if not self.db:
+            return
+        rows = await self.db.fetchall(
+            "SELECT key, budget, level, updated_at FROM rate_limits WHERE scope = ?",
+            (self.scope,),
+        )
+        for row in rows:
+            if row["budget"] in self.budgets:
+                self._buckets.setdefault(row["key"], {})[row["budget"]] = (
+                    row["level"],
+                    row["updated_at"],
+                )
+        logger.info(f"Загружено состояние лимитов {self.scope}: {len(self._buckets)} ключей")
+
+    async def flush(self) -> None:
+        # Полные ведра не отличаются от отсутствующих: они удаляются из памяти и БД
+        now = time.time()
+        for key in list(self._buckets):
+            buckets = self._buckets[key]
+            for budget in list(buckets):
+                if self._level(buckets, budget, now) >= self.budgets[budget][0]:
+                    del buckets[budget]
+            if not buckets:
+                del self._buckets[key]
+
+        if not self.db:
+            return
+        await self.db.execute("DELETE FROM rate_limits WHERE scope = ?", (self.scope,))
+        await self.db.executemany(
+            """
+            INSERT INTO rate_limits (scope, key, budget, level, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (self.scope, key, budget, level, updated_at)
+                for key, buckets in self._buckets.items()
+                for budget, (level, updated_at) in buckets.items()
+            ],
+        )
+
+    async def run_periodically(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка сохранения лимитов {self.scope}: {e}")
+
+    def _level(self, buckets: dict[str, tuple[float, float]], budget: str, now: float) -> float:
+        capacity, rate = self.budgets[budget]
+        if budget not in buckets:
+            return capacity
+        level, updated_at = buckets[budget]
+        return min(capacity, level + max(now - updated_at, 0.0) * rate)
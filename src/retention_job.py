@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from .database import DatabaseManager
+from .message_archive import MessageArchive
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class RetentionJob:
+    def __init__(
+        self,
+        db: DatabaseManager,
+        archive: MessageArchive | None = None,
+        batch_size: int = 200,
+        vacuum_step_pages: int = 256,
+        fts_merge_pages: int = 500,
+    ):
+        self.db = db
+        self.archive = archive
+        self.batch_size = batch_size
+        self.vacuum_step_pages = vacuum_step_pages
+        self.fts_merge_pages = fts_merge_pages
+
+    async def run(self, older_than_days: int) -> dict[str, int]:
+        size_before = await self._database_size()
+        deleted_before = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat()
+
+        if self.archive:
+            removed = await self.archive.archive_deleted(deleted_before)
+        else:
+            removed = await self._delete_in_batches(
+                "messages", "deleted_at IS NOT NULL AND deleted_at < ?", deleted_before
+            )
+        # Журнал изменений читается API почти сразу; старые записи больше не нужны
+        if await self._table_exists("change_feed"):
+            await self._delete_in_batches("change_feed", "changed_at < ?", deleted_before)
+
+        await self._merge_fts()
+        await self._incremental_vacuum()
+        await self.db.execute("ANALYZE")
+
+        size_after = await self._database_size()
+        report = {
+            "removed_messages": removed,
+            "size_before": size_before,
+            "size_after": size_after,
+            "reclaimed_bytes": max(size_before - size_after, 0),
+        }
+        logger.info(
+            f"Очистка БД: удалено сообщений {removed}, освобождено {report['reclaimed_bytes']} байт"
+        )
+        return report
+
+    async def run_periodically(self, older_than_days: int, interval_seconds: float) -> None:
+        while True:
+            try:
+                await self.run(older_than_days)
+            except Exception as e:
+                logger.error(f"Ошибка очистки БД: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    async def _delete_in_batches(self, table: str, condition: str, before: str) -> int:
+        removed = 0
+        while True:
+            rows = await self.db.fetchall(
+                f"SELECT id FROM {table} WHERE {condition} ORDER BY id LIMIT ?",
+                (before, self.batch_size),
+            )
+            if not rows:
+                return removed
+
+            ids = tuple(row["id"] for row in rows)
+            placeholders = ", ".join("?" for _ in ids)
+            await self.db.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+            removed += len(ids)
+            # Короткие транзакции и уступка event loop, чтобы не блокировать запись бота
+            await asyncio.sleep(0)
+
+    async def _merge_fts(self) -> None:
+        if not await self._table_exists("messages_fts") or not self.db.connection:
+            return
+
+        # 'merge' выполняется порциями; менее 2 изменений означает, что слияние завершено
+        while True:
+            changes_before = self.db.connection.total_changes
+            await self.db.execute(
+                "INSERT INTO messages_fts(messages_fts, rank) VALUES('merge', ?)",
+                (self.fts_merge_pages,),
+            )
+            if self.db.connection.total_changes - changes_before < 2:
+                return
+            await asyncio.sleep(0)
+
+    async def _incremental_vacuum(self) -> None:
+        auto_vacuum = await self.db.fetchone("PRAGMA auto_vacuum")
+        if not auto_vacuum or auto_vacuum["auto_vacuum"] != AUTO_VACUUM_INCREMENTAL:
+            logger.warning("auto_vacuum не INCREMENTAL, пропуск incremental_vacuum")
+            return
+
+        previous_free_pages = None
+        while True:
+            freelist = await self.db.fetchone("PRAGMA freelist_count")
+            free_pages = freelist["freelist_count"] if freelist else 0
+            if not free_pages or free_pages == previous_free_pages:
+                return
+            previous_free_pages = free_pages
+            await self.db.fetchall(f"PRAGMA incremental_vacuum({self.vacuum_step_pages})")
+            await asyncio.sleep(0)
+
+    async def _table_exists(self, name: str) -> bool:
+        table = await self.db.fetchone(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        )
+        return table is not None
+
+    async def _database_size(self) -> int:
+        page_count = await self.db.fetchone("PRAGMA page_count")
+        page_size = await self.db.fetchone("PRAGMA page_size")
+        if not page_count or not page_size:
+            return 0
+        return int(page_count["page_count"]) * int(page_size["page_size"])
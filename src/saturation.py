@@ -0,0 +1,68 @@
+import logging
+import time
+
+from .circuit_breaker import OPEN
+from .database import DatabaseManager
+from .llm_client import LLMClient
+from .llm_scheduler import LLMScheduler
+from .loop_monitor import LoopMonitor
+
+logger = logging.getLogger(__name__)
+
+
+class SaturationMonitor:
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        scheduler: LLMScheduler,
+        db: DatabaseManager,
+        loop_monitor: LoopMonitor,
+        max_llm_queue: int = 50,
+        max_db_pending: int = 100,
+        max_loop_lag: float = 0.5,
+    ):
+        self.llm_client = llm_client
+        self.scheduler = scheduler
+        self.db = db
+        self.loop_monitor = loop_monitor
+        self.max_llm_queue = max_llm_queue
+        self.max_db_pending = max_db_pending
+        self.max_loop_lag = max_loop_lag
+        self.shed = 0
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        backends = self.llm_client.pool.backends
+        available = sum(1 for backend in backends if backend.breaker.state(now) != OPEN)
+        loop_lag = self.loop_monitor.recent_lag
+        llm_queued = sum(priority.queued for priority in self.scheduler.classes.values())
+
+        reasons = []
+        if llm_queued > self.max_llm_queue:
+            reasons.append(f"очередь LLM {llm_queued} > {self.max_llm_queue}")
+        if self.db.pending > self.max_db_pending:
+            reasons.append(f"запросов к БД {self.db.pending} > {self.max_db_pending}")
+        if loop_lag > self.max_loop_lag:
+            reasons.append(f"задержка цикла событий {loop_lag:.2f}с > {self.max_loop_lag}с")
+        if not available:
+            reasons.append("все LLM бэкенды исключены")
+
+        return {
+            "status": "overloaded" if reasons else "ready",
+            "llm_inflight": self.scheduler.running,
+            "llm_queued": llm_queued,
+            "db_pending": self.db.pending,
+            "loop_lag": loop_lag,
+            "backends_available": available,
+            "reasons": reasons,
+        }
+
+    def should_shed(self) -> bool:
+        reasons = self.snapshot()["reasons"]
+        if not reasons:
+            return False
+        self.shed += 1
+        # Под перегрузкой лог не должен добавлять нагрузки: пишется каждый сотый отказ
+        if self.shed % 100 == 1:
+            logger.warning(f"Перегрузка, запросы отклоняются ({self.shed}): {', '.join(reasons)}")
+        return True
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+
+import numpy as np
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        client: OpenAI,
+        model: str,
+        threshold: float = 0.92,
+        max_entries: int = 1000,
+        ttl_seconds: float = 86400.0,
+    ):
+        self.client = client
+        self.model = model
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        # Слоты фиксированного размера: поиск - одно матричное умножение по всем записям
+        self._vectors: np.ndarray | None = None
+        self._scope_ids = np.full(max_entries, -1, dtype=np.int64)
+        self._created = np.zeros(max_entries, dtype=np.float64)
+        self._used = np.zeros(max_entries, dtype=np.float64)
+        self._answers: list[str | None] = [None] * max_entries
+        self._scopes: dict[str, int] = {}
+
+    async def lookup(self, scope: str, text: str) -> tuple[str | None, np.ndarray]:
+        vector = await self._embed(text)
+        now = time.monotonic()
+        scope_id = self._scopes.get(scope)
+        if self._vectors is None or scope_id is None:
+            self.misses += 1
+            return None, vector
+
+        scores = self._vectors @ vector
+        valid = (self._scope_ids == scope_id) & (now - self._created < self.ttl_seconds)
+        scores[~valid] = -1.0
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None, vector
+
+        self.hits += 1
+        self._used[best] = now
+        logger.info(f"Ответ из семантического кэша (близость {scores[best]:.3f})")
+        return self._answers[best], vector
+
+    def store(self, scope: str, vector: np.ndarray, answer: str) -> None:
+        now = time.monotonic()
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+        scope_id = self._scopes.setdefault(scope, len(self._scopes))
+
+        # Свободный или устаревший слот, иначе вытесняется давно не использованный
+        free = (self._scope_ids == -1) | (now - self._created >= self.ttl_seconds)
+        slot = int(np.argmax(free)) if free.any() else int(np.argmin(self._used))
+        self._vectors[slot] = vector
+        self._scope_ids[slot] = scope_id
+        self._created[slot] = now
+        self._used[slot] = now
+        self._answers[slot] = answer
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        live = (self._scope_ids != -1) & (time.monotonic() - self._created < self.ttl_seconds)
+        return {
+            "entries": int(live.sum()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+        }
+
+    async def _embed(self, text: str) -> np.ndarray:
+        response = await asyncio.to_thread(
+            self.client.embeddings.create, model=self.model, input=[text]
+        )
+        vector = np.array(response.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
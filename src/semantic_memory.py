@@ -0,0 +1,120 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+import numpy as np
+from openai import OpenAI
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PLACEHOLDER = "[фото]"
+
+
+def message_images(content_data: dict) -> list[str]:
+    # Одно фото хранится в "image", альбом - списком в "images"
+    if "images" in content_data:
+        return content_data["images"]
+    return [content_data["image"]] if "image" in content_data else []
+
+
+def message_text(content: str) -> str:
+    try:
+        content_data = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        return content
+    return content_data.get("text") or (IMAGE_PLACEHOLDER if message_images(content_data) else "")
+
+
+class SemanticMemory:
+    def __init__(
+        self,
+        db: DatabaseManager,
+        client: OpenAI,
+        model: str,
+        recent_messages: int = 6,
+        top_k: int = 4,
+        batch_size: int = 64,
+    ):
+        self.db = db
+        self.client = client
+        self.model = model
+        self.recent_messages = recent_messages
+        self.top_k = top_k
+        self.batch_size = batch_size
+
+    def needs_selection(self, rows: list[dict]) -> bool:
+        # Короткая история отправляется целиком: найденные ходы не сократили бы промпт
+        return len(rows) > self.recent_messages + 2 * self.top_k
+
+    async def select(self, user_id: int, rows: list[dict]) -> list[dict]:
+        # rows - живые сообщения пользователя (id, role, content) в хронологическом порядке.
+        # Последние сообщения идут всегда, из более старых - ходы, ближайшие по смыслу
+        # к последней реплике пользователя
+        vectors = await self._load_vectors(user_id, rows)
+        older, recent = rows[: -self.recent_messages], rows[-self.recent_messages :]
+        query_row = next((row for row in reversed(recent) if row["role"] == "user"), recent[-1])
+
+        # Векторы нормированы: косинусная близость - скалярное произведение
+        matrix = np.stack([vectors[row["id"]] for row in older]).astype(np.float32)
+        scores = matrix @ vectors[query_row["id"]].astype(np.float32)
+        hits = np.argsort(scores)[::-1][: self.top_k]
+
+        selected: set[int] = set()
+        for index in hits.tolist():
+            selected.add(index)
+            # Найденная реплика дополняется второй половиной хода
+            if older[index]["role"] == "user" and index + 1 < len(older):
+                if older[index + 1]["role"] == "assistant":
+                    selected.add(index + 1)
+            elif older[index]["role"] == "assistant" and index > 0:
+                if older[index - 1]["role"] == "user":
+                    selected.add(index - 1)
+
+        logger.info(
+            f"Память пользователя {user_id}: {len(selected)} из {len(older)} старых сообщений "
+            f"и {len(recent)} последних"
+        )
+        return [older[index] for index in sorted(selected)] + recent
+
+    async def _load_vectors(self, user_id: int, rows: list[dict]) -> dict[int, np.ndarray]:
+        stored = await self.db.fetchall(
+            "SELECT message_id, vector FROM message_embeddings WHERE user_id = ? AND model = ?",
+            (user_id, self.model),
+        )
+        vectors = {
+            row["message_id"]: np.frombuffer(row["vector"], dtype=np.float16) for row in stored
+        }
+
+        # Каждое сообщение эмбеддится один раз, при первом запросе после его появления
+        missing = [row for row in rows if row["id"] not in vectors]
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start : start + self.batch_size]
+            embedded = await self._embed([message_text(row["content"]) or " " for row in batch])
+            now = datetime.utcnow().isoformat()
+            await self.db.executemany(
+                """
+                INSERT OR REPLACE INTO message_embeddings
+                    (message_id, user_id, model, vector, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (row["id"], user_id, self.model, vector.tobytes(), now)
+                    for row, vector in zip(batch, embedded, strict=True)
+                ],
+            )
+            vectors.update((row["id"], vector) for row, vector in zip(batch, embedded, strict=True))
+        return vectors
+
+    async def _embed(self, texts: list[str]) -> list[np.ndarray]:
+        response = await asyncio.to_thread(
+            self.client.embeddings.create, model=self.model, input=texts
+        )
+        data = sorted(response.data, key=lambda item: item.index)
+        matrix = np.array([item.embedding for item in data], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # float16 вдвое компактнее float32, точности хватает для ранжирования
+        normalized = (matrix / np.where(norms == 0, 1.0, norms)).astype(np.float16)
+        return list(normalized)
@@ -1,45 +1,78 @@
 import json
+import logging
 
 from .database import DatabaseManager
+from .image_descriptions import ImageDescriber
+from .semantic_memory import SemanticMemory, message_images
+
+logger = logging.getLogger(__name__)
 
 
 class SessionManager:
-    def __init__(self, db: DatabaseManager):
+    def __init__(
+        self,
+        db: DatabaseManager,
+        memory: SemanticMemory | None = None,
+        describer: ImageDescriber | None = None,
+    ):
         self.db = db
+        self.memory = memory
+        self.describer = describer
 
     async def get_session(self, user_id: int) -> list[dict]:
         internal_user_id = await self.db.get_or_create_user(user_id)
         messages = await self.db.get_messages(internal_user_id)
+        return [self._to_llm_message(msg) for msg in messages]
 
-        result = []
-        for msg in messages:
+    async def get_context(self, user_id: int) -> list[dict]:
+        # Контекст запроса к LLM: с памятью - последние сообщения и релевантные
+        # старые ходы вместо всей истории, старые фото - текстовыми описаниями
+        internal_user_id = await self.db.get_or_create_user(user_id)
+        messages = await self.db.get_messages(internal_user_id)
+        if self.memory and self.memory.needs_selection(messages):
             try:
-                content_data = json.loads(msg["content"])
-            except (json.JSONDecodeError, KeyError):
-                content_data = {"text": msg["content"]}
-
-            if "image" in content_data:
-                content = []
-                if content_data.get("text"):
-                    content.append({"type": "text", "text": content_data["text"]})
-                content.append(
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{content_data['image']}"},
-                    }
-                )
-            else:
-                content = content_data["text"]
-
-            result.append({"role": msg["role"], "content": content})
-
-        return result
+                messages = await self.memory.select(internal_user_id, messages)
+            except Exception as e:
+                logger.warning(f"Память недоступна, отправляется вся история: {e}")
+        if self.describer:
+            messages = await self.describer.apply(internal_user_id, messages)
+        return [self._to_llm_message(msg) for msg in messages]
+
+    def _to_llm_message(self, msg: dict) -> dict:
+        try:
+            content_data = json.loads(msg["content"])
+        except (json.JSONDecodeError, KeyError):
+            content_data = {"text": msg["content"]}
+
+        images = message_images(content_data)
+        if images:
+            content = []
+            if content_data.get("text"):
+                content.append({"type": "text", "text": content_data["text"]})
+            content.extend(
+                {
+                    "type": "image_url",
+                    "image_url": {"url": f"data:image/jpeg;base64,{image}"},
+                }
+                for image in images
+            )
+        else:
+            content = content_data["text"]
+
+        return {"role": msg["role"], "content": content}
 
     async def add_message(
-        self, user_id: int, role: str, content: str, image: str | None = None
+        self,
+        user_id: int,
+        role: str,
+        content: str,
+        image: str | None = None,
+        images: list[str] | None = None,
     ) -> None:
         internal_user_id = await self.db.get_or_create_user(user_id)
-        if image:
+        if images:
+            content_json = json.dumps({"text": content, "images": images})
+        elif image:
             content_json = json.dumps({"text": content, "image": image})
         else:
             content_json = json.dumps({"text": content})
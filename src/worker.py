@@ -0,0 +1,94 @@
+import asyncio
+import logging
+
+from aiogram import Bot
+
+from .components import build_describer, build_embedding_client, build_memory, build_outbox
+from .config import Config
+from .database import DatabaseManager
+from .llm_client import LLMClient
+from .llm_hedging import HedgePolicy
+from .llm_jobs import LLMJobQueue, LLMWorker
+from .llm_scheduler import LLMScheduler
+from .loop_monitor import LoopMonitor, setup_logging
+from .session_manager import SessionManager
+
+setup_logging("worker.log")
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    config = Config()
+
+    db = DatabaseManager(config.database_path)
+    await db.connect()
+    bot = Bot(token=config.telegram_bot_token)
+    background_tasks: list[asyncio.Task] = []
+    loop_monitor: LoopMonitor | None = None
+
+    try:
+        if config.loop_monitor_enabled:
+            # Диагностика: задержка цикла событий и стеки блокирующих вызовов
+            loop_monitor = LoopMonitor(
+                block_threshold=config.loop_block_threshold, debug=config.loop_monitor_debug
+            )
+            loop_monitor.start()
+            background_tasks.append(
+                asyncio.create_task(
+                    loop_monitor.report_periodically(config.loop_monitor_report_interval)
+                )
+            )
+
+        llm_client = LLMClient(
+            base_url=config.llm_base_url,
+            model=config.llm_model,
+            system_prompt_file=config.system_prompt_file,
+            backends=config.llm_backends,
+            hedge_policy=HedgePolicy(
+                percentile=config.llm_hedge_percentile,
+                min_delay=config.llm_hedge_min_delay,
+                budget=config.llm_hedge_budget,
+            )
+            if config.llm_hedge_enabled
+            else None,
+            attempt_timeout=config.llm_attempt_timeout,
+            request_deadline=config.llm_request_deadline,
+            routes=config.llm_routes,
+        )
+        if config.llm_health_check_interval > 0:
+            background_tasks.append(
+                asyncio.create_task(
+                    llm_client.pool.run_health_checks(config.llm_health_check_interval)
+                )
+            )
+
+        queue = LLMJobQueue(db, config.llm_job_lease_seconds, config.llm_job_max_attempts)
+        memory = build_memory(config, db, build_embedding_client(config))
+        # Описания фото идут фоновым классом планировщика
+        describer = build_describer(
+            config,
+            db,
+            LLMScheduler(llm_client, concurrency_per_backend=config.llm_concurrency_per_backend),
+        )
+        worker = LLMWorker(
+            queue,
+            SessionManager(db, memory, describer),
+            llm_client,
+            bot,
+            outbox=build_outbox(config),
+        )
+
+        logger.info(f"Воркер LLM запущен, параллельных заданий: {config.llm_worker_concurrency}")
+        await worker.run(config.llm_worker_concurrency)
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        if loop_monitor:
+            await loop_monitor.stop()
+        await bot.session.close()
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
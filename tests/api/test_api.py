@@ -1,12 +1,25 @@
 """Тесты для FastAPI endpoints."""
 
+import asyncio
 import os
+import sqlite3
+from unittest.mock import MagicMock
 
 import pytest
 from fastapi.testclient import TestClient
 
-from src.api.main import app
+from src.api import main as api_main
+from src.api.main import (
+    UnicodeJSONResponse,
+    app,
+    get_analytics_collector,
+    get_stat_collector,
+    get_stats_db,
+)
+from src.api.mock_analytics_collector import MockAnalyticsCollector
 from src.api.models import DashboardStats
+from src.config import ModelRouteSettings
+from src.llm_client import LLMClient
 
 
 @pytest.fixture
@@ -37,6 +50,51 @@ class TestRootEndpoints:
         data = response.json()
         assert data["status"] == "ok"
 
+    def test_ready_endpoint(self, client):
+        """Readiness отвечает 503, пока превышен порог насыщения."""
+        saturation = MagicMock()
+        saturation.snapshot.return_value = {
+            "status": "overloaded",
+            "llm_inflight": 4,
+            "llm_queued": 80,
+            "db_pending": 0,
+            "loop_lag": 0.01,
+            "backends_available": 1,
+            "reasons": ["очередь LLM 80 > 50"],
+        }
+        app.state.saturation = saturation
+        try:
+            overloaded = client.get("/ready")
+            saturation.snapshot.return_value = {
+                **saturation.snapshot.return_value,
+                "status": "ready",
+                "llm_queued": 0,
+                "reasons": [],
+            }
+            ready = client.get("/ready")
+        finally:
+            del app.state.saturation
+
+        assert overloaded.status_code == 503
+        assert overloaded.json()["reasons"] == ["очередь LLM 80 > 50"]
+        assert ready.status_code == 200
+        assert ready.json()["status"] == "ready"
+
+    def test_chat_load_shedding(self, client):
+        """При перегрузке запрос к чату отклоняется с 503 до обработчика."""
+        saturation = MagicMock()
+        saturation.should_shed.return_value = True
+        app.state.saturation = saturation
+        app.state.load_shedding = True
+        try:
+            response = client.post("/api/chat/message", json={"message": "Привет"})
+        finally:
+            del app.state.saturation
+            app.state.load_shedding = False
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+
 
 class TestStatsEndpoint:
     """Тесты endpoint /api/stats."""
@@ -130,12 +188,73 @@ class TestStatsEndpoint:
         stats = DashboardStats(**data)
         assert stats.metrics.total_users >= 0
 
+    @pytest.mark.parametrize("days", [0, 91])
+    def test_stats_endpoint_rejects_days_out_of_range(self, client, days):
+        """Период вне 1-90 дней отклоняется до сбора статистики."""
+        response = client.get(f"/api/stats?days={days}")
+        assert response.status_code == 422
+
     def test_stats_endpoint_content_type(self, client):
         """Endpoint возвращает JSON."""
         response = client.get("/api/stats")
         assert "application/json" in response.headers["content-type"]
 
 
+class TestStatsSnapshot:
+    """Тесты переключения статистики на новый снимок."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_swap_opens_snapshot_once(self, tmp_path, monkeypatch):
+        """Одновременные запросы открывают новый снимок один раз, старый закрывается позже."""
+        snapshot_path = str(tmp_path / "analytics.db")
+        sqlite3.connect(snapshot_path).close()
+        monkeypatch.setattr(api_main, "SNAPSHOT_CLOSE_DELAY_SECONDS", 0.05)
+        monkeypatch.setattr(app.state, "snapshot_path", snapshot_path, raising=False)
+        monkeypatch.setattr(app.state, "snapshot_db", None, raising=False)
+        monkeypatch.setattr(app.state, "snapshot_mtime", 0.0, raising=False)
+        monkeypatch.setattr(app.state, "snapshot_lock", asyncio.Lock(), raising=False)
+        monkeypatch.setattr(app.state, "retired_snapshots", set(), raising=False)
+
+        old_db = await get_stats_db()
+        os.utime(snapshot_path, (0, os.path.getmtime(snapshot_path) + 10))
+        first, second = await asyncio.gather(get_stats_db(), get_stats_db())
+        try:
+            assert first is second
+            assert first is not old_db
+            # Старым снимком могут пользоваться начатые запросы
+            assert old_db.connection is not None
+            assert len(app.state.retired_snapshots) == 1
+
+            await asyncio.gather(*app.state.retired_snapshots)
+            assert old_db.connection is None
+        finally:
+            await old_db.close()
+            await first.close()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_stats_ignore_live_feed(self, tmp_path, monkeypatch):
+        """Статистика по снимку не смешивается с live-агрегатами рабочей БД."""
+        snapshot_path = str(tmp_path / "analytics.db")
+        sqlite3.connect(snapshot_path).close()
+        change_feed = MagicMock(ready=True)
+        monkeypatch.setenv("USE_MOCK_STATS", "false")
+        monkeypatch.setattr(app.state, "db", MagicMock(), raising=False)
+        monkeypatch.setattr(app.state, "archive", None, raising=False)
+        monkeypatch.setattr(app.state, "change_feed", change_feed, raising=False)
+        monkeypatch.setattr(app.state, "snapshot_path", snapshot_path, raising=False)
+        monkeypatch.setattr(app.state, "snapshot_db", None, raising=False)
+        monkeypatch.setattr(app.state, "snapshot_mtime", 0.0, raising=False)
+        monkeypatch.setattr(app.state, "snapshot_lock", asyncio.Lock(), raising=False)
+        monkeypatch.setattr(app.state, "retired_snapshots", set(), raising=False)
+
+        collector = await get_stat_collector()
+        try:
+            assert collector.db is app.state.snapshot_db
+            assert collector.change_feed is None
+        finally:
+            await app.state.snapshot_db.close()
+
+
 class TestOpenAPIDocumentation:
     """Тесты автогенерации документации."""
 
@@ -164,3 +283,171 @@ class TestOpenAPIDocumentation:
         data = response.json()
         assert "/api/stats" in data["paths"]
         assert "get" in data["paths"]["/api/stats"]
+
+
+class TestUsersEndpoint:
+    """Тесты endpoint /api/users."""
+
+    def test_users_endpoint_returns_page(self, client):
+        """Endpoint возвращает страницу пользователей и курсор."""
+        response = client.get("/api/users?limit=10")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["users"]) == 10
+        assert data["next_cursor"] is not None
+
+    def test_users_endpoint_sorted_by_activity(self, client):
+        """Пользователи отсортированы по убыванию числа сообщений."""
+        data = client.get("/api/users?limit=20").json()
+        counts = [user["message_count"] for user in data["users"]]
+        assert counts == sorted(counts, reverse=True)
+
+    def test_users_endpoint_invalid_cursor(self, client):
+        """Некорректный курсор возвращает 400."""
+        response = client.get("/api/users?cursor=broken")
+        assert response.status_code == 400
+
+    def test_users_endpoint_invalid_sort(self, client):
+        """Неизвестная сортировка отклоняется валидацией."""
+        response = client.get("/api/users?sort=unknown")
+        assert response.status_code == 422
+
+
+class TestAnalyticsEndpoints:
+    """Тесты endpoints /api/analytics/*."""
+
+    def test_retention_endpoint(self, client):
+        """Отчет об удержании содержит когорты за период."""
+        response = client.get("/api/analytics/retention?days=14")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["days"] == 14
+        assert len(data["cohorts"]) == 14
+        assert 0.0 <= data["stickiness"] <= 1.0
+
+    def test_engagement_endpoint(self, client):
+        """Отчет о вовлеченности содержит перцентили и гистограмму."""
+        response = client.get("/api/analytics/engagement")
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data["message_length"]) == {"p50", "p90", "p99"}
+        assert data["messages_per_user"][-1]["max_value"] is None
+
+    def test_analytics_days_validated(self, client):
+        """Период вне диапазона отклоняется."""
+        response = client.get("/api/analytics/retention?days=0")
+        assert response.status_code == 422
+
+
+class TestResponseSerialization:
+    """Тесты сериализации, ETag и сжатия ответов."""
+
+    @pytest.fixture
+    def seeded_client(self, client):
+        """Клиент с детерминированным Mock коллектором аналитики."""
+        app.dependency_overrides[get_analytics_collector] = lambda: MockAnalyticsCollector(seed=1)
+        yield client
+        app.dependency_overrides.clear()
+
+    def test_render_keeps_unicode(self):
+        """Кириллица сериализуется без экранирования."""
+        response = UnicodeJSONResponse(content={"text": "привет"})
+        assert response.body == '{"text":"привет"}'.encode()
+
+    def test_response_has_etag(self, seeded_client):
+        """Ответ содержит ETag, одинаковый для одинаковых данных."""
+        first = seeded_client.get("/api/analytics/retention")
+        second = seeded_client.get("/api/analytics/retention")
+        assert first.headers["etag"]
+        assert first.headers["etag"] == second.headers["etag"]
+
+    def test_compressed_response_has_weak_etag(self, seeded_client):
+        """Сжатый ответ помечен слабым ETag и подтверждается им же."""
+        response = seeded_client.get(
+            "/api/analytics/retention?days=90", headers={"Accept-Encoding": "gzip"}
+        )
+        etag = response.headers["etag"]
+        assert response.headers["content-encoding"] == "gzip"
+        assert etag.startswith('W/"')
+
+        revalidated = seeded_client.get(
+            "/api/analytics/retention?days=90",
+            headers={"Accept-Encoding": "identity", "If-None-Match": etag},
+        )
+        assert revalidated.status_code == 304
+
+    def test_if_none_match_returns_304(self, seeded_client):
+        """Клиент с актуальным ETag получает 304 без тела."""
+        etag = seeded_client.get("/api/analytics/retention").headers["etag"]
+        response = seeded_client.get("/api/analytics/retention", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_stale_etag_returns_body(self, seeded_client):
+        """Устаревший ETag не мешает получить данные."""
+        response = seeded_client.get(
+            "/api/analytics/retention", headers={"If-None-Match": '"stale"'}
+        )
+        assert response.status_code == 200
+        assert response.json()["days"] == 30
+
+    def test_large_response_gzipped(self, seeded_client):
+        """Крупные ответы сжимаются при Accept-Encoding: gzip."""
+        response = seeded_client.get(
+            "/api/analytics/retention?days=90", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["days"] == 90
+
+
+class TestLLMStatusEndpoint:
+    """Тесты endpoint /api/llm/status."""
+
+    def test_llm_status_reports_backends(self, client, tmp_path):
+        """Состояние каждого бэкенда содержит circuit breaker и нагрузку."""
+        prompt_file = tmp_path / "prompt.txt"
+        prompt_file.write_text("Промпт")
+        app.state.llm_client = LLMClient(
+            base_url="http://node1/v1", model="test-model", system_prompt_file=str(prompt_file)
+        )
+
+        response = client.get("/api/llm/status")
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {
+                "name": "test-model@http://node1/v1",
+                "model": "test-model",
+                "state": "closed",
+                "outstanding": 0,
+                "ewma_latency": None,
+            }
+        ]
+
+
+class TestLLMRoutesEndpoint:
+    """Тесты endpoint /api/llm/routes."""
+
+    def test_llm_routes_reports_stats(self, client, tmp_path):
+        """Маршрут по умолчанию присутствует даже без правил."""
+        prompt_file = tmp_path / "prompt.txt"
+        prompt_file.write_text("Промпт")
+        app.state.llm_client = LLMClient(
+            base_url="http://node1/v1",
+            model="test-model",
+            system_prompt_file=str(prompt_file),
+            routes=[ModelRouteSettings(name="short", model="test-model", max_chars=100)],
+        )
+
+        response = client.get("/api/llm/routes")
+
+        assert response.status_code == 200
+        assert [item["name"] for item in response.json()] == ["short", "default"]
+        assert response.json()[0] == {
+            "name": "short",
+            "model": "test-model",
+            "requests": 0,
+            "errors": 0,
+            "p50_latency": None,
+            "p95_latency": None,
+        }
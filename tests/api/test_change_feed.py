@@ -0,0 +1,246 @@
+"""Тесты для ChangeFeed."""
+
+import json
+
+import pytest
+import pytest_asyncio
+
+from src.api.change_feed import ChangeFeed
+from src.api.real_stat_collector import RealStatCollector
+from src.database import DatabaseManager
+
+
+@pytest_asyncio.fixture
+async def db():
+    """Тестовая БД в памяти с журналом изменений."""
+    db_manager = DatabaseManager(":memory:")
+    await db_manager.connect()
+
+    await db_manager.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE user_stats (
+            user_id INTEGER PRIMARY KEY,
+            message_count INTEGER NOT NULL,
+            total_length INTEGER NOT NULL,
+            image_count INTEGER NOT NULL,
+            first_message_at TEXT NOT NULL,
+            last_message_at TEXT NOT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE change_feed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL,
+            message_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            changed_at TEXT NOT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TRIGGER change_feed_insert AFTER INSERT ON messages
+        WHEN new.deleted_at IS NULL
+        BEGIN
+            INSERT INTO change_feed (op, message_id, user_id, role, length, changed_at)
+            VALUES ('insert', new.id, new.user_id, new.role, new.length, new.created_at);
+        END
+    """)
+
+    await db_manager.execute("""
+        CREATE TRIGGER change_feed_soft_delete AFTER UPDATE OF deleted_at ON messages
+        WHEN old.deleted_at IS NULL AND new.deleted_at IS NOT NULL
+        BEGIN
+            INSERT INTO change_feed (op, message_id, user_id, role, length, changed_at)
+            VALUES ('delete', old.id, old.user_id, old.role, old.length, new.deleted_at);
+        END
+    """)
+
+    await db_manager.execute("""
+        CREATE TRIGGER change_feed_delete AFTER DELETE ON messages
+        WHEN old.deleted_at IS NULL
+        BEGIN
+            INSERT INTO change_feed (op, message_id, user_id, role, length, changed_at)
+            VALUES (
+                'delete', old.id, old.user_id, old.role, old.length,
+                strftime('%Y-%m-%dT%H:%M:%f', 'now')
+            );
+        END
+    """)
+
+    yield db_manager
+    await db_manager.close()
+
+
+@pytest.mark.asyncio
+async def test_start_loads_existing_state(db):
+    """Начальное состояние загружается из таблиц."""
+    user_id = await db.get_or_create_user(111)
+    await db.add_message(user_id, "user", json.dumps({"text": "привет"}))
+    await db.add_message(user_id, "assistant", "ответ!")
+    feed = ChangeFeed(db)
+
+    assert await feed.start() is True
+
+    assert feed.total_messages == 2
+    assert feed.avg_message_length == (len(json.dumps({"text": "привет"})) + 6) / 2
+    assert [m.full_text for m in feed.recent_messages] == ["ответ!", "привет"]
+    assert await feed.poll() == 0
+
+
+@pytest.mark.asyncio
+async def test_poll_applies_new_messages(db):
+    """Новые сообщения попадают в счетчики и начало буфера."""
+    user_id = await db.get_or_create_user(111)
+    feed = ChangeFeed(db, recent_limit=2)
+    await feed.start()
+
+    for text in ["раз", "два", "три"]:
+        await db.add_message(user_id, "user", text)
+    assert await feed.poll() == 3
+
+    assert feed.total_messages == 3
+    assert feed.length_sum == 9
+    assert [m.full_text for m in feed.recent_messages] == ["три", "два"]
+    assert feed.recent_messages[0].telegram_id == 111
+
+
+@pytest.mark.asyncio
+async def test_poll_reads_in_batches(db):
+    """Журнал читается порциями до конца."""
+    user_id = await db.get_or_create_user(111)
+    feed = ChangeFeed(db, batch_size=2)
+    await feed.start()
+
+    for i in range(5):
+        await db.add_message(user_id, "user", f"сообщение {i}")
+
+    assert await feed.poll() == 5
+    assert feed.total_messages == 5
+    assert feed.version == 5
+
+
+@pytest.mark.asyncio
+async def test_soft_delete_refills_buffer(db):
+    """Удаленные сообщения вычитаются, буфер перечитывается из БД."""
+    first_user = await db.get_or_create_user(111)
+    second_user = await db.get_or_create_user(222)
+    await db.add_message(second_user, "user", "остается")
+    feed = ChangeFeed(db)
+    await feed.start()
+
+    await db.add_message(first_user, "user", "удаляется")
+    await db.clear_messages(first_user)
+    await feed.poll()
+
+    assert feed.total_messages == 1
+    assert feed.length_sum == len("остается")
+    assert [m.full_text for m in feed.recent_messages] == ["остается"]
+
+
+@pytest.mark.asyncio
+async def test_hard_delete_is_tracked(db):
+    """Физическое удаление живого сообщения (перенос в архив) уменьшает счетчики."""
+    user_id = await db.get_or_create_user(111)
+    await db.add_message(user_id, "user", "старое")
+    feed = ChangeFeed(db)
+    await feed.start()
+
+    await db.execute("DELETE FROM messages")
+    await feed.poll()
+
+    assert feed.total_messages == 0
+    assert feed.avg_message_length == 0.0
+    assert feed.recent_messages == []
+
+
+@pytest.mark.asyncio
+async def test_start_without_table():
+    """Без таблицы change_feed журнал не включается."""
+    db_manager = DatabaseManager(":memory:")
+    await db_manager.connect()
+    feed = ChangeFeed(db_manager)
+
+    assert await feed.start() is False
+    assert feed.ready is False
+
+    await db_manager.close()
+
+
+@pytest.mark.asyncio
+async def test_collector_uses_live_aggregates(db):
+    """RealStatCollector берет счетчики и последние сообщения из журнала."""
+    user_id = await db.get_or_create_user(111)
+    feed = ChangeFeed(db)
+    await feed.start()
+    await db.add_message(user_id, "user", "новое")
+    await feed.poll()
+
+    # Журнал не перечитывает таблицу messages: подмена видна только в SQL-пути
+    await db.execute("UPDATE messages SET length = 100")
+    metrics = await RealStatCollector(db, change_feed=feed)._get_metrics()
+    recent = await RealStatCollector(db, change_feed=feed)._get_recent_messages()
+
+    assert metrics.total_messages == 1
+    assert metrics.avg_message_length == 5.0
+    assert [m.full_text for m in recent] == ["новое"]
+
+
+@pytest.mark.asyncio
+async def test_prune_removes_only_read_entries(db):
+    """Удаляются только прочитанные записи старше срока хранения."""
+    user_id = await db.get_or_create_user(111)
+    feed = ChangeFeed(db, keep_seconds=0)
+    await feed.start()
+    await db.add_message(user_id, "user", "прочитано")
+    await feed.poll()
+    await db.add_message(user_id, "user", "не прочитано")
+
+    assert await feed.prune() == 1
+
+    rows = await db.fetchall("SELECT message_id FROM change_feed")
+    assert len(rows) == 1
+    assert await feed.poll() == 1
+    assert feed.total_messages == 2
+
+
+@pytest.mark.asyncio
+async def test_prune_keeps_recent_entries(db):
+    """Свежие записи остаются для других процессов API."""
+    user_id = await db.get_or_create_user(111)
+    feed = ChangeFeed(db)
+    await feed.start()
+    await db.add_message(user_id, "user", "свежее")
+    await feed.poll()
+
+    assert await feed.prune() == 0
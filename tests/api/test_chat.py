@@ -1,18 +1,34 @@
 """Тесты для Chat API."""
 
-from unittest.mock import MagicMock
+import asyncio
+import threading
+from ipaddress import ip_network
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from fastapi import Request
 from fastapi.testclient import TestClient
 
+from src.api.chat_models import ChatRequest
 from src.api.chat_service import ChatService
-from src.api.main import app
+from src.api.main import app, chat_message, client_key
+from src.llm_backend import LLMBackend
+from src.llm_client import RequestCancelledError
+from src.rate_limiter import RateLimiter
+
+
+def make_llm_client():
+    """Mock LLM клиента с одним бэкендом для планировщика."""
+    llm_client = MagicMock()
+    llm_client.pool.backends = [LLMBackend("http://node/v1", "test-model")]
+    llm_client.router.route.return_value = ("default", None)
+    return llm_client
 
 
 @pytest.fixture
 def mock_llm_client():
     """Mock LLM client."""
-    mock_client = MagicMock()
+    mock_client = make_llm_client()
     mock_client.get_response.return_value = "Это мок ответ от LLM"
     mock_client.model = "test-model"
     mock_client.client.chat.completions.create.return_value = MagicMock(
@@ -159,3 +175,170 @@ class TestChatModels:
         assert response.message == "Ответ"
         assert response.session_id == "session-123"
         assert response.mode == "normal"
+
+
+def make_request(peer, forwarded_for):
+    """HTTP запрос с адресом соединения и X-Forwarded-For."""
+    return Request(
+        {
+            "type": "http",
+            "app": app,
+            "headers": [(b"x-forwarded-for", forwarded_for)],
+            "client": (peer, 50000),
+        }
+    )
+
+
+class TestChatRateLimit:
+    """Тесты лимитов запросов к чату."""
+
+    def test_over_limit_returns_429(self, client, mock_llm_client):
+        """Запрос сверх лимита отклоняется с Retry-After без обращения к LLM."""
+        app.state.rate_limiter = RateLimiter("api", messages_per_minute=1)
+        try:
+            first = client.post("/api/chat/message", json={"message": "Привет!"})
+            second = client.post("/api/chat/message", json={"message": "Привет еще раз"})
+        finally:
+            app.state.rate_limiter = None
+
+        assert first.status_code == 200
+        assert second.status_code == 429
+        assert second.headers["Retry-After"] == "60"
+        assert mock_llm_client.get_response.call_count == 1
+
+    def test_response_tokens_charged(self, client):
+        """Токены ответа списываются с бюджета клиента."""
+        rate_limiter = RateLimiter("api", tokens_per_hour=3600)
+        app.state.rate_limiter = rate_limiter
+        try:
+            client.post("/api/chat/message", json={"message": "Привет!"})
+        finally:
+            app.state.rate_limiter = None
+
+        level, _ = rate_limiter._buckets["testclient"]["tokens"]
+        assert level < 3600 - len("Это мок ответ от LLM") // 4
+
+    def test_history_tokens_charged(self, client):
+        """История сессии, ушедшая в промпт, списывается вместе с ответом."""
+        rate_limiter = RateLimiter("api", tokens_per_hour=100000)
+        app.state.rate_limiter = rate_limiter
+        try:
+            first = client.post("/api/chat/message", json={"message": "Привет! " * 100})
+            level_before, _ = rate_limiter._buckets["testclient"]["tokens"]
+            client.post(
+                "/api/chat/message",
+                json={"message": "Еще", "session_id": first.json()["session_id"]},
+            )
+        finally:
+            app.state.rate_limiter = None
+
+        level_after, _ = rate_limiter._buckets["testclient"]["tokens"]
+        assert level_before - level_after >= len("Привет! " * 100) // 4
+
+    def test_client_key_uses_forwarded_for_behind_trusted_proxy(self):
+        """За доверенным прокси клиент берется из X-Forwarded-For."""
+        app.state.trusted_proxies = [ip_network("172.16.0.0/12")]
+        try:
+            proxied = client_key(make_request("172.18.0.5", b"203.0.113.7, 172.18.0.9"))
+            direct = client_key(make_request("198.51.100.1", b"203.0.113.7"))
+        finally:
+            app.state.trusted_proxies = []
+
+        assert proxied == "203.0.113.7"
+        # Заголовок от недоверенного адреса подделан клиентом
+        assert direct == "198.51.100.1"
+
+
+class TestChatCancellation:
+    """Тесты отмены запроса при отключении клиента."""
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_llm_request(self, mock_db):
+        """Разрыв соединения отменяет генерацию и убирает вопрос из истории."""
+        started = threading.Event()
+        cancelled = threading.Event()
+
+        def generate(messages, cancel, **kwargs):
+            started.set()
+            assert cancel.wait(5)
+            cancelled.set()
+            raise RequestCancelledError("Запрос отменен")
+
+        llm_client = make_llm_client()
+        llm_client.get_response.side_effect = generate
+        chat_service = ChatService(llm_client, mock_db)
+        app.state.chat_service = chat_service
+        http_request = MagicMock()
+        http_request.is_disconnected = AsyncMock(side_effect=lambda: started.is_set())
+
+        response = await chat_message(
+            ChatRequest(message="Привет", mode="normal", session_id="s1"), http_request
+        )
+
+        assert response.status_code == 499
+        assert await asyncio.to_thread(cancelled.wait, 5)
+        assert chat_service.sessions["s1"].messages == []
+
+    @pytest.mark.asyncio
+    async def test_disconnect_detected_through_middlewares(self, mock_db):
+        """Разрыв соединения виден обработчику при установленных middleware."""
+        started = threading.Event()
+        cancelled = threading.Event()
+
+        def generate(messages, cancel, **kwargs):
+            started.set()
+            assert cancel.wait(5)
+            cancelled.set()
+            raise RequestCancelledError("Запрос отменен")
+
+        llm_client = make_llm_client()
+        llm_client.get_response.side_effect = generate
+        app.state.chat_service = ChatService(llm_client, mock_db)
+        app.state.rate_limiter = RateLimiter("api", messages_per_minute=10)
+        app.state.saturation = MagicMock(should_shed=MagicMock(return_value=False))
+        app.state.load_shedding = True
+
+        body = '{"message": "Привет", "session_id": "s1"}'.encode()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/chat/message",
+            "raw_path": b"/api/chat/message",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Как ASGI сервер: после тела запроса receive ждет разрыва соединения
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        try:
+            await asyncio.wait_for(app(scope, receive, send), 5)
+        finally:
+            app.state.rate_limiter = None
+            app.state.saturation = None
+            app.state.load_shedding = False
+
+        assert messages[0]["status"] == 499
+        assert await asyncio.to_thread(cancelled.wait, 5)
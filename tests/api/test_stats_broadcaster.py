@@ -0,0 +1,147 @@
+"""Тесты для StatsBroadcaster."""
+
+import asyncio
+
+import pytest
+
+from src.api.models import ActivityPoint, DashboardStats, Metrics, RecentMessage
+from src.api.stats_broadcaster import StatsBroadcaster
+
+
+def make_stats(total_messages: int, messages: list[str]) -> DashboardStats:
+    """Собрать статистику с заданным числом сообщений и последними сообщениями."""
+    return DashboardStats(
+        metrics=Metrics(
+            total_users=1,
+            total_messages=total_messages,
+            active_today=1,
+            avg_message_length=10.0,
+        ),
+        activity_chart=[ActivityPoint(date="2025-01-01", count=total_messages)],
+        chart_data=[],
+        recent_messages=[
+            RecentMessage(
+                telegram_id=1,
+                role="user",
+                preview=text,
+                full_text=text,
+                created_at="2025-01-01T00:00:00",
+            )
+            for text in messages
+        ],
+    )
+
+
+class FakeCollector:
+    """Коллектор, возвращающий заранее заданную статистику."""
+
+    def __init__(self, stats: list[DashboardStats]):
+        self.stats = stats
+        self.calls = 0
+
+    async def get_stats(self, days: int = 7) -> DashboardStats:
+        self.calls += 1
+        return self.stats[min(self.calls, len(self.stats)) - 1]
+
+
+def make_broadcaster(collector: FakeCollector, **kwargs) -> StatsBroadcaster:
+    """Создать рассылку поверх фейкового коллектора."""
+
+    async def factory():
+        return collector
+
+    return StatsBroadcaster(factory, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_first_refresh_sends_snapshot():
+    """Первый пересчет отправляет полный снимок."""
+    broadcaster = make_broadcaster(FakeCollector([make_stats(1, ["a"])]), interval=60)
+    queue = broadcaster.subscribe()
+
+    name, data = await asyncio.wait_for(queue.get(), 1)
+
+    assert name == "snapshot"
+    assert data["metrics"]["total_messages"] == 1
+    broadcaster.unsubscribe(queue)
+
+
+@pytest.mark.asyncio
+async def test_refresh_sends_only_changed_sections():
+    """Повторный пересчет отправляет только изменения."""
+    collector = FakeCollector([make_stats(1, ["a"]), make_stats(2, ["b", "a"])])
+    broadcaster = make_broadcaster(collector)
+    await broadcaster.refresh()
+    queue: asyncio.Queue = asyncio.Queue()
+    broadcaster.subscribers.add(queue)
+
+    await broadcaster.refresh()
+
+    events = dict([queue.get_nowait() for _ in range(queue.qsize())])
+    assert events["metrics"]["total_messages"] == 2
+    assert events["chart"]["activity_chart"] == [{"date": "2025-01-01", "count": 2}]
+    assert [m["preview"] for m in events["messages"]["new"]] == ["b"]
+    assert events["messages"]["limit"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unchanged_stats_send_nothing():
+    """Неизменная статистика не порождает событий."""
+    broadcaster = make_broadcaster(FakeCollector([make_stats(1, ["a"])]))
+    await broadcaster.refresh()
+    queue: asyncio.Queue = asyncio.Queue()
+    broadcaster.subscribers.add(queue)
+
+    await broadcaster.refresh()
+
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_single_computation_for_many_subscribers():
+    """Статистика считается один раз для всех подписчиков."""
+    collector = FakeCollector([make_stats(1, ["a"])])
+    broadcaster = make_broadcaster(collector, interval=60)
+
+    queues = [broadcaster.subscribe() for _ in range(5)]
+    for queue in queues:
+        await asyncio.wait_for(queue.get(), 1)
+
+    assert collector.calls == 1
+    for queue in queues:
+        broadcaster.unsubscribe(queue)
+
+
+@pytest.mark.asyncio
+async def test_recompute_only_on_data_change():
+    """Без изменения данных пересчет не выполняется."""
+    collector = FakeCollector([make_stats(1, ["a"])])
+    token = {"value": 1}
+
+    async def change_token():
+        return token["value"]
+
+    broadcaster = make_broadcaster(collector, interval=0.01, change_token=change_token)
+    queue = broadcaster.subscribe()
+    await asyncio.sleep(0.05)
+    calls_before = collector.calls
+    token["value"] = 2
+    await asyncio.sleep(0.05)
+
+    assert calls_before == 1
+    assert collector.calls == 2
+    broadcaster.unsubscribe(queue)
+
+
+@pytest.mark.asyncio
+async def test_lagging_subscriber_gets_snapshot():
+    """Переполненная очередь подписчика заменяется полным снимком."""
+    broadcaster = make_broadcaster(FakeCollector([make_stats(1, ["a"])]))
+    await broadcaster.refresh()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    queue.put_nowait(("metrics", {}))
+    broadcaster.subscribers.add(queue)
+
+    broadcaster._publish(("metrics", {"total_messages": 1}))
+
+    assert queue.get_nowait()[0] == "snapshot"
@@ -0,0 +1,51 @@
+import pytest
+
+from src.activity_bitmap import ActivityBitmap
+
+
+def test_add_returns_false_for_existing_user():
+    bitmap = ActivityBitmap()
+    assert bitmap.add(5) is True
+    assert bitmap.add(5) is False
+
+
+def test_contains_and_len():
+    bitmap = ActivityBitmap()
+    for user_id in (1, 7, 100):
+        bitmap.add(user_id)
+    assert 7 in bitmap
+    assert 8 not in bitmap
+    assert len(bitmap) == 3
+
+
+def test_union_counts_distinct_users():
+    first = ActivityBitmap()
+    second = ActivityBitmap()
+    for user_id in (1, 2, 3):
+        first.add(user_id)
+    for user_id in (3, 4):
+        second.add(user_id)
+    assert len(ActivityBitmap.union([first, second])) == 4
+    assert (first | second).user_ids() == [1, 2, 3, 4]
+
+
+def test_sparse_bitmap_uses_array_container():
+    bitmap = ActivityBitmap()
+    bitmap.add(1_000_000)
+    data = bitmap.to_bytes()
+    assert data[:1] == b"A"
+    assert ActivityBitmap.from_bytes(data).user_ids() == [1_000_000]
+
+
+def test_dense_bitmap_uses_bitset_container():
+    bitmap = ActivityBitmap()
+    for user_id in range(0, 1000, 2):
+        bitmap.add(user_id)
+    data = bitmap.to_bytes()
+    assert data[:1] == b"B"
+    assert ActivityBitmap.from_bytes(data).bits == bitmap.bits
+
+
+def test_from_bytes_unknown_container():
+    with pytest.raises(ValueError):
+        ActivityBitmap.from_bytes(b"Z123")
@@ -0,0 +1,82 @@
+import gzip
+import os
+import sqlite3
+
+import pytest
+
+from src.backup_manager import BackupManager
+from src.database import DatabaseManager
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    path = str(tmp_path / "app.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY, content TEXT NOT NULL)")
+    connection.executemany(
+        "INSERT INTO messages (content) VALUES (?)", [(f"message {i}",) for i in range(100)]
+    )
+    connection.commit()
+    connection.close()
+    return path
+
+
+def count_messages(path: str) -> int:
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.mark.asyncio
+async def test_create_snapshot_copies_database(database_path, tmp_path):
+    manager = BackupManager(database_path, str(tmp_path / "backups"), pages_per_step=1)
+
+    backup_path = await manager.create_snapshot()
+
+    assert count_messages(backup_path) == 100
+    assert count_messages(manager.analytics_snapshot_path) == 100
+
+
+@pytest.mark.asyncio
+async def test_create_snapshot_compressed(database_path, tmp_path):
+    manager = BackupManager(database_path, str(tmp_path / "backups"), compress=True)
+
+    backup_path = await manager.create_snapshot()
+
+    assert backup_path.endswith(".db.gz")
+    restored = tmp_path / "restored.db"
+    with gzip.open(backup_path, "rb") as f:
+        restored.write_bytes(f.read())
+    assert count_messages(str(restored)) == 100
+
+
+@pytest.mark.asyncio
+async def test_rotation_keeps_latest_backups(database_path, tmp_path):
+    backup_dir = tmp_path / "backups"
+    backup_dir.mkdir()
+    for name in ("aidialogs-20250101-000000.db", "aidialogs-20250102-000000.db"):
+        (backup_dir / name).write_bytes(b"")
+    manager = BackupManager(database_path, str(backup_dir), keep=2)
+
+    backup_path = await manager.create_snapshot()
+
+    backups = sorted(name for name in os.listdir(backup_dir) if name.startswith("aidialogs-"))
+    assert backups == ["aidialogs-20250102-000000.db", os.path.basename(backup_path)]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_opened_read_only(database_path, tmp_path):
+    manager = BackupManager(database_path, str(tmp_path / "backups"))
+    await manager.create_snapshot()
+    snapshot = DatabaseManager(manager.analytics_snapshot_path, read_only=True)
+    await snapshot.connect()
+
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            await snapshot.execute("DELETE FROM messages")
+        row = await snapshot.fetchone("SELECT COUNT(*) as count FROM messages")
+        assert row["count"] == 100
+    finally:
+        await snapshot.close()
@@ -1,4 +1,6 @@
+import asyncio
 import io
+import threading
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -6,14 +8,20 @@ import pytest_asyncio
 
 from src.bot import TelegramBot
 from src.database import DatabaseManager
-from src.llm_client import LLMClient
+from src.llm_backend import LLMBackend
+from src.llm_client import LLMClient, RequestCancelledError
+from src.rate_limiter import RateLimiter
 
 TEST_IMAGE_BASE64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
 
 
 @pytest.fixture
 def llm_client():
-    return MagicMock(spec=LLMClient)
+    llm_client = MagicMock(spec=LLMClient)
+    llm_client.pool = MagicMock(backends=[LLMBackend("http://node/v1", "model")])
+    llm_client.router = MagicMock()
+    llm_client.router.route.return_value = ("default", None)
+    return llm_client
 
 
 @pytest_asyncio.fixture
@@ -43,6 +51,13 @@ async def db():
         )
     """)
 
+    await db_manager.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
     yield db_manager
     await db_manager.close()
 
@@ -97,7 +112,7 @@ async def test_message_handler_with_history(bot, llm_client):
     await bot.session_manager.add_message(123, "user", "Первое сообщение")
     await bot.session_manager.add_message(123, "assistant", "Первый ответ")
 
-    def check_history(messages):
+    def check_history(messages, **kwargs):
         assert len(messages) == 3
         assert messages[0] == {"role": "user", "content": "Первое сообщение"}
         assert messages[1] == {"role": "assistant", "content": "Первый ответ"}
@@ -150,6 +165,57 @@ async def test_message_handler_llm_error(bot, llm_client):
     message.answer.assert_called_once_with("Извините, произошла ошибка. Попробуйте позже.")
 
 
+@pytest.mark.asyncio
+async def test_message_handler_enqueues_job(bot, llm_client):
+    bot.job_queue = MagicMock()
+    bot.job_queue.enqueue = AsyncMock()
+
+    message = MagicMock()
+    message.from_user.id = 123
+    message.chat.id = 456
+    message.text = "Привет"
+    message.photo = None
+    message.answer = AsyncMock()
+
+    await bot._message_handler(message)
+
+    bot.job_queue.enqueue.assert_called_once_with(123, 456)
+    llm_client.get_response.assert_not_called()
+    message.answer.assert_not_called()
+    session = await bot.session_manager.get_session(123)
+    assert session == [{"role": "user", "content": "Привет"}]
+
+
+@pytest.mark.asyncio
+async def test_reset_cancels_pending_reply(bot, llm_client):
+    started = threading.Event()
+
+    def generate(messages, cancel, **kwargs):
+        started.set()
+        assert cancel.wait(5)
+        raise RequestCancelledError("Запрос отменен")
+
+    llm_client.get_response.side_effect = generate
+
+    message = MagicMock()
+    message.from_user.id = 123
+    message.text = "Длинный вопрос"
+    message.photo = None
+    message.answer = AsyncMock()
+    reset = MagicMock()
+    reset.from_user.id = 123
+    reset.answer = AsyncMock()
+
+    handler = asyncio.create_task(bot._message_handler(message))
+    await asyncio.to_thread(started.wait, 5)
+    await bot._reset_handler(reset)
+    await handler
+
+    message.answer.assert_not_called()
+    assert await bot.session_manager.get_session(123) == []
+    assert bot._turns == {}
+
+
 @pytest.mark.asyncio
 async def test_message_handler_no_text(bot, llm_client):
     message = MagicMock()
@@ -238,6 +304,7 @@ async def test_message_handler_with_photo(bot, llm_client):
     photo = MagicMock()
     photo.file_id = "test_file_id"
     message.photo = [photo]
+    message.media_group_id = None
 
     file_mock = MagicMock()
     file_mock.file_path = "photos/test.jpg"
@@ -276,6 +343,7 @@ async def test_message_handler_with_photo_no_caption(bot, llm_client):
     photo = MagicMock()
     photo.file_id = "test_file_id"
     message.photo = [photo]
+    message.media_group_id = None
 
     file_mock = MagicMock()
     file_mock.file_path = "photos/test.jpg"
@@ -315,6 +383,7 @@ async def test_message_handler_photo_with_multiple_sizes(bot, llm_client):
     photo_large = MagicMock()
     photo_large.file_id = "large_id"
     message.photo = [photo_small, photo_large]
+    message.media_group_id = None
 
     file_mock = MagicMock()
     file_mock.file_path = "photos/large.jpg"
@@ -329,3 +398,58 @@ async def test_message_handler_photo_with_multiple_sizes(bot, llm_client):
 
     bot.bot.get_file.assert_called_once_with("large_id")
     message.answer.assert_called_once_with("Описание фото")
+
+
+@pytest.mark.asyncio
+async def test_message_handler_album_single_turn(bot, llm_client):
+    import base64
+
+    llm_client.get_response.return_value = "Два фото"
+    bot.media_groups.window = 0.05
+    image_bytes = base64.b64decode(TEST_IMAGE_BASE64)
+    bot.bot.get_file = AsyncMock(side_effect=lambda file_id: MagicMock(file_path=file_id))
+    bot.bot.download_file = AsyncMock(side_effect=lambda file_path: io.BytesIO(image_bytes))
+
+    messages = []
+    for index, caption in enumerate(["Сравни фото", None]):
+        message = MagicMock()
+        message.from_user.id = 123
+        message.chat.id = 123
+        message.message_id = index
+        message.media_group_id = "album"
+        message.text = None
+        message.caption = caption
+        message.answer = AsyncMock()
+        photo = MagicMock()
+        photo.file_id = f"file_{index}"
+        message.photo = [photo]
+        messages.append(message)
+
+    await asyncio.gather(*(bot._message_handler(message) for message in messages))
+
+    llm_client.get_response.assert_called_once()
+    session = await bot.session_manager.get_session(123)
+    assert len(session) == 2
+    assert session[0]["content"][0] == {"type": "text", "text": "Сравни фото"}
+    assert [part["type"] for part in session[0]["content"][1:]] == ["image_url", "image_url"]
+    messages[0].answer.assert_called_once_with("Два фото")
+    messages[1].answer.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_message_handler_rate_limited(bot, llm_client):
+    bot.rate_limiter = RateLimiter("bot", messages_per_minute=1)
+    llm_client.get_response.return_value = "Ответ"
+
+    for text in ["Первый", "Второй"]:
+        message = MagicMock()
+        message.from_user.id = 123
+        message.text = text
+        message.photo = None
+        message.answer = AsyncMock()
+        await bot._message_handler(message)
+
+    llm_client.get_response.assert_called_once()
+    message.answer.assert_called_once_with("Слишком много запросов. Попробуйте через 1 мин.")
+    session = await bot.session_manager.get_session(123)
+    assert [m["content"] for m in session] == ["Первый", "Ответ"]
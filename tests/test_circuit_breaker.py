@@ -0,0 +1,44 @@
+from src.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0)
+
+    assert breaker.record_failure(0.0) is False
+    assert breaker.record_failure(0.0) is True
+
+    assert breaker.state(5.0) == OPEN
+    assert not breaker.is_available(5.0)
+
+
+def test_half_open_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+    breaker.record_failure(0.0)
+
+    assert breaker.state(10.0) == HALF_OPEN
+    assert breaker.is_available(10.0)
+    breaker.on_acquire(10.0)
+    assert not breaker.is_available(10.0)
+
+    breaker.cancel_trial()
+    assert breaker.is_available(10.0)
+
+
+def test_trial_success_closes():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+    breaker.record_failure(0.0)
+    breaker.on_acquire(10.0)
+
+    breaker.record_success()
+
+    assert breaker.state(10.0) == CLOSED
+    assert breaker.failures == 0
+
+
+def test_trial_failure_reopens_longer():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10.0, max_reset_timeout=15.0)
+    for _ in range(3):
+        breaker.record_failure(0.0)
+
+    assert breaker.record_failure(10.0) is True
+    assert breaker.open_until == 25.0
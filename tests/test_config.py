@@ -38,3 +38,14 @@ def test_config_with_system_prompt_file():
         system_prompt_file="prompts/system_prompt.txt",
     )
     assert config.system_prompt_file == "prompts/system_prompt.txt"
+
+
+def test_config_rejects_zero_recent_messages():
+    with pytest.raises(ValidationError):
+        Config(
+            _env_file=None,
+            telegram_bot_token="test_token",
+            llm_base_url="http://test.api/v1",
+            llm_model="test-model",
+            memory_recent_messages=0,
+        )
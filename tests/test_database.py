@@ -1,3 +1,6 @@
+import asyncio
+from datetime import datetime
+
 import pytest
 import pytest_asyncio
 
@@ -31,6 +34,13 @@ async def db():
         )
     """)
 
+    await db_manager.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
     yield db_manager
     await db_manager.close()
 
@@ -117,3 +127,29 @@ async def test_message_length_stored(db):
     )
     row = await cursor.fetchone()
     assert row[0] == len(content)
+
+
+@pytest.mark.asyncio
+async def test_add_message_marks_user_active(db):
+    user_id_1 = await db.get_or_create_user(123)
+    user_id_2 = await db.get_or_create_user(456)
+    await db.add_message(user_id_1, "user", "Message 1")
+    await db.add_message(user_id_1, "user", "Message 2")
+    await db.add_message(user_id_2, "assistant", "Answer")
+
+    day = datetime.utcnow().date().isoformat()
+    bitmaps = await db.get_active_bitmaps(day, day)
+
+    assert bitmaps[day].user_ids() == [user_id_1]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_messages_mark_all_users_active(db):
+    user_ids = [await db.get_or_create_user(telegram_id) for telegram_id in range(1, 51)]
+
+    await asyncio.gather(*(db.add_message(user_id, "user", "Привет") for user_id in user_ids))
+
+    day = datetime.utcnow().date().isoformat()
+    bitmaps = await db.get_active_bitmaps(day, day)
+    assert len(bitmaps[day]) == 50
+    assert bitmaps[day].user_ids() == sorted(user_ids)
@@ -0,0 +1,172 @@
+import json
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+
+from src.database import DatabaseManager
+from src.image_descriptions import ImageDescriber
+from src.llm_backend import LLMBackend
+from src.llm_scheduler import BACKGROUND, LLMScheduler
+from src.session_manager import SessionManager
+
+
+@pytest_asyncio.fixture
+async def db():
+    db_manager = DatabaseManager(":memory:")
+    await db_manager.connect()
+
+    await db_manager.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE image_descriptions (
+            message_id INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+
+    yield db_manager
+    await db_manager.close()
+
+
+@pytest.fixture
+def llm_client():
+    client = MagicMock()
+    client.pool.backends = [LLMBackend("http://node/v1", "vision")]
+    client.router.route.return_value = ("default", None)
+    client.get_response.side_effect = lambda messages, system_prompt, **kwargs: (
+        " Рыжий кот на диване "
+    )
+    return client
+
+
+@pytest.fixture
+def describer(db, llm_client):
+    return ImageDescriber(db, LLMScheduler(llm_client), keep_raw=1)
+
+
+@pytest.fixture
+def manager(db, describer):
+    return SessionManager(db, describer=describer)
+
+
+def image_url(message):
+    return [part for part in message["content"] if part["type"] == "image_url"]
+
+
+@pytest.mark.asyncio
+async def test_old_images_replaced_with_description(manager, describer, llm_client):
+    await manager.add_message(123, "user", "Что на фото?", image="AAAA")
+    await manager.add_message(123, "assistant", "Кот")
+    await manager.add_message(123, "user", "", image="BBBB")
+
+    # Описание генерируется в фоне: текущий ход отправляет фото как есть
+    context = await manager.get_context(123)
+    assert image_url(context[0])
+    await describer.wait_pending()
+    context = await manager.get_context(123)
+
+    assert context[0] == {"role": "user", "content": "Что на фото?\n[Фото: Рыжий кот на диване]"}
+    assert image_url(context[2])[0]["image_url"]["url"].endswith("BBBB")
+    llm_client.get_response.assert_called_once()
+    messages = llm_client.get_response.call_args[0][0]
+    assert image_url(messages[0])[0]["image_url"]["url"].endswith("AAAA")
+    stats = {item["priority"]: item for item in describer.scheduler.stats()}
+    assert stats[BACKGROUND]["dispatched"] == 1
+
+
+@pytest.mark.asyncio
+async def test_description_requested_once(manager, describer, llm_client, db):
+    await manager.add_message(123, "user", "", image="AAAA")
+    await manager.add_message(123, "user", "", image="BBBB")
+
+    await manager.get_context(123)
+    await manager.get_context(123)
+    await describer.wait_pending()
+    context = await manager.get_context(123)
+
+    assert context[0] == {"role": "user", "content": "[Фото: Рыжий кот на диване]"}
+    assert llm_client.get_response.call_count == 1
+    row = await db.fetchone("SELECT description FROM image_descriptions")
+    assert row["description"] == "Рыжий кот на диване"
+    stored = await db.fetchone("SELECT content FROM messages ORDER BY id LIMIT 1")
+    assert json.loads(stored["content"])["image"] == "AAAA"
+
+
+@pytest.mark.asyncio
+async def test_descriptions_generated_concurrently(manager, describer, llm_client):
+    started = threading.Barrier(2, timeout=5)
+
+    def describe(messages, system_prompt, **kwargs):
+        # Оба описания должны выполняться одновременно, иначе барьер не пройти
+        started.wait()
+        return "Фото"
+
+    llm_client.get_response.side_effect = describe
+    for image in ("AAAA", "BBBB", "CCCC"):
+        await manager.add_message(123, "user", "", image=image)
+
+    await manager.get_context(123)
+    await describer.wait_pending()
+    context = await manager.get_context(123)
+
+    assert context[0] == context[1] == {"role": "user", "content": "[Фото: Фото]"}
+
+
+@pytest.mark.asyncio
+async def test_recent_images_sent_raw(manager, llm_client):
+    await manager.add_message(123, "user", "Фото", image="AAAA")
+    await manager.add_message(123, "assistant", "Красиво")
+
+    context = await manager.get_context(123)
+
+    assert image_url(context[0])
+    llm_client.get_response.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_description_failure_backs_off(manager, describer, llm_client):
+    llm_client.get_response.side_effect = RuntimeError("LLM недоступна")
+    await manager.add_message(123, "user", "", image="AAAA")
+    await manager.add_message(123, "user", "", image="BBBB")
+
+    await manager.get_context(123)
+    await describer.wait_pending()
+    context = await manager.get_context(123)
+    await describer.wait_pending()
+
+    assert image_url(context[0])
+    assert image_url(context[1])
+    # Повтор только после паузы, а не на каждом ходе
+    assert llm_client.get_response.call_count == 1
+    failures, _ = describer._failures[1]
+    assert failures == 1
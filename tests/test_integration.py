@@ -55,6 +55,13 @@ async def test_full_integration(tmp_path):
         )
     """)
 
+    await db.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
     with patch("src.bot.Bot"):
         bot = TelegramBot(config.telegram_bot_token, llm_client, config.system_prompt_file, db)
 
@@ -110,6 +117,13 @@ async def test_smoke_initialization(tmp_path):
         )
     """)
 
+    await db.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
     with patch("src.bot.Bot"):
         bot = TelegramBot(config.telegram_bot_token, llm_client, config.system_prompt_file, db)
 
@@ -180,6 +194,13 @@ async def test_integration_with_image(tmp_path):
         )
     """)
 
+    await db.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
     with patch("src.bot.Bot"), patch.object(llm_client, "get_response") as mock_response:
         mock_response.return_value = "На изображении красная точка"
 
@@ -1,8 +1,13 @@
+import threading
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+import httpx
+import openai
 import pytest
 
-from src.llm_client import LLMClient
+from src.config import LLMBackendSettings, ModelRouteSettings
+from src.llm_client import LLMClient, RequestCancelledError
 
 
 @pytest.fixture
@@ -59,3 +64,182 @@ def test_llm_client_file_not_found():
             model="test-model",
             system_prompt_file="nonexistent_file.txt",
         )
+
+
+def test_get_response_fails_over_to_another_backend(temp_prompt_file):
+    client = LLMClient(
+        base_url="http://unused/v1",
+        model="test-model",
+        system_prompt_file=temp_prompt_file,
+        backends=[
+            LLMBackendSettings(base_url="http://node1/v1", model="test-model"),
+            LLMBackendSettings(base_url="http://node2/v1", model="test-model"),
+        ],
+    )
+    first, second = client.pool.backends
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "Ответ второго узла"
+
+    with (
+        patch.object(
+            first.client.chat.completions,
+            "create",
+            side_effect=openai.APIConnectionError(request=httpx.Request("POST", "http://node1")),
+        ),
+        patch.object(second.client.chat.completions, "create", return_value=mock_response),
+        patch("src.llm_client.time.sleep"),
+    ):
+        # Без замеров задержки узлы равноценны, первый запрос идет на первый в списке
+        response = client.get_response([{"role": "user", "content": "Привет"}])
+
+    assert response == "Ответ второго узла"
+    assert first.breaker.failures == 1
+    assert second.outstanding == 0
+
+
+def test_get_response_custom_system_prompt(llm_client):
+    with patch.object(llm_client.client.chat.completions, "create") as mock_create:
+        mock_create.return_value.choices[0].message.content = "ok"
+
+        llm_client.get_response([{"role": "user", "content": "Привет"}], "Админ промпт")
+
+        assert mock_create.call_args[1]["messages"][0]["content"] == "Админ промпт"
+
+
+def status_error(status_code: int, headers: dict | None = None) -> openai.APIStatusError:
+    request = httpx.Request("POST", "http://test.api/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+def test_get_response_does_not_retry_client_error(llm_client):
+    backend = llm_client.pool.backends[0]
+    with patch.object(llm_client.client.chat.completions, "create") as mock_create:
+        mock_create.side_effect = status_error(400)
+
+        with pytest.raises(openai.APIStatusError):
+            llm_client.get_response([{"role": "user", "content": "Очень длинный контекст"}])
+
+    mock_create.assert_called_once()
+    # Ошибка клиента не размыкает circuit breaker бэкенда
+    assert backend.breaker.failures == 0
+    assert backend.outstanding == 0
+
+
+def test_get_response_retries_with_retry_after(llm_client):
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "Ответ"
+    with (
+        patch.object(llm_client.client.chat.completions, "create") as mock_create,
+        patch("src.llm_client.time.sleep") as mock_sleep,
+    ):
+        mock_create.side_effect = [status_error(429, {"retry-after": "3"}), mock_response]
+
+        assert llm_client.get_response([{"role": "user", "content": "Привет"}]) == "Ответ"
+
+    assert mock_create.call_count == 2
+    assert mock_sleep.call_args[0][0] >= 3.0
+
+
+def test_get_response_stops_at_deadline(temp_prompt_file):
+    client = LLMClient(
+        base_url="http://test.api/v1",
+        model="test-model",
+        system_prompt_file=temp_prompt_file,
+        request_deadline=1.0,
+    )
+    with (
+        patch.object(client.client.chat.completions, "create") as mock_create,
+        patch("src.llm_client.time.sleep") as mock_sleep,
+    ):
+        mock_create.side_effect = status_error(503, {"retry-after": "30"})
+
+        with pytest.raises(openai.APIStatusError):
+            client.get_response([{"role": "user", "content": "Привет"}])
+
+    mock_create.assert_called_once()
+    mock_sleep.assert_not_called()
+    assert mock_create.call_args[1]["timeout"] <= 1.0
+
+
+def test_get_response_routes_to_model_backend(temp_prompt_file):
+    client = LLMClient(
+        base_url="http://unused/v1",
+        model="big-model",
+        system_prompt_file=temp_prompt_file,
+        backends=[
+            LLMBackendSettings(base_url="http://big/v1", model="big-model"),
+            LLMBackendSettings(base_url="http://small/v1", model="small-model"),
+        ],
+        routes=[
+            ModelRouteSettings(name="short", model="small-model", modes=["normal"], max_chars=50)
+        ],
+    )
+    big, small = client.pool.backends
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "Ответ"
+
+    with (
+        patch.object(
+            big.client.chat.completions, "create", return_value=mock_response
+        ) as big_create,
+        patch.object(
+            small.client.chat.completions, "create", return_value=mock_response
+        ) as small_create,
+    ):
+        client.get_response([{"role": "user", "content": "Привет"}])
+        client.get_response([{"role": "user", "content": "Привет"}], mode="admin")
+        client.get_response([{"role": "user", "content": "Очень длинный вопрос " * 10}])
+
+    assert small_create.call_count == 1
+    assert small_create.call_args[1]["model"] == "small-model"
+    assert big_create.call_count == 2
+    stats = {item["name"]: item for item in client.router.stats()}
+    assert stats["short"]["requests"] == 1
+    assert stats["default"]["requests"] == 2
+    assert stats["default"]["p50_latency"] is not None
+
+
+def test_route_model_must_be_served(temp_prompt_file):
+    with pytest.raises(ValueError, match="unknown-model"):
+        LLMClient(
+            base_url="http://test.api/v1",
+            model="test-model",
+            system_prompt_file=temp_prompt_file,
+            routes=[ModelRouteSettings(name="short", model="unknown-model")],
+        )
+
+
+def test_cancel_closes_stream_and_discards_partial_output(llm_client):
+    cancel = threading.Event()
+    stream = MagicMock()
+
+    def chunks():
+        for part in ["Час", "тичный", "ответ"]:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+            # Клиент ушел после первого чанка
+            cancel.set()
+
+    stream.__iter__.return_value = chunks()
+    backend = llm_client.pool.backends[0]
+
+    with patch.object(llm_client.client.chat.completions, "create", return_value=stream) as create:
+        with pytest.raises(RequestCancelledError):
+            llm_client.get_response([{"role": "user", "content": "Привет"}], cancel=cancel)
+
+    create.assert_called_once()
+    assert create.call_args[1]["stream"] is True
+    stream.close.assert_called_once()
+    assert backend.outstanding == 0
+    assert backend.breaker.failures == 0
+
+
+def test_cancelled_request_is_not_sent(llm_client):
+    cancel = threading.Event()
+    cancel.set()
+
+    with patch.object(llm_client.client.chat.completions, "create") as create:
+        with pytest.raises(RequestCancelledError):
+            llm_client.get_response([{"role": "user", "content": "Привет"}], cancel=cancel)
+
+    create.assert_not_called()
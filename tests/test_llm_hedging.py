@@ -0,0 +1,142 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.config import LLMBackendSettings
+from src.llm_client import LLMClient
+from src.llm_hedging import HedgePolicy, HedgeRace
+
+
+class FakeStream:
+    def __init__(self, parts: list[str], release: threading.Event | None = None):
+        self.parts = parts
+        self.release = release
+        self.closed = False
+
+    def __iter__(self):
+        if self.release:
+            self.release.wait(5)
+        for part in self.parts:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def prompt_file(tmp_path):
+    prompt_file = tmp_path / "prompt.txt"
+    prompt_file.write_text("Промпт")
+    return str(prompt_file)
+
+
+def make_client(prompt_file: str, policy: HedgePolicy) -> LLMClient:
+    return LLMClient(
+        base_url="http://unused/v1",
+        model="test-model",
+        system_prompt_file=prompt_file,
+        backends=[
+            LLMBackendSettings(base_url="http://node1/v1", model="test-model"),
+            LLMBackendSettings(base_url="http://node2/v1", model="test-model"),
+        ],
+        hedge_policy=policy,
+    )
+
+
+def warmed_policy(latency: float, **kwargs) -> HedgePolicy:
+    policy = HedgePolicy(min_samples=5, **kwargs)
+    for _ in range(5):
+        policy.record(latency)
+    return policy
+
+
+def test_delay_requires_samples():
+    policy = HedgePolicy(min_samples=3, min_delay=0.5)
+    policy.record(0.1)
+    assert policy.delay() is None
+
+    policy.record(0.2)
+    policy.record(2.0)
+    assert policy.delay() == 2.0
+
+
+def test_delay_has_floor():
+    assert warmed_policy(0.01, min_delay=0.3).delay() == 0.3
+
+
+def test_budget_limits_hedges():
+    policy = HedgePolicy(budget=0.5)
+
+    policy.start_request()
+    assert policy.try_hedge() is False
+    policy.start_request()
+    assert policy.try_hedge() is True
+    assert policy.try_hedge() is False
+
+
+def test_race_first_claim_wins():
+    race = HedgeRace()
+    first, second = object(), object()
+
+    assert race.claim(first) is True
+    assert race.claim(second) is False
+    assert race.is_winner(first)
+
+
+def test_stream_without_hedge(prompt_file):
+    client = make_client(prompt_file, HedgePolicy())
+    backend = client.pool.backends[0]
+
+    with patch.object(
+        backend.client.chat.completions, "create", return_value=FakeStream(["При", "вет"])
+    ) as mock_create:
+        response = client.get_response([{"role": "user", "content": "Привет"}])
+
+    assert response == "Привет"
+    assert mock_create.call_args[1]["stream"] is True
+    assert backend.outstanding == 0
+
+
+def test_stalled_request_is_hedged(prompt_file):
+    policy = warmed_policy(0.05, min_delay=0.05, budget=1.0)
+    client = make_client(prompt_file, policy)
+    first, second = client.pool.backends
+    release = threading.Event()
+    stalled = FakeStream(["медленно"], release)
+
+    with (
+        patch.object(first.client.chat.completions, "create", return_value=stalled),
+        patch.object(second.client.chat.completions, "create", return_value=FakeStream(["быстро"])),
+    ):
+        response = client.get_response([{"role": "user", "content": "Привет"}])
+        release.set()
+        client._hedge_executor.shutdown(wait=True)
+
+    assert response == "быстро"
+    # Проигравший запрос прерван и не считается ошибкой бэкенда
+    assert stalled.closed
+    assert first.outstanding == 0
+    assert first.breaker.failures == 0
+
+
+def test_no_hedge_without_budget(prompt_file):
+    policy = warmed_policy(0.05, min_delay=0.05, budget=0.0)
+    client = make_client(prompt_file, policy)
+    first, second = client.pool.backends
+    release = threading.Event()
+    threading.Timer(0.2, release.set).start()
+
+    with (
+        patch.object(
+            first.client.chat.completions,
+            "create",
+            return_value=FakeStream(["медленно"], release),
+        ),
+        patch.object(second.client.chat.completions, "create") as second_create,
+    ):
+        response = client.get_response([{"role": "user", "content": "Привет"}])
+
+    assert response == "медленно"
+    second_create.assert_not_called()
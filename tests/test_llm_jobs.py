@@ -0,0 +1,303 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import openai
+import pytest
+import pytest_asyncio
+
+from src.database import DatabaseManager
+from src.llm_client import LLMClient, RequestCancelledError
+from src.llm_jobs import ERROR_REPLY, LLMJobQueue, LLMWorker
+from src.llm_retry import RetryPolicy
+from src.session_manager import SessionManager
+
+
+@pytest_asyncio.fixture
+async def db():
+    db_manager = DatabaseManager(":memory:")
+    await db_manager.connect()
+
+    await db_manager.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE llm_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at TEXT NOT NULL,
+            lease_token TEXT NULL,
+            lease_until TEXT NULL,
+            error TEXT NULL,
+            response TEXT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+
+    yield db_manager
+    await db_manager.close()
+
+
+@pytest.fixture
+def llm_client():
+    return MagicMock(spec=LLMClient)
+
+
+@pytest.fixture
+def bot():
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    return bot
+
+
+def make_worker(db, llm_client, bot, **queue_options):
+    queue = LLMJobQueue(db, **queue_options)
+    return LLMWorker(queue, SessionManager(db), llm_client, bot)
+
+
+@pytest.mark.asyncio
+async def test_worker_answers_queued_turn(db, llm_client, bot):
+    llm_client.get_response.return_value = "Ответ"
+    worker = make_worker(db, llm_client, bot)
+    await worker.session_manager.add_message(123, "user", "Привет")
+    await worker.queue.enqueue(123, 456)
+
+    assert await worker.run_once() is True
+
+    llm_client.get_response.assert_called_once()
+    assert llm_client.get_response.call_args[0] == ([{"role": "user", "content": "Привет"}],)
+    bot.send_message.assert_called_once_with(456, "Ответ")
+    session = await worker.session_manager.get_session(123)
+    assert session[-1] == {"role": "assistant", "content": "Ответ"}
+    assert await db.fetchone("SELECT * FROM llm_jobs") is None
+    assert await worker.run_once() is False
+
+
+@pytest.mark.asyncio
+async def test_claim_keeps_per_user_order(db):
+    queue = LLMJobQueue(db)
+    await queue.enqueue(1, 1)
+    await queue.enqueue(1, 1)
+    await queue.enqueue(2, 2)
+
+    first = await queue.claim()
+    second = await queue.claim()
+
+    assert (first["id"], first["telegram_id"]) == (1, 1)
+    assert (second["id"], second["telegram_id"]) == (3, 2)
+    assert await queue.claim() is None
+
+    await queue.complete(first)
+    third = await queue.claim()
+    assert third["id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(db):
+    queue = LLMJobQueue(db, max_attempts=2, reclaim_interval=0.0)
+    await queue.enqueue(1, 1)
+    job = await queue.claim()
+
+    await db.execute("UPDATE llm_jobs SET lease_until = '2000-01-01T00:00:00'")
+    reclaimed = await queue.claim()
+
+    assert reclaimed["id"] == job["id"]
+    assert reclaimed["attempts"] == 2
+    # Устаревший воркер не может завершить задание, выданное другому
+    await queue.complete(job)
+    assert (await queue.stats())["running"] == 1
+
+    await db.execute("UPDATE llm_jobs SET lease_until = '2000-01-01T00:00:00'")
+    assert await queue.claim() is None
+    assert (await queue.stats())["dead"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_job_retries_then_dead_letters(db, llm_client, bot):
+    llm_client.get_response.side_effect = RuntimeError("LLM недоступна")
+    worker = make_worker(db, llm_client, bot, max_attempts=2, retry_delay=0.0)
+    await worker.queue.enqueue(123, 456)
+
+    await worker.run_once()
+    job = await db.fetchone("SELECT * FROM llm_jobs")
+    assert (job["status"], job["attempts"], job["error"]) == ("queued", 1, "LLM недоступна")
+    bot.send_message.assert_not_called()
+
+    await worker.run_once()
+    job = await db.fetchone("SELECT * FROM llm_jobs")
+    assert job["status"] == "dead"
+    bot.send_message.assert_called_once_with(456, ERROR_REPLY)
+
+    stats = await worker.queue.stats()
+    assert stats == {
+        "queued": 0,
+        "running": 0,
+        "delivering": 0,
+        "dead": 1,
+        "oldest_queued_age": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_expired_last_attempt_not_reissued_between_reclaims(db):
+    queue = LLMJobQueue(db, max_attempts=1)
+    await queue.enqueue(1, 1)
+    await queue.claim()
+
+    await db.execute("UPDATE llm_jobs SET lease_until = '2000-01-01T00:00:00'")
+
+    assert await queue.claim() is None
+    assert (await queue.stats())["running"] == 1
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_error_dead_letters_immediately(db, llm_client, bot):
+    request = httpx.Request("POST", "http://test.api/v1/chat/completions")
+    llm_client.get_response.side_effect = openai.BadRequestError(
+        "context too long", response=httpx.Response(400, request=request), body=None
+    )
+    llm_client.retry_policy = RetryPolicy()
+    worker = make_worker(db, llm_client, bot, max_attempts=3)
+    await worker.queue.enqueue(123, 456)
+
+    await worker.run_once()
+
+    job = await db.fetchone("SELECT * FROM llm_jobs")
+    assert (job["status"], job["attempts"]) == ("dead", 1)
+    bot.send_message.assert_called_once_with(456, ERROR_REPLY)
+
+
+@pytest.mark.asyncio
+async def test_idle_worker_backs_off_polling(db, llm_client, bot, monkeypatch):
+    worker = make_worker(db, llm_client, bot)
+    worker.poll_interval = 0.5
+    worker.max_poll_interval = 2.0
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        # Нулевые паузы - уступки event loop при отправке ответа
+        if not delay:
+            return await real_sleep(0)
+        delays.append(delay)
+        if len(delays) == 4:
+            await worker.queue.enqueue(123, 456)
+        if len(delays) == 5:
+            raise asyncio.CancelledError
+
+    llm_client.get_response.return_value = "Ответ"
+    monkeypatch.setattr("src.llm_jobs.asyncio.sleep", sleep)
+    with pytest.raises(asyncio.CancelledError):
+        await worker._run_loop()
+
+    assert delays == [0.5, 1.0, 2.0, 2.0, 0.5]
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_retried_without_regeneration(db, llm_client, bot):
+    llm_client.get_response.return_value = "Ответ"
+    bot.send_message.side_effect = [RuntimeError("Telegram недоступен"), None]
+    worker = make_worker(db, llm_client, bot, retry_delay=0.0)
+    await worker.session_manager.add_message(123, "user", "Привет")
+    await worker.queue.enqueue(123, 456)
+
+    await worker.run_once()
+    job = await db.fetchone("SELECT * FROM llm_jobs")
+    assert (job["status"], job["response"]) == ("delivering", "Ответ")
+    assert (await worker.queue.stats())["delivering"] == 1
+
+    await worker.run_once()
+
+    llm_client.get_response.assert_called_once()
+    assert bot.send_message.call_count == 2
+    bot.send_message.assert_called_with(456, "Ответ")
+    assert await db.fetchone("SELECT * FROM llm_jobs") is None
+    session = await worker.session_manager.get_session(123)
+    assert session == [
+        {"role": "user", "content": "Привет"},
+        {"role": "assistant", "content": "Ответ"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_crash_before_delivery_keeps_response(db):
+    queue = LLMJobQueue(db)
+    await queue.enqueue(1, 1)
+    await queue.enqueue(1, 1)
+    job = await queue.claim()
+    await queue.deliver(job, "Ответ")
+
+    # Следующее задание пользователя ждет доставки предыдущего ответа
+    assert await queue.claim() is None
+    await db.execute("UPDATE llm_jobs SET lease_until = '2000-01-01T00:00:00' WHERE id = 1")
+    reclaimed = await queue.claim()
+
+    assert (reclaimed["id"], reclaimed["status"]) == (1, "delivering")
+    assert reclaimed["response"] == "Ответ"
+
+
+@pytest.mark.asyncio
+async def test_stats_report_oldest_queued_age(db):
+    queue = LLMJobQueue(db)
+    await queue.enqueue(1, 1)
+    await db.execute("UPDATE llm_jobs SET created_at = '2000-01-01T00:00:00'")
+
+    stats = await queue.stats()
+
+    assert stats["queued"] == 1
+    assert stats["oldest_queued_age"] > 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_aborts_generation(db, llm_client, bot):
+    started = threading.Event()
+
+    def generate(session, cancel):
+        started.set()
+        assert cancel.wait(5)
+        raise RequestCancelledError("Запрос отменен")
+
+    llm_client.get_response.side_effect = generate
+    worker = make_worker(db, llm_client, bot)
+    worker.cancel_check_interval = 0.01
+    await worker.queue.enqueue(123, 456)
+
+    run = asyncio.create_task(worker.run_once())
+    await asyncio.to_thread(started.wait, 5)
+    await worker.queue.cancel(123)
+
+    assert await run is True
+    bot.send_message.assert_not_called()
+    session = await worker.session_manager.get_session(123)
+    assert session == []
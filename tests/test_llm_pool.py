@@ -0,0 +1,130 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.llm_backend import LLMBackend
+from src.llm_pool import LLMBackendPool, NoBackendAvailableError
+
+
+@pytest.fixture
+def backends():
+    return [
+        LLMBackend("http://node1/v1", "small"),
+        LLMBackend("http://node2/v1", "small"),
+        LLMBackend("http://node3/v1", "large"),
+    ]
+
+
+def test_acquire_prefers_least_outstanding(backends):
+    pool = LLMBackendPool(backends)
+
+    first = pool.acquire(model="small")
+    second = pool.acquire(model="small")
+
+    assert {first, second} == {backends[0], backends[1]}
+    assert first.outstanding == second.outstanding == 1
+
+
+def test_acquire_respects_weight_and_latency(backends):
+    pool = LLMBackendPool(backends)
+    backends[0].weight = 4.0
+    backends[1].ewma_latency = 5.0
+
+    chosen = [pool.acquire(model="small") for _ in range(3)]
+
+    assert chosen == [backends[0]] * 3
+
+
+def test_acquire_uses_preferred_backend(backends):
+    pool = LLMBackendPool(backends)
+    backends[1].ewma_latency = 5.0
+
+    assert pool.acquire(model="small", preferred=backends[1]) is backends[1]
+    # Недоступный предпочтительный бэкенд заменяется лучшим из остальных
+    assert pool.acquire(model="small", exclude=[backends[1]], preferred=backends[1]) is backends[0]
+
+
+def test_acquire_excludes_failed_backend(backends):
+    pool = LLMBackendPool(backends)
+
+    assert pool.acquire(model="small", exclude=[backends[0]]) is backends[1]
+    assert pool.acquire(model="large", exclude=[backends[2]]) is backends[2]
+
+
+def test_release_updates_ewma(backends):
+    pool = LLMBackendPool(backends)
+    backend = pool.acquire(model="large")
+
+    pool.release(backend, succeeded=True, latency=2.0)
+    backend = pool.acquire(model="large")
+    pool.release(backend, succeeded=True, latency=4.0)
+
+    assert backend.outstanding == 0
+    assert backend.ewma_latency == pytest.approx(2.6)
+
+
+def test_failures_open_breaker_and_readmit(backends):
+    pool = LLMBackendPool(backends)
+    backend = backends[2]
+    backend.breaker.failure_threshold = 2
+    backend.breaker.reset_timeout = 10.0
+
+    with patch("src.llm_pool.time.monotonic", return_value=100.0):
+        for _ in range(2):
+            pool.release(pool.acquire(model="large"), succeeded=False)
+        with pytest.raises(NoBackendAvailableError):
+            pool.acquire(model="large")
+
+    # После паузы бэкенд получает пробный запрос; ошибка снова размыкает вдвое дольше
+    with patch("src.llm_pool.time.monotonic", return_value=111.0):
+        assert pool.acquire(model="large") is backend
+        with pytest.raises(NoBackendAvailableError):
+            pool.acquire(model="large")
+        pool.release(backend, succeeded=False)
+    assert backend.breaker.open_until == 131.0
+
+
+def test_abandon_does_not_count_failure(backends):
+    pool = LLMBackendPool(backends)
+    backend = pool.acquire(model="large")
+
+    pool.abandon(backend)
+
+    assert backend.outstanding == 0
+    assert backend.breaker.failures == 0
+
+
+def test_states_report_breaker(backends):
+    pool = LLMBackendPool(backends)
+    backends[0].breaker.trip(time.monotonic())
+
+    states = {state["name"]: state["state"] for state in pool.states()}
+
+    assert states == {
+        "small@http://node1/v1": "open",
+        "small@http://node2/v1": "closed",
+        "large@http://node3/v1": "closed",
+    }
+
+
+def test_health_check_ejects_and_readmits(backends):
+    pool = LLMBackendPool(backends[:1])
+    backend = backends[0]
+    failing = RuntimeError("connection refused")
+
+    with patch.object(backend.client, "with_options") as with_options:
+        with_options.return_value.models.list.side_effect = failing
+        pool.check_health()
+        assert backend.breaker.state(time.monotonic()) == "open"
+
+        with_options.return_value.models.list.side_effect = None
+        pool.check_health()
+
+    assert backend.breaker.state(time.monotonic()) == "closed"
+    assert pool.acquire() is backend
+
+
+def test_empty_pool_rejected():
+    with pytest.raises(ValueError):
+        LLMBackendPool([])
@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+
+from src.llm_retry import RetryPolicy
+
+
+def status_error(status_code: int, headers: dict | None = None) -> openai.APIStatusError:
+    request = httpx.Request("POST", "http://test.api/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+@pytest.mark.parametrize(
+    ("status_code", "retryable"),
+    [(400, False), (401, False), (403, False), (404, False), (422, False)]
+    + [(408, True), (429, True), (500, True), (503, True)],
+)
+def test_status_classification(status_code, retryable):
+    assert RetryPolicy().is_retryable(status_error(status_code)) is retryable
+
+
+def test_connection_errors_are_retryable():
+    request = httpx.Request("POST", "http://test.api/v1")
+    policy = RetryPolicy()
+
+    assert policy.is_retryable(openai.APIConnectionError(request=request))
+    assert policy.is_retryable(openai.APITimeoutError(request=request))
+    assert not policy.is_retryable(ValueError("bug"))
+
+
+def test_backoff_full_jitter_bounds():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+
+    with patch("src.llm_retry.random.uniform", side_effect=lambda low, high: high):
+        assert policy.backoff(1, ValueError()) == 1.0
+        assert policy.backoff(3, ValueError()) == 4.0
+        assert policy.backoff(10, ValueError()) == 5.0
+
+
+def test_retry_after_formats():
+    policy = RetryPolicy()
+
+    assert policy.retry_after(status_error(429, {"retry-after": "7"})) == 7.0
+    assert policy.retry_after(status_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert (
+        policy.retry_after(status_error(503, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}))
+        == 0.0
+    )
+    assert policy.retry_after(status_error(503, {"retry-after": "soon"})) is None
+    assert policy.retry_after(status_error(503)) is None
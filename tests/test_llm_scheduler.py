@@ -0,0 +1,199 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.llm_backend import LLMBackend
+from src.llm_pool import NoBackendAvailableError
+from src.llm_scheduler import (
+    ADMIN,
+    BACKGROUND,
+    INTERACTIVE,
+    LLMScheduler,
+    estimate_cost,
+)
+
+
+def make_scheduler(quantum=100, models=("small",)):
+    llm_client = MagicMock()
+    llm_client.pool.backends = [LLMBackend(f"http://{model}/v1", model) for model in models]
+    llm_client.router.route.return_value = ("default", None)
+    return LLMScheduler(llm_client, concurrency_per_backend=1, quantum=quantum)
+
+
+def wait_gate(gate, backend):
+    gate.wait()
+
+
+def record(order, name, backend):
+    order.append(name)
+
+
+async def run_with_blocked_slot(scheduler, submissions):
+    # Единственный слот занят, пока все запросы не встанут в очередь
+    gate = threading.Event()
+    order = []
+    blocker = asyncio.create_task(scheduler.submit(ADMIN, "blocker", 1, wait_gate, gate))
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(scheduler.submit(priority, key, cost, record, order, name))
+        for priority, key, cost, name in submissions
+    ]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(blocker, *tasks)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_fair_queuing_between_users():
+    scheduler = make_scheduler()
+
+    order = await run_with_blocked_slot(
+        scheduler,
+        [
+            (INTERACTIVE, 1, 100, "a1"),
+            (INTERACTIVE, 1, 100, "a2"),
+            (INTERACTIVE, 1, 100, "a3"),
+            (INTERACTIVE, 2, 100, "b1"),
+        ],
+    )
+
+    assert order == ["a1", "b1", "a2", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_interactive_before_background():
+    scheduler = make_scheduler()
+
+    order = await run_with_blocked_slot(
+        scheduler,
+        [
+            (BACKGROUND, "job", 10, "background"),
+            (ADMIN, "session", 10, "admin"),
+            (INTERACTIVE, 1, 10, "interactive"),
+        ],
+    )
+
+    assert order == ["interactive", "admin", "background"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_is_skipped():
+    scheduler = make_scheduler()
+    gate = threading.Event()
+    calls = []
+    blocker = asyncio.create_task(scheduler.submit(ADMIN, "blocker", 1, wait_gate, gate))
+    waiting = asyncio.create_task(scheduler.submit(INTERACTIVE, 1, 10, record, calls, "x"))
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    gate.set()
+    await blocker
+
+    assert calls == []
+    assert scheduler.running == 0
+    assert scheduler.stats()[0]["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_response_passes_arguments_and_errors():
+    scheduler = make_scheduler()
+    scheduler.llm_client.get_response.return_value = "Ответ"
+
+    messages = [{"role": "user", "content": "Привет"}]
+    response = await scheduler.get_response(ADMIN, "session", messages, "Промпт", "admin")
+
+    assert response == "Ответ"
+    args, kwargs = scheduler.llm_client.get_response.call_args
+    assert args == (messages, "Промпт", "admin")
+    assert not kwargs["cancel"].is_set()
+    assert kwargs["backend"] is scheduler.llm_client.pool.backends[0]
+    scheduler.llm_client.router.route.assert_called_once_with(messages, "admin")
+
+    scheduler.llm_client.get_response.side_effect = RuntimeError("LLM недоступна")
+    with pytest.raises(RuntimeError):
+        await scheduler.get_response(INTERACTIVE, 1, messages)
+    assert scheduler.running == 0
+
+    stats = {item["priority"]: item for item in scheduler.stats()}
+    assert stats[ADMIN]["dispatched"] == 1
+    assert stats[ADMIN]["p50_wait"] is not None
+    assert stats[BACKGROUND]["p50_wait"] is None
+
+
+@pytest.mark.asyncio
+async def test_cancelling_caller_aborts_running_request():
+    scheduler = make_scheduler()
+    started = threading.Event()
+
+    def generate(messages, cancel, backend, routed):
+        started.set()
+        assert cancel.wait(5)
+        raise RuntimeError("Отменено")
+
+    scheduler.llm_client.get_response.side_effect = generate
+    request = asyncio.create_task(
+        scheduler.get_response(INTERACTIVE, 1, [{"role": "user", "content": "Привет"}])
+    )
+    await asyncio.to_thread(started.wait, 5)
+
+    request.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+    while scheduler.running:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limited_per_backend():
+    scheduler = make_scheduler(models=("small", "big"))
+    gate = threading.Event()
+    backends = []
+
+    def hold(backend):
+        backends.append(backend.model)
+        gate.wait()
+
+    # Слот "big" занят: второй запрос к "big" ждет, запрос к "small" идет сразу
+    first = asyncio.create_task(scheduler.submit(INTERACTIVE, 1, 1, hold, model="big"))
+    second = asyncio.create_task(scheduler.submit(INTERACTIVE, 2, 1, hold, model="big"))
+    third = asyncio.create_task(scheduler.submit(INTERACTIVE, 3, 1, hold, model="small"))
+    await asyncio.sleep(0)
+
+    assert scheduler.running == 2
+    assert {backend.model: running for backend, running in scheduler.backend_running.items()} == {
+        "small": 1,
+        "big": 1,
+    }
+    assert scheduler.stats()[0]["queued"] == 1
+
+    gate.set()
+    await asyncio.gather(first, second, third)
+    assert sorted(backends) == ["big", "big", "small"]
+    assert scheduler.running == 0
+
+
+@pytest.mark.asyncio
+async def test_unserved_model_fails_fast():
+    scheduler = make_scheduler(models=("small",))
+
+    with pytest.raises(NoBackendAvailableError):
+        await scheduler.submit(INTERACTIVE, 1, 1, wait_gate, threading.Event(), model="big")
+    assert scheduler.stats()[0]["queued"] == 0
+
+
+def test_estimate_cost_counts_text_and_images():
+    messages = [
+        {"role": "user", "content": "Привет"},
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "Фото"},
+                {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}},
+            ],
+        },
+    ]
+
+    assert estimate_cost(messages) == len("Привет") + len("Фото") + 1000
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.loop_monitor import LoopMonitor
+from src.outbox import Outbox
+
+
+def blocking_call():
+    time.sleep(0.2)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_detected_with_stack():
+    async with LoopMonitor(interval=0.01, block_threshold=0.05, debug=True) as monitor:
+        await asyncio.sleep(0.02)
+        blocking_call()
+        await asyncio.sleep(0.02)
+
+    assert len(monitor.blocks) == 1
+    block = monitor.blocks[0]
+    assert block["lag"] >= 0.15
+    assert "blocking_call" in block["stack"]
+
+
+@pytest.mark.asyncio
+async def test_block_at_end_of_checked_code_counted():
+    async with LoopMonitor(interval=0.01, block_threshold=0.05) as monitor:
+        blocking_call()
+
+    assert len(monitor.blocks) == 1
+    assert monitor.blocks[0]["stack"] is None
+
+
+@pytest.mark.asyncio
+async def test_outbox_send_never_blocks():
+    send = AsyncMock()
+    outbox = Outbox(chat_burst=10)
+
+    async with LoopMonitor(interval=0.005, block_threshold=0.05, debug=True) as monitor:
+        await outbox.send(1, "Предложение. " * 1000, send)
+
+    assert list(monitor.blocks) == []
+
+
+@pytest.mark.asyncio
+async def test_lag_histogram():
+    async with LoopMonitor(interval=0.005, block_threshold=1.0) as monitor:
+        await asyncio.sleep(0.05)
+        blocking_call()
+
+    stats = monitor.stats()
+
+    assert stats["samples"] == sum(stats["buckets"].values())
+    assert stats["buckets"]["0.5"] == 1
+    assert stats["max_lag"] >= 0.15
+    assert stats["p50_lag"] <= 0.05
+    assert stats["p99_lag"] == stats["max_lag"]
+    assert monitor.recent_lag == stats["max_lag"]
+
+
+@pytest.mark.asyncio
+async def test_block_logging_rate_limited(caplog):
+    with caplog.at_level(logging.WARNING, logger="src.loop_monitor"):
+        async with LoopMonitor(interval=0.01, block_threshold=0.02) as monitor:
+            for _ in range(3):
+                time.sleep(0.05)
+                await asyncio.sleep(0.02)
+
+    assert len(monitor.blocks) == 3
+    assert len(caplog.records) == 1
@@ -22,6 +22,26 @@ async def test_main_initialization(tmp_path):
         mock_config_instance.llm_model = "test-model"
         mock_config_instance.system_prompt_file = str(prompt_file)
         mock_config_instance.database_path = "aidialogs.db"
+        mock_config_instance.archive_after_days = 0
+        mock_config_instance.retention_after_days = 0
+        mock_config_instance.backup_interval_hours = 0
+        mock_config_instance.llm_backends = []
+        mock_config_instance.llm_health_check_interval = 0
+        mock_config_instance.llm_hedge_enabled = False
+        mock_config_instance.llm_attempt_timeout = 60.0
+        mock_config_instance.llm_request_deadline = 120.0
+        mock_config_instance.llm_routes = []
+        mock_config_instance.llm_concurrency_per_backend = 4
+        mock_config_instance.llm_scheduler_quantum = 2000
+        mock_config_instance.llm_job_queue_enabled = False
+        mock_config_instance.embedding_model = ""
+        mock_config_instance.image_descriptions_enabled = False
+        mock_config_instance.media_cache_max_mb = 0
+        mock_config_instance.telegram_send_rate = 30.0
+        mock_config_instance.telegram_chat_send_rate = 1.0
+        mock_config_instance.telegram_send_workers = 8
+        mock_config_instance.rate_limit_enabled = False
+        mock_config_instance.loop_monitor_enabled = False
         mock_config.return_value = mock_config_instance
 
         mock_db_instance = MagicMock()
@@ -45,6 +65,11 @@ async def test_main_initialization(tmp_path):
             base_url="http://test.api/v1",
             model="test-model",
             system_prompt_file=str(prompt_file),
+            backends=[],
+            hedge_policy=None,
+            attempt_timeout=60.0,
+            request_deadline=120.0,
+            routes=[],
         )
         mock_bot.assert_called_once()
         mock_bot_instance.start.assert_called_once()
@@ -66,6 +91,26 @@ async def test_main_keyboard_interrupt():
         mock_config_instance.llm_model = "test-model"
         mock_config_instance.system_prompt_file = "prompts/system_prompt.txt"
         mock_config_instance.database_path = "aidialogs.db"
+        mock_config_instance.archive_after_days = 0
+        mock_config_instance.retention_after_days = 0
+        mock_config_instance.backup_interval_hours = 0
+        mock_config_instance.llm_backends = []
+        mock_config_instance.llm_health_check_interval = 0
+        mock_config_instance.llm_hedge_enabled = False
+        mock_config_instance.llm_attempt_timeout = 60.0
+        mock_config_instance.llm_request_deadline = 120.0
+        mock_config_instance.llm_routes = []
+        mock_config_instance.llm_concurrency_per_backend = 4
+        mock_config_instance.llm_scheduler_quantum = 2000
+        mock_config_instance.llm_job_queue_enabled = False
+        mock_config_instance.embedding_model = ""
+        mock_config_instance.image_descriptions_enabled = False
+        mock_config_instance.media_cache_max_mb = 0
+        mock_config_instance.telegram_send_rate = 30.0
+        mock_config_instance.telegram_chat_send_rate = 1.0
+        mock_config_instance.telegram_send_workers = 8
+        mock_config_instance.rate_limit_enabled = False
+        mock_config_instance.loop_monitor_enabled = False
         mock_config.return_value = mock_config_instance
 
         mock_db_instance = MagicMock()
@@ -101,6 +146,26 @@ async def test_main_exception_handling():
         mock_config_instance.llm_model = "test-model"
         mock_config_instance.system_prompt_file = "prompts/system_prompt.txt"
         mock_config_instance.database_path = "aidialogs.db"
+        mock_config_instance.archive_after_days = 0
+        mock_config_instance.retention_after_days = 0
+        mock_config_instance.backup_interval_hours = 0
+        mock_config_instance.llm_backends = []
+        mock_config_instance.llm_health_check_interval = 0
+        mock_config_instance.llm_hedge_enabled = False
+        mock_config_instance.llm_attempt_timeout = 60.0
+        mock_config_instance.llm_request_deadline = 120.0
+        mock_config_instance.llm_routes = []
+        mock_config_instance.llm_concurrency_per_backend = 4
+        mock_config_instance.llm_scheduler_quantum = 2000
+        mock_config_instance.llm_job_queue_enabled = False
+        mock_config_instance.embedding_model = ""
+        mock_config_instance.image_descriptions_enabled = False
+        mock_config_instance.media_cache_max_mb = 0
+        mock_config_instance.telegram_send_rate = 30.0
+        mock_config_instance.telegram_chat_send_rate = 1.0
+        mock_config_instance.telegram_send_workers = 8
+        mock_config_instance.rate_limit_enabled = False
+        mock_config_instance.loop_monitor_enabled = False
         mock_config.return_value = mock_config_instance
 
         mock_db_instance = MagicMock()
@@ -0,0 +1,110 @@
+import asyncio
+import io
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.media_cache import MediaCache
+
+
+@pytest.fixture
+def bot():
+    bot = MagicMock()
+    bot.get_file = AsyncMock(side_effect=lambda file_id: SimpleNamespace(file_path=file_id))
+    bot.download_file = AsyncMock(
+        side_effect=lambda file_path: io.BytesIO(f"data-{file_path}".encode())
+    )
+    return bot
+
+
+def photo(unique_id, file_id=None):
+    return SimpleNamespace(file_unique_id=unique_id, file_id=file_id or f"file-{unique_id}")
+
+
+@pytest.mark.asyncio
+async def test_repeated_photo_downloaded_once(bot, tmp_path):
+    cache = MediaCache(str(tmp_path), max_bytes=1024)
+
+    first = await cache.download(bot, photo("abc", "file-1"))
+    # Пересланное фото приходит с другим file_id
+    second = await cache.download(bot, photo("abc", "file-2"))
+
+    assert first == second == b"data-file-1"
+    bot.get_file.assert_called_once_with("file-1")
+    bot.download_file.assert_called_once()
+    assert cache.stats()["hits"] == 1
+    assert (tmp_path / "abc").read_bytes() == b"data-file-1"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_downloads_share_request(bot, tmp_path):
+    cache = MediaCache(str(tmp_path), max_bytes=1024)
+
+    results = await asyncio.gather(*(cache.download(bot, photo("abc")) for _ in range(3)))
+
+    assert results == [b"data-file-abc"] * 3
+    bot.get_file.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_evicted(bot, tmp_path):
+    # Каждый файл занимает 13 байт, в кэш помещаются два
+    cache = MediaCache(str(tmp_path), max_bytes=30)
+
+    await cache.download(bot, photo("aaa"))
+    await cache.download(bot, photo("bbb"))
+    await cache.download(bot, photo("aaa"))
+    await cache.download(bot, photo("ccc"))
+
+    assert sorted(os.listdir(tmp_path)) == ["aaa", "ccc"]
+    assert cache.stats()["bytes"] == 26
+
+
+@pytest.mark.asyncio
+async def test_entry_evicted_during_read(bot, tmp_path, monkeypatch):
+    cache = MediaCache(str(tmp_path), max_bytes=15)
+    await cache.download(bot, photo("aaa"))
+    reading = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_to_thread(func, *args):
+        result = func(*args)
+        if func == cache._read:
+            reading.set()
+            await release.wait()
+        return result
+
+    monkeypatch.setattr("src.media_cache.asyncio.to_thread", slow_to_thread)
+    hit = asyncio.create_task(cache.download(bot, photo("aaa")))
+    await reading.wait()
+    # Вторая загрузка вытесняет файл, который сейчас читается
+    await cache.download(bot, photo("bbb"))
+    release.set()
+
+    assert await hit == b"data-file-aaa"
+    assert list(cache._entries) == ["bbb"]
+    assert cache.stats()["bytes"] == 13
+
+
+@pytest.mark.asyncio
+async def test_cache_restored_after_restart(bot, tmp_path):
+    await MediaCache(str(tmp_path), max_bytes=1024).download(bot, photo("abc"))
+
+    cache = MediaCache(str(tmp_path), max_bytes=1024)
+    data = await cache.download(bot, photo("abc"))
+
+    assert data == b"data-file-abc"
+    bot.get_file.assert_called_once()
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unsafe_id_bypasses_cache(bot, tmp_path):
+    cache = MediaCache(str(tmp_path), max_bytes=1024)
+
+    await cache.download(bot, photo("../evil"))
+
+    assert os.listdir(tmp_path) == []
+    bot.get_file.assert_called_once()
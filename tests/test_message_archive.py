@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from src.api.real_stat_collector import RealStatCollector
+from src.database import DatabaseManager
+from src.message_archive import MessageArchive
+
+
+@pytest_asyncio.fixture
+async def db():
+    db_manager = DatabaseManager(":memory:")
+    await db_manager.connect()
+
+    await db_manager.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE VIRTUAL TABLE messages_fts USING fts5(
+            content,
+            content='messages',
+            content_rowid='id'
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+
+    await db_manager.execute("""
+        CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE user_stats (
+            user_id INTEGER PRIMARY KEY,
+            message_count INTEGER NOT NULL,
+            total_length INTEGER NOT NULL,
+            image_count INTEGER NOT NULL,
+            first_message_at TEXT NOT NULL,
+            last_message_at TEXT NOT NULL
+        )
+    """)
+
+    yield db_manager
+    await db_manager.close()
+
+
+@pytest.fixture
+def archive(db, tmp_path):
+    return MessageArchive(db, str(tmp_path / "archive"), batch_size=2)
+
+
+async def insert_message(
+    db: DatabaseManager, user_id: int, content: str, days_ago: int, deleted: bool = False
+) -> None:
+    created_at = (datetime.utcnow() - timedelta(days=days_ago)).isoformat()
+    await db.execute(
+        "INSERT INTO messages (user_id, role, content, length, created_at, deleted_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (user_id, "user", content, len(content), created_at, created_at if deleted else None),
+    )
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_old_and_deleted_messages(db, archive):
+    await insert_message(db, 1, "old", days_ago=40)
+    await insert_message(db, 1, "older", days_ago=41)
+    await insert_message(db, 2, "deleted", days_ago=0, deleted=True)
+    await insert_message(db, 2, "fresh", days_ago=0)
+
+    archived = await archive.archive(older_than_days=30)
+
+    assert archived == 3
+    rows = await db.fetchall("SELECT content FROM messages")
+    assert rows == [{"content": "fresh"}]
+
+
+@pytest.mark.asyncio
+async def test_search_skips_archived_messages(db, archive):
+    await insert_message(db, 1, "кот старый", days_ago=40)
+    await insert_message(db, 1, "кот новый", days_ago=1)
+
+    await archive.archive(older_than_days=30)
+
+    rows = await db.fetchall("SELECT rowid FROM messages_fts WHERE messages_fts MATCH 'кот'")
+    assert [row["rowid"] for row in rows] == [2]
+
+
+@pytest.mark.asyncio
+async def test_read_messages_returns_archived_rows(db, archive):
+    await insert_message(db, 1, "old", days_ago=40)
+    await insert_message(db, 2, "deleted", days_ago=0, deleted=True)
+    await archive.archive(older_than_days=30)
+
+    messages = archive.read_messages()
+
+    assert [m["content"] for m in messages] == ["old", "deleted"]
+    assert messages[1]["deleted_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_read_messages_prunes_partitions_by_date(db, archive):
+    await insert_message(db, 1, "old", days_ago=40)
+    await insert_message(db, 1, "older", days_ago=60)
+    await archive.archive(older_than_days=30)
+
+    start_date = (datetime.utcnow() - timedelta(days=45)).date().isoformat()
+    messages = archive.read_messages(start_date=start_date)
+
+    assert [m["content"] for m in messages] == ["old"]
+
+
+@pytest.mark.asyncio
+async def test_daily_stats_ignores_deleted_messages(db, archive):
+    await insert_message(db, 1, "old", days_ago=40)
+    await insert_message(db, 2, "gone", days_ago=40, deleted=True)
+    await archive.archive(older_than_days=30)
+
+    stats = archive.daily_stats()
+
+    day = next(iter(stats.values()))
+    assert day["messages"] == 1
+    assert day["length_sum"] == 3
+    assert day["user_ids"] == {1}
+
+
+@pytest.mark.asyncio
+async def test_collector_merges_archive_into_stats(db, archive):
+    await db.execute(
+        "INSERT INTO users (telegram_id, created_at) VALUES (?, ?)",
+        (111, datetime.utcnow().isoformat()),
+    )
+    await insert_message(db, 1, "aaaa", days_ago=5)
+    await insert_message(db, 1, "bb", days_ago=0)
+    await archive.archive(older_than_days=3)
+
+    stats = await RealStatCollector(db, archive).get_stats(days=7)
+
+    assert stats.metrics.total_messages == 2
+    assert stats.metrics.avg_message_length == 3.0
+    assert [point.count for point in stats.activity_chart] == [1, 1]
+    assert stats.chart_data[0].active_users == 1
+    assert stats.chart_data[0].avg_length == 4.0
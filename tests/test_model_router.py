@@ -0,0 +1,71 @@
+from src.config import ModelRouteSettings
+from src.model_router import DEFAULT_ROUTE, ModelRouter
+
+
+def make_router():
+    return ModelRouter(
+        [
+            ModelRouteSettings(name="vision", model="vision-model", has_image=True),
+            ModelRouteSettings(name="admin", model="big-model", modes=["admin"]),
+            ModelRouteSettings(name="short", model="small-model", max_chars=20, max_history=3),
+        ],
+        default_model="base-model",
+    )
+
+
+def test_routes_short_message_to_small_model():
+    router = make_router()
+
+    assert router.route([{"role": "user", "content": "Привет"}]) == ("short", "small-model")
+
+
+def test_long_history_falls_back_to_default():
+    router = make_router()
+    messages = [
+        {"role": "user", "content": "Привет"},
+        {"role": "assistant", "content": "Здравствуйте"},
+        {"role": "user", "content": "Как дела?"},
+        {"role": "assistant", "content": "Хорошо"},
+        {"role": "user", "content": "Отлично"},
+    ]
+
+    assert router.route(messages) == (DEFAULT_ROUTE, "base-model")
+
+
+def test_routes_image_and_mode():
+    router = make_router()
+    image_message = {
+        "role": "user",
+        "content": [
+            {"type": "text", "text": "Что на фото?"},
+            {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}},
+        ],
+    }
+
+    assert router.route([image_message]) == ("vision", "vision-model")
+    assert router.route([{"role": "user", "content": "Сводка"}], mode="admin") == (
+        "admin",
+        "big-model",
+    )
+
+
+def test_stats_track_requests_errors_and_latency():
+    router = make_router()
+    for latency in (1.0, 2.0, 3.0):
+        name, _ = router.route([{"role": "user", "content": "Привет"}])
+        router.record(name, latency)
+    router.route([{"role": "user", "content": "Привет"}])
+    router.record("short", None)
+
+    stats = {item["name"]: item for item in router.stats()}
+
+    assert stats["short"] == {
+        "name": "short",
+        "model": "small-model",
+        "requests": 4,
+        "errors": 1,
+        "p50_latency": 2.0,
+        "p95_latency": 3.0,
+    }
+    assert stats[DEFAULT_ROUTE]["requests"] == 0
+    assert stats[DEFAULT_ROUTE]["p50_latency"] is None
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+
+from src.outbox import Outbox, TokenBucket, split_message
+
+
+def test_short_message_not_split():
+    assert split_message("Привет") == ["Привет"]
+
+
+def test_long_message_split_at_sentence_boundary():
+    text = "Первое предложение. " * 30 + "Хвост"
+
+    chunks = split_message(text, limit=100)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(chunk.endswith(".") for chunk in chunks[:-1])
+    assert " ".join(chunks) == text.strip()
+
+
+def test_paragraph_boundary_preferred():
+    text = "а" * 60 + ". " + "б" * 20 + "\n\n" + "в" * 50
+
+    assert split_message(text, limit=100) == ["а" * 60 + ". " + "б" * 20, "в" * 50]
+
+
+def test_text_without_boundaries_cut_hard():
+    assert split_message("x" * 250, limit=100) == ["x" * 100, "x" * 100, "x" * 50]
+
+
+def test_token_bucket_delays_after_burst():
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    now = bucket.updated
+
+    assert bucket.delay(now) == 0.0
+    assert bucket.delay(now) == 0.0
+    assert bucket.delay(now) == pytest.approx(0.5)
+    assert bucket.delay(now) == pytest.approx(1.0)
+    assert bucket.delay(now + 1.0) == pytest.approx(0.5)
+
+
+@pytest.mark.asyncio
+async def test_chunks_sent_in_order():
+    send = AsyncMock()
+    outbox = Outbox(chat_burst=10)
+
+    await outbox.send(1, "Первое предложение. " * 300, send)
+
+    chunks = [call.args[0] for call in send.call_args_list]
+    assert len(chunks) == 2
+    assert all(len(chunk) <= 4096 for chunk in chunks)
+
+
+@pytest.mark.asyncio
+async def test_per_chat_rate_limit():
+    send = AsyncMock()
+    outbox = Outbox(chat_rate=20.0, chat_burst=1)
+
+    started = time.monotonic()
+    await asyncio.gather(*(outbox.send(1, f"Ответ {i}", send) for i in range(3)))
+
+    assert time.monotonic() - started >= 0.09
+    assert [call.args[0] for call in send.call_args_list] == ["Ответ 0", "Ответ 1", "Ответ 2"]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_waits_and_resends():
+    send = AsyncMock(side_effect=[TelegramRetryAfter(method=None, message="", retry_after=0), None])
+    outbox = Outbox()
+
+    await outbox.send(1, "Ответ", send)
+
+    assert send.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_network_errors_give_up_after_max_attempts():
+    send = AsyncMock(side_effect=TelegramNetworkError(method=None, message="timeout"))
+    outbox = Outbox(max_attempts=2, retry_delay=0.0)
+
+    with pytest.raises(TelegramNetworkError):
+        await outbox.send(1, "Ответ", send)
+
+    assert send.call_count == 2
@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+
+from src.database import DatabaseManager
+from src.rate_limiter import RateLimiter, estimate_tokens, format_wait
+
+
+@pytest_asyncio.fixture
+async def db():
+    db_manager = DatabaseManager(":memory:")
+    await db_manager.connect()
+
+    await db_manager.execute("""
+        CREATE TABLE rate_limits (
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            budget TEXT NOT NULL,
+            level REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (scope, key, budget)
+        )
+    """)
+
+    yield db_manager
+    await db_manager.close()
+
+
+@pytest.fixture
+def clock():
+    with patch("src.rate_limiter.time.time") as time_mock:
+        time_mock.return_value = 1000.0
+        yield time_mock
+
+
+def test_message_budget_allows_burst_then_throttles(clock):
+    limiter = RateLimiter("bot", messages_per_minute=2)
+
+    assert limiter.check("1") == 0.0
+    assert limiter.check("1") == 0.0
+    assert limiter.check("1") == pytest.approx(30.0)
+    # Другие пользователи не затронуты
+    assert limiter.check("2") == 0.0
+
+    clock.return_value += 30.0
+    assert limiter.check("1") == 0.0
+
+
+def test_rejected_request_consumes_nothing(clock):
+    limiter = RateLimiter("bot", messages_per_minute=10, images_per_hour=1)
+
+    assert limiter.check("1", images=1) == 0.0
+    assert limiter.check("1", images=1) > 0
+    assert limiter.throttled == 1
+
+    # Сообщения без фото проходят: бюджет сообщений не списан отклоненным запросом
+    for _ in range(9):
+        assert limiter.check("1") == 0.0
+    assert limiter.check("1") > 0
+
+
+def test_charged_response_tokens_delay_next_request(clock):
+    limiter = RateLimiter("bot", tokens_per_hour=3600)
+
+    assert limiter.check("1", tokens=100) == 0.0
+    limiter.charge("1", 4000)
+
+    assert limiter.check("1", tokens=100) == pytest.approx(600.0)
+
+
+def test_zero_budget_is_unlimited(clock):
+    limiter = RateLimiter("bot", messages_per_minute=0, tokens_per_hour=0, images_per_hour=0)
+
+    for _ in range(100):
+        assert limiter.check("1", tokens=10**6, images=10) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_state_persisted_between_restarts(db, clock):
+    limiter = RateLimiter("bot", messages_per_minute=1, db=db)
+    limiter.check("1")
+    limiter.check("2")
+    clock.return_value += 60.0
+    limiter.check("2")
+    await limiter.flush()
+
+    restored = RateLimiter("bot", messages_per_minute=1, db=db)
+    await restored.load()
+
+    assert restored.check("1") == 0.0
+    assert restored.check("2") > 0
+    # Состояние других процессов не загружается
+    other = RateLimiter("api", messages_per_minute=1, db=db)
+    await other.load()
+    assert other.check("2") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_flush_drops_refilled_buckets(db, clock):
+    limiter = RateLimiter("bot", messages_per_minute=1, db=db)
+    limiter.check("1")
+    clock.return_value += 60.0
+
+    await limiter.flush()
+
+    assert await db.fetchall("SELECT * FROM rate_limits") == []
+
+
+def test_helpers():
+    assert estimate_tokens(0) == 1
+    assert estimate_tokens(400) == 100
+    assert format_wait(0.2) == "1 с"
+    assert format_wait(59.5) == "1 мин"
+    assert format_wait(90) == "2 мин"
@@ -0,0 +1,143 @@
+"""Тесты для RealAnalyticsCollector."""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from src.api.real_analytics_collector import RealAnalyticsCollector
+from src.database import DatabaseManager
+
+
+@pytest_asyncio.fixture
+async def db():
+    """Тестовая БД в памяти."""
+    db_manager = DatabaseManager(":memory:")
+    await db_manager.connect()
+
+    await db_manager.execute("""
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE user_stats (
+            user_id INTEGER PRIMARY KEY,
+            message_count INTEGER NOT NULL,
+            total_length INTEGER NOT NULL,
+            image_count INTEGER NOT NULL,
+            first_message_at TEXT NOT NULL,
+            last_message_at TEXT NOT NULL
+        )
+    """)
+
+    yield db_manager
+    await db_manager.close()
+
+
+async def insert_message(db: DatabaseManager, user_id: int, created_at: datetime, length: int = 10):
+    """Вставить сообщение пользователя и обновить его первую активность."""
+    await db.execute(
+        "INSERT INTO messages (user_id, role, content, length, created_at) VALUES (?, ?, ?, ?, ?)",
+        (user_id, "user", "x" * length, length, created_at.isoformat()),
+    )
+    await db.execute(
+        """
+        INSERT INTO user_stats (
+            user_id, message_count, total_length, image_count, first_message_at, last_message_at
+        )
+        VALUES (?, 1, ?, 0, ?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET
+            first_message_at = MIN(first_message_at, excluded.first_message_at)
+        """,
+        (user_id, length, created_at.isoformat(), created_at.isoformat()),
+    )
+
+
+@pytest.mark.asyncio
+async def test_empty_database(db):
+    """Тест отчетов на пустой БД."""
+    collector = RealAnalyticsCollector(db)
+
+    retention = await collector.get_retention(days=7)
+    engagement = await collector.get_engagement(days=7)
+
+    assert retention.cohorts == []
+    assert retention.stickiness == 0.0
+    assert engagement.message_length.p50 == 0.0
+    assert all(histogram_bin.count == 0 for histogram_bin in engagement.messages_per_user)
+
+
+@pytest.mark.asyncio
+async def test_retention_by_cohort(db):
+    """Тест удержания когорты по дням после первой активности."""
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    two_days_ago = today - timedelta(days=2)
+    await insert_message(db, 1, two_days_ago)
+    await insert_message(db, 2, two_days_ago)
+    await insert_message(db, 1, two_days_ago + timedelta(days=1))
+    await insert_message(db, 1, today)
+    await insert_message(db, 2, today)
+
+    report = await RealAnalyticsCollector(db).get_retention(days=3)
+
+    assert len(report.cohorts) == 1
+    cohort = report.cohorts[0]
+    assert cohort.cohort_date == two_days_ago.date().isoformat()
+    assert cohort.size == 2
+    assert cohort.retention == [1.0, 0.5, 1.0]
+    assert report.stickiness == pytest.approx(5 / 3 / 2)
+
+
+@pytest.mark.asyncio
+async def test_retention_skips_users_active_before_period(db):
+    """Тест что старые пользователи не попадают в когорты новых."""
+    now = datetime.utcnow()
+    await insert_message(db, 1, now - timedelta(days=20))
+    await insert_message(db, 1, now)
+
+    report = await RealAnalyticsCollector(db).get_retention(days=7)
+
+    assert report.cohorts == []
+    assert report.stickiness > 0
+
+
+@pytest.mark.asyncio
+async def test_engagement_sessions_and_histogram(db):
+    """Тест разбиения на сессии и гистограммы сообщений на пользователя."""
+    start = datetime.utcnow().replace(hour=1, minute=0, second=0, microsecond=0)
+    # Пользователь 1: сессия из 3 сообщений за 20 минут и отдельная сессия через 2 часа
+    for minutes in (0, 10, 20, 140):
+        await insert_message(db, 1, start + timedelta(minutes=minutes), length=100)
+    await insert_message(db, 2, start, length=10)
+
+    report = await RealAnalyticsCollector(db).get_engagement(days=1)
+
+    assert report.session_messages.p99 == pytest.approx(2.96)
+    assert report.session_minutes.p50 == 0.0
+    counts = {
+        histogram_bin.min_value: histogram_bin.count for histogram_bin in report.messages_per_user
+    }
+    assert counts[1] == 1
+    assert counts[3] == 1
+    assert report.message_length.p50 == 100.0
+
+
+@pytest.mark.asyncio
+async def test_reports_cached_for_current_day(db):
+    """Тест кеширования отчета до конца суток."""
+    cache: dict = {}
+    collector = RealAnalyticsCollector(db, cache)
+    first = await collector.get_retention(days=7)
+
+    await insert_message(db, 1, datetime.utcnow())
+    second = await RealAnalyticsCollector(db, cache).get_retention(days=7)
+
+    assert second is first
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 import pytest
 import pytest_asyncio
 
+from src.activity_bitmap import ActivityBitmap
 from src.api.real_stat_collector import RealStatCollector
 from src.database import DatabaseManager
 
@@ -38,6 +39,49 @@ async def db():
         )
     """)
 
+    await db_manager.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE user_stats (
+            user_id INTEGER PRIMARY KEY,
+            message_count INTEGER NOT NULL,
+            total_length INTEGER NOT NULL,
+            image_count INTEGER NOT NULL,
+            first_message_at TEXT NOT NULL,
+            last_message_at TEXT NOT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TRIGGER user_stats_insert AFTER INSERT ON messages
+        WHEN new.role = 'user'
+        BEGIN
+            INSERT INTO user_stats (
+                user_id, message_count, total_length, image_count,
+                first_message_at, last_message_at
+            )
+            VALUES (
+                new.user_id, 1, new.length,
+                CASE WHEN json_valid(new.content)
+                    THEN (json_type(new.content, '$.image') IS NOT NULL)
+                        + COALESCE(json_array_length(new.content, '$.images'), 0)
+                    ELSE 0 END,
+                new.created_at, new.created_at
+            )
+            ON CONFLICT (user_id) DO UPDATE SET
+                message_count = message_count + 1,
+                total_length = total_length + excluded.total_length,
+                image_count = image_count + excluded.image_count,
+                first_message_at = MIN(first_message_at, excluded.first_message_at),
+                last_message_at = MAX(last_message_at, excluded.last_message_at);
+        END
+    """)
+
     yield db_manager
     await db_manager.close()
 
@@ -218,13 +262,9 @@ async def test_chart_data_aggregation(db, collector):
         )
 
     # Все отправляют сообщения сегодня
-    date_today = now.isoformat()
     for user_id in range(1, 4):
         for length in [10, 20, 30]:
-            await db.execute(
-                "INSERT INTO messages (user_id, role, content, length, created_at) VALUES (?, ?, ?, ?, ?)",
-                (user_id, "user", "x" * length, length, date_today),
-            )
+            await db.add_message(user_id, "user", "x" * length)
 
     stats = await collector.get_stats(days=1)
 
@@ -283,3 +323,139 @@ async def test_different_days_parameter(db, collector):
 
     assert len(stats_7.activity_chart) == 7
     assert len(stats_14.activity_chart) == 14
+
+
+@pytest.mark.asyncio
+async def test_active_today_uses_last_activity(db, collector):
+    """Тест что active_today считает пользователей с активностью за 24 часа."""
+    now = datetime.utcnow()
+    for telegram_id in (111, 222):
+        await db.execute(
+            "INSERT INTO users (telegram_id, created_at) VALUES (?, ?)",
+            (telegram_id, now.isoformat()),
+        )
+    await db.execute(
+        "INSERT INTO messages (user_id, role, content, length, created_at) VALUES (?, ?, ?, ?, ?)",
+        (1, "user", "Fresh", 5, now.isoformat()),
+    )
+    await db.execute(
+        "INSERT INTO messages (user_id, role, content, length, created_at) VALUES (?, ?, ?, ?, ?)",
+        (2, "user", "Stale", 5, (now - timedelta(days=3)).isoformat()),
+    )
+
+    stats = await collector.get_stats(days=7)
+
+    assert stats.metrics.active_today == 1
+
+
+@pytest.mark.asyncio
+async def test_get_users_sorted_by_messages(db, collector):
+    """Тест сортировки пользователей по количеству сообщений."""
+    now = datetime.utcnow().isoformat()
+    for telegram_id in (111, 222):
+        await db.execute(
+            "INSERT INTO users (telegram_id, created_at) VALUES (?, ?)",
+            (telegram_id, now),
+        )
+    for user_id, count in ((1, 1), (2, 3)):
+        for _ in range(count):
+            await db.execute(
+                "INSERT INTO messages (user_id, role, content, length, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (user_id, "user", '{"text": "hi", "image": "xx"}', 10, now),
+            )
+    await db.execute(
+        "INSERT INTO messages (user_id, role, content, length, created_at) VALUES (?, ?, ?, ?, ?)",
+        (1, "assistant", "Answer", 6, now),
+    )
+
+    page = await collector.get_users(sort="messages")
+
+    assert [user.telegram_id for user in page.users] == [222, 111]
+    assert page.users[0].message_count == 3
+    assert page.users[0].image_count == 3
+    assert page.users[0].avg_length == 10.0
+    assert page.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_users_counts_album_images(db, collector):
+    """Тест что альбом из трех фото увеличивает image_count на 3."""
+    now = datetime.utcnow().isoformat()
+    await db.execute(
+        "INSERT INTO users (telegram_id, created_at) VALUES (?, ?)",
+        (111, now),
+    )
+    await db.execute(
+        "INSERT INTO messages (user_id, role, content, length, created_at) VALUES (?, ?, ?, ?, ?)",
+        (1, "user", '{"text": "album", "images": ["a", "b", "c"]}', 5, now),
+    )
+    await db.execute(
+        "INSERT INTO messages (user_id, role, content, length, created_at) VALUES (?, ?, ?, ?, ?)",
+        (1, "user", "plain text", 10, now),
+    )
+
+    page = await collector.get_users(sort="messages")
+
+    assert page.users[0].image_count == 3
+
+
+@pytest.mark.asyncio
+async def test_get_users_keyset_pagination(db, collector):
+    """Тест keyset-пагинации списка пользователей."""
+    now = datetime.utcnow()
+    for i in range(5):
+        await db.execute(
+            "INSERT INTO users (telegram_id, created_at) VALUES (?, ?)",
+            (100 + i, now.isoformat()),
+        )
+        await db.execute(
+            "INSERT INTO messages (user_id, role, content, length, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (i + 1, "user", "Hi", 2, (now - timedelta(hours=i)).isoformat()),
+        )
+
+    first = await collector.get_users(sort="last_active", limit=2)
+    second = await collector.get_users(sort="last_active", limit=2, cursor=first.next_cursor)
+    third = await collector.get_users(sort="last_active", limit=2, cursor=second.next_cursor)
+
+    assert [user.telegram_id for user in first.users] == [100, 101]
+    assert [user.telegram_id for user in second.users] == [102, 103]
+    assert [user.telegram_id for user in third.users] == [104]
+    assert third.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_users_invalid_cursor(collector):
+    """Тест ошибки при некорректном курсоре."""
+    with pytest.raises(ValueError):
+        await collector.get_users(cursor="broken")
+
+
+@pytest.mark.asyncio
+async def test_wau_mau_from_daily_bitmaps(db, collector):
+    """Тест DAU/WAU/MAU по дневным битовым картам."""
+    today = datetime.utcnow().date()
+    days_ago = {1: 0, 2: 3, 3: 10}
+    for user_id, offset in days_ago.items():
+        bitmap = ActivityBitmap()
+        bitmap.add(user_id)
+        await db.execute(
+            "INSERT INTO daily_active_users (day, bitmap) VALUES (?, ?)",
+            ((today - timedelta(days=offset)).isoformat(), bitmap.to_bytes()),
+        )
+        await db.execute(
+            "INSERT INTO messages (user_id, role, content, length, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (user_id, "user", "Hi", 2, (datetime.utcnow() - timedelta(days=offset)).isoformat()),
+        )
+
+    stats = await collector.get_stats(days=14)
+
+    assert stats.metrics.dau == 1
+    assert stats.metrics.wau == 2
+    assert stats.metrics.mau == 3
+    last_point = stats.chart_data[-1]
+    assert last_point.active_users == 1
+    assert last_point.wau == 2
+    assert last_point.mau == 3
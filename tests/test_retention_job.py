@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from src.database import DatabaseManager
+from src.message_archive import MessageArchive
+from src.retention_job import RetentionJob
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "test.db"))
+    await db_manager.connect()
+
+    await db_manager.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    await db_manager.execute("""
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL
+        )
+    """)
+    await db_manager.execute("""
+        CREATE VIRTUAL TABLE messages_fts USING fts5(
+            content,
+            content='messages',
+            content_rowid='id'
+        )
+    """)
+    await db_manager.execute("""
+        CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+    await db_manager.execute("""
+        CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+    """)
+
+    yield db_manager
+    await db_manager.close()
+
+
+async def insert_messages(db: DatabaseManager, count: int, deleted_days_ago: int | None) -> None:
+    now = datetime.utcnow()
+    deleted_at = (
+        (now - timedelta(days=deleted_days_ago)).isoformat()
+        if deleted_days_ago is not None
+        else None
+    )
+    content = "сообщение " * 200
+    for _ in range(count):
+        await db.execute(
+            "INSERT INTO messages (user_id, role, content, length, created_at, deleted_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (1, "user", content, len(content), now.isoformat(), deleted_at),
+        )
+
+
+@pytest.mark.asyncio
+async def test_run_deletes_only_expired_soft_deleted(db):
+    await insert_messages(db, 3, deleted_days_ago=40)
+    await insert_messages(db, 2, deleted_days_ago=1)
+    await insert_messages(db, 1, deleted_days_ago=None)
+    job = RetentionJob(db, batch_size=2)
+
+    report = await job.run(older_than_days=30)
+
+    assert report["removed_messages"] == 3
+    row = await db.fetchone("SELECT COUNT(*) as count FROM messages")
+    assert row["count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_run_reclaims_space(db):
+    await insert_messages(db, 50, deleted_days_ago=40)
+    job = RetentionJob(db)
+
+    report = await job.run(older_than_days=30)
+
+    assert report["reclaimed_bytes"] > 0
+    assert report["size_after"] < report["size_before"]
+    freelist = await db.fetchone("PRAGMA freelist_count")
+    assert freelist["freelist_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_keeps_fts_consistent(db):
+    await insert_messages(db, 2, deleted_days_ago=40)
+    await insert_messages(db, 1, deleted_days_ago=None)
+    job = RetentionJob(db)
+
+    await job.run(older_than_days=30)
+
+    row = await db.fetchone(
+        "SELECT COUNT(*) as count FROM messages_fts WHERE messages_fts MATCH 'сообщение'"
+    )
+    assert row["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_skips_removed_messages(db, tmp_path):
+    await insert_messages(db, 2, deleted_days_ago=40)
+    await insert_messages(db, 1, deleted_days_ago=None)
+    job = RetentionJob(db, MessageArchive(db, str(tmp_path / "archive")))
+
+    await job.run(older_than_days=30)
+
+    rows = await db.fetchall("SELECT rowid FROM messages_fts WHERE messages_fts MATCH 'сообщение'")
+    assert [row["rowid"] for row in rows] == [3]
+    await db.execute("INSERT INTO messages_fts(messages_fts, rank) VALUES ('integrity-check', 1)")
+
+
+@pytest.mark.asyncio
+async def test_run_moves_expired_rows_to_archive(db, tmp_path):
+    await insert_messages(db, 2, deleted_days_ago=40)
+    archive = MessageArchive(db, str(tmp_path / "archive"))
+    job = RetentionJob(db, archive)
+
+    report = await job.run(older_than_days=30)
+
+    assert report["removed_messages"] == 2
+    assert len(archive.read_messages()) == 2
+
+
+@pytest.mark.asyncio
+async def test_run_prunes_change_feed(db):
+    await db.execute("""
+        CREATE TABLE change_feed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL,
+            message_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            changed_at TEXT NOT NULL
+        )
+    """)
+    now = datetime.utcnow()
+    for days_ago in [40, 35, 1]:
+        await db.execute(
+            "INSERT INTO change_feed (op, message_id, user_id, role, length, changed_at) "
+            "VALUES ('insert', 1, 1, 'user', 1, ?)",
+            ((now - timedelta(days=days_ago)).isoformat(),),
+        )
+    job = RetentionJob(db, batch_size=1)
+
+    await job.run(older_than_days=30)
+
+    row = await db.fetchone("SELECT COUNT(*) as count FROM change_feed")
+    assert row["count"] == 1
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.llm_backend import LLMBackend
+from src.llm_scheduler import INTERACTIVE, LLMScheduler
+from src.loop_monitor import LoopMonitor
+from src.saturation import SaturationMonitor
+
+
+@pytest.fixture
+def backends():
+    return [LLMBackend("http://node1/v1", "small"), LLMBackend("http://node2/v1", "small")]
+
+
+@pytest.fixture
+def monitor(backends):
+    llm_client = SimpleNamespace(pool=SimpleNamespace(backends=backends))
+    scheduler = LLMScheduler(MagicMock(pool=llm_client.pool), concurrency_per_backend=1)
+    db = SimpleNamespace(pending=0)
+    return SaturationMonitor(
+        llm_client,
+        scheduler,
+        db,
+        LoopMonitor(),
+        max_llm_queue=1,
+        max_db_pending=2,
+        max_loop_lag=0.1,
+    )
+
+
+def test_ready_when_under_thresholds(monitor):
+    snapshot = monitor.snapshot()
+
+    assert snapshot["status"] == "ready"
+    assert snapshot["backends_available"] == 2
+    assert snapshot["reasons"] == []
+    assert monitor.should_shed() is False
+
+
+def idle(backend):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_llm_queue_overload(monitor):
+    tasks = [
+        asyncio.create_task(monitor.scheduler.submit(INTERACTIVE, key, 1, idle)) for key in range(3)
+    ]
+    for backend in monitor.scheduler.backend_running:
+        monitor.scheduler.backend_running[backend] = 1
+    monitor.scheduler.running = 2
+    await asyncio.sleep(0)
+
+    snapshot = monitor.snapshot()
+
+    assert snapshot["llm_queued"] == 3
+    assert snapshot["status"] == "overloaded"
+    assert monitor.should_shed() is True
+    for backend in monitor.scheduler.backend_running:
+        monitor.scheduler.backend_running[backend] = 0
+    monitor.scheduler.running = 0
+    monitor.scheduler._dispatch()
+    await asyncio.gather(*tasks)
+
+
+def test_db_pending_and_loop_lag_overload(monitor):
+    monitor.db.pending = 3
+    monitor.loop_monitor._recent.append(0.5)
+
+    reasons = monitor.snapshot()["reasons"]
+
+    assert len(reasons) == 2
+
+
+def test_all_backends_open_not_ready(monitor, backends):
+    for backend in backends:
+        backend.breaker.trip(time.monotonic())
+
+    snapshot = monitor.snapshot()
+
+    assert snapshot["backends_available"] == 0
+    assert snapshot["status"] == "overloaded"
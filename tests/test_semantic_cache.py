@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.llm_backend import LLMBackend
+from src.llm_scheduler import ADMIN, INTERACTIVE, LLMScheduler
+from src.semantic_cache import SemanticCache
+
+VECTORS = {
+    "Как сбросить пароль?": [1.0, 0.0, 0.0],
+    "Как мне сбросить пароль?": [0.98, 0.05, 0.0],
+    "Какая погода?": [0.0, 1.0, 0.0],
+    "Сколько стоит подписка?": [0.0, 0.0, 1.0],
+}
+
+
+def embed(model, input):
+    return SimpleNamespace(data=[SimpleNamespace(index=0, embedding=VECTORS[input[0]])])
+
+
+def make_cache(**kwargs):
+    client = MagicMock()
+    client.embeddings.create.side_effect = embed
+    return SemanticCache(client, "embed-model", threshold=0.9, **kwargs)
+
+
+async def put(cache, scope, text, answer):
+    cached, vector = await cache.lookup(scope, text)
+    assert cached is None
+    cache.store(scope, vector, answer)
+
+
+@pytest.mark.asyncio
+async def test_paraphrase_hits_within_scope():
+    cache = make_cache()
+    await put(cache, "prompt", "Как сбросить пароль?", "Откройте настройки")
+
+    assert (await cache.lookup("prompt", "Как мне сбросить пароль?"))[0] == "Откройте настройки"
+    assert (await cache.lookup("prompt", "Какая погода?"))[0] is None
+    assert (await cache.lookup("other", "Как сбросить пароль?"))[0] is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 3, "hit_rate": 0.25}
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_not_served():
+    cache = make_cache(ttl_seconds=0.0)
+    await put(cache, "prompt", "Как сбросить пароль?", "Откройте настройки")
+
+    assert (await cache.lookup("prompt", "Как сбросить пароль?"))[0] is None
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(max_entries=2)
+    await put(cache, "prompt", "Как сбросить пароль?", "Пароль")
+    await put(cache, "prompt", "Какая погода?", "Погода")
+    # Обращение обновляет запись, вытесняется вторая
+    assert (await cache.lookup("prompt", "Как сбросить пароль?"))[0] == "Пароль"
+
+    await put(cache, "prompt", "Сколько стоит подписка?", "Подписка")
+
+    assert (await cache.lookup("prompt", "Как сбросить пароль?"))[0] == "Пароль"
+    assert (await cache.lookup("prompt", "Какая погода?"))[0] is None
+    assert (await cache.lookup("prompt", "Сколько стоит подписка?"))[0] == "Подписка"
+
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_first_turn_from_cache():
+    llm_client = MagicMock()
+    llm_client.pool.backends = [LLMBackend("http://node/v1", "model")]
+    llm_client.router.route.return_value = ("default", None)
+    llm_client.system_prompt = "Промпт"
+    llm_client.get_response.return_value = "Откройте настройки"
+    scheduler = LLMScheduler(llm_client, cache=make_cache())
+
+    first = [{"role": "user", "content": "Как сбросить пароль?"}]
+    paraphrase = [{"role": "user", "content": "Как мне сбросить пароль?"}]
+    assert await scheduler.get_response(INTERACTIVE, 1, first) == "Откройте настройки"
+    assert await scheduler.get_response(INTERACTIVE, 2, paraphrase) == "Откройте настройки"
+    assert llm_client.get_response.call_count == 1
+
+    # История и admin режим идут мимо кэша
+    history = [
+        {"role": "user", "content": "Привет"},
+        {"role": "assistant", "content": "Здравствуйте"},
+        {"role": "user", "content": "Как мне сбросить пароль?"},
+    ]
+    await scheduler.get_response(INTERACTIVE, 1, history)
+    await scheduler.get_response(ADMIN, "session", paraphrase, "Админ промпт", "admin")
+    assert llm_client.get_response.call_count == 3
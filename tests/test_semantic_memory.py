@@ -0,0 +1,157 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from src.database import DatabaseManager
+from src.semantic_memory import SemanticMemory, message_text
+from src.session_manager import SessionManager
+
+TOPICS = {"кот": [1.0, 0.0, 0.0], "погода": [0.0, 1.0, 0.0]}
+
+
+@pytest_asyncio.fixture
+async def db():
+    db_manager = DatabaseManager(":memory:")
+    await db_manager.connect()
+
+    await db_manager.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            deleted_at TEXT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
+    await db_manager.execute("""
+        CREATE TABLE message_embeddings (
+            message_id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            model TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+
+    yield db_manager
+    await db_manager.close()
+
+
+def embed(model, input):
+    def vector(text):
+        return next((v for topic, v in TOPICS.items() if topic in text), [0.0, 0.0, 3.0])
+
+    return SimpleNamespace(
+        data=[SimpleNamespace(index=i, embedding=vector(text)) for i, text in enumerate(input)]
+    )
+
+
+@pytest.fixture
+def client():
+    client = MagicMock()
+    client.embeddings.create.side_effect = embed
+    return client
+
+
+@pytest.fixture
+def manager(db, client):
+    memory = SemanticMemory(db, client, "embed-model", recent_messages=2, top_k=1)
+    return SessionManager(db, memory)
+
+
+async def add_turns(manager, turns):
+    for question, answer in turns:
+        await manager.add_message(123, "user", question)
+        await manager.add_message(123, "assistant", answer)
+
+
+@pytest.mark.asyncio
+async def test_context_keeps_recent_and_relevant_turns(manager):
+    await add_turns(
+        manager,
+        [
+            ("Как зовут моего кота?", "Барсик"),
+            ("Расскажи анекдот", "Анекдот"),
+            ("Посоветуй книгу", "Книга"),
+            ("Какая завтра погода?", "Солнечно"),
+        ],
+    )
+    await manager.add_message(123, "user", "Что любит мой кот?")
+
+    context = await manager.get_context(123)
+
+    assert context == [
+        {"role": "user", "content": "Как зовут моего кота?"},
+        {"role": "assistant", "content": "Барсик"},
+        {"role": "assistant", "content": "Солнечно"},
+        {"role": "user", "content": "Что любит мой кот?"},
+    ]
+    assert len(await manager.get_session(123)) == 9
+
+
+@pytest.mark.asyncio
+async def test_messages_are_embedded_once(manager, client, db):
+    await add_turns(manager, [("Вопрос", "Ответ")] * 3)
+    await manager.get_context(123)
+    assert client.embeddings.create.call_count == 1
+    assert len(client.embeddings.create.call_args[1]["input"]) == 6
+
+    await manager.add_message(123, "user", "Новый вопрос")
+    await manager.get_context(123)
+
+    assert client.embeddings.create.call_count == 2
+    assert client.embeddings.create.call_args[1]["input"] == ["Новый вопрос"]
+    row = await db.fetchone("SELECT vector FROM message_embeddings LIMIT 1")
+    vector = np.frombuffer(row["vector"], dtype=np.float16)
+    assert vector.shape == (3,)
+    assert np.isclose(np.linalg.norm(vector.astype(np.float32)), 1.0, atol=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_short_history_is_sent_whole(manager, client):
+    await add_turns(manager, [("Привет", "Здравствуйте")])
+
+    context = await manager.get_context(123)
+
+    assert len(context) == 2
+    client.embeddings.create.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_embedding_failure_falls_back_to_full_history(manager, client):
+    client.embeddings.create.side_effect = RuntimeError("Эмбеддинги недоступны")
+    await add_turns(manager, [("Вопрос", "Ответ")] * 3)
+
+    context = await manager.get_context(123)
+
+    assert len(context) == 6
+
+
+def test_message_text_handles_images():
+    assert message_text('{"text": "Подпись", "image": "AAAA"}') == "Подпись"
+    assert message_text('{"text": "", "image": "AAAA"}') == "[фото]"
+    assert message_text('{"text": "", "images": ["AAAA", "BBBB"]}') == "[фото]"
+    assert message_text("не JSON") == "не JSON"
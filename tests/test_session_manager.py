@@ -34,6 +34,13 @@ async def manager():
         )
     """)
 
+    await db.execute("""
+        CREATE TABLE daily_active_users (
+            day TEXT PRIMARY KEY,
+            bitmap BLOB NOT NULL
+        )
+    """)
+
     session_manager = SessionManager(db)
     yield session_manager
     await db.close()